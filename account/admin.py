@@ -1,7 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
-from account.models import User, OTPToken
+from account.models import User, OTPToken, EmailOutbox
 
 
 class UserAdmin(BaseUserAdmin):
@@ -17,5 +17,12 @@ class OTPTokenAdmin(admin.ModelAdmin):
     list_display = ('user', 'token', 'expiry_time')
     readonly_fields = ('id', 'token', 'expiry_time')
 
+
+class EmailOutboxAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'attempts', 'next_attempt', 'date_created')
+    readonly_fields = ('id', 'date_created', 'last_error')
+    search_fields = ('subject',)
+
 admin.site.register(User, UserAdmin)
 admin.site.register(OTPToken, OTPTokenAdmin)
+admin.site.register(EmailOutbox, EmailOutboxAdmin)
@@ -0,0 +1,183 @@
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from account.identity import forget_identities
+from account.models import User
+from accountProfile.models import Follow, Profile
+from accountProfile.timeline import backfill_timeline
+from blog.events import publish_blog_event
+from blog.models import Blog, Reaction
+
+
+BLOG_OPERATIONS = ('like', 'dislike', 'save', 'unsave')
+USER_OPERATIONS = ('follow', 'unfollow')
+MAX_OPERATIONS = 100
+
+
+def delta_case(deltas, field='pk'):
+    return Case(
+        *[When(**{field: key}, then=Value(delta)) for key, delta in deltas.items()],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+class BatchState:
+    """
+    The requesting user's reactions, saves and follows for the targets of a
+    batch, loaded with one query per relation and replayed in memory.
+    """
+
+    def __init__(self, user, blog_ids, user_ids):
+        self.user = user
+        self.blog_ids = set(Blog.objects.filter(pk__in=blog_ids).values_list('pk', flat=True))
+        self.user_ids = set(User.objects.filter(pk__in=user_ids, is_active=True).values_list('pk', flat=True))
+
+        self.reactions = dict(
+            Reaction.objects.filter(user=user, blog_id__in=self.blog_ids).values_list('blog_id', 'kind')
+        )
+        self.saved = set(
+            Profile.saved_blogs.through.objects
+            .filter(profile=user.profile, blog_id__in=self.blog_ids)
+            .values_list('blog_id', flat=True)
+        )
+        self.following = set(
+            Follow.objects.filter(follower=user, followee_id__in=self.user_ids).values_list('followee_id', flat=True)
+        )
+
+        self.initial_reactions = dict(self.reactions)
+        self.initial_saved = set(self.saved)
+        self.initial_following = set(self.following)
+
+    def react(self, blog_id, kind):
+        if self.reactions.get(blog_id) == kind:
+            del self.reactions[blog_id]
+        else:
+            self.reactions[blog_id] = kind
+
+    def apply(self, operation):
+        op = operation['op']
+        if op in BLOG_OPERATIONS:
+            blog_id = operation['blog']
+            result = {'op': op, 'blog': blog_id}
+            if blog_id not in self.blog_ids:
+                result['error'] = 'Blog not found.'
+                return result
+            if op == 'like':
+                self.react(blog_id, Reaction.LIKE)
+            elif op == 'dislike':
+                self.react(blog_id, Reaction.DISLIKE)
+            elif op == 'save':
+                self.saved.add(blog_id)
+            else:
+                self.saved.discard(blog_id)
+            return result
+
+        user_id = operation['user']
+        result = {'op': op, 'user': user_id}
+        if user_id not in self.user_ids or user_id == self.user.pk:
+            result['error'] = 'User not found.'
+        elif op == 'follow':
+            self.following.add(user_id)
+        else:
+            self.following.discard(user_id)
+        return result
+
+    def write_reactions_and_saves(self):
+        changed = {
+            blog_id for blog_id in self.blog_ids
+            if self.reactions.get(blog_id) != self.initial_reactions.get(blog_id)
+        }
+        Reaction.objects.filter(
+            user=self.user, blog_id__in=[blog_id for blog_id in changed if blog_id in self.initial_reactions]
+        ).delete()
+        Reaction.objects.bulk_create([
+            Reaction(blog_id=blog_id, user=self.user, kind=self.reactions[blog_id])
+            for blog_id in changed if blog_id in self.reactions
+        ])
+
+        saved_through = Profile.saved_blogs.through
+        saved_through.objects.filter(
+            profile=self.user.profile, blog_id__in=self.initial_saved - self.saved
+        ).delete()
+        saved_through.objects.bulk_create([
+            saved_through(profile=self.user.profile, blog_id=blog_id)
+            for blog_id in self.saved - self.initial_saved
+        ])
+
+        like_deltas, dislike_deltas = {}, {}
+        for blog_id in changed:
+            for kind, deltas in ((Reaction.LIKE, like_deltas), (Reaction.DISLIKE, dislike_deltas)):
+                delta = (self.reactions.get(blog_id) == kind) - (self.initial_reactions.get(blog_id) == kind)
+                if delta:
+                    deltas[blog_id] = delta
+
+        # Saves are per viewer and already part of the fragment ETag, so only
+        # reactions change the shared blog row.
+        if changed:
+            Blog.objects.filter(pk__in=changed).update(
+                like_count=F('like_count') + delta_case(like_deltas),
+                dislike_count=F('dislike_count') + delta_case(dislike_deltas),
+                version=F('version') + 1,
+            )
+        return changed
+
+    def write_follows(self):
+        added = self.following - self.initial_following
+        removed = self.initial_following - self.following
+
+        # Deleting through the queryset still sends post_delete, which
+        # decrements the counts and prunes timelines.
+        Follow.objects.filter(follower=self.user, followee_id__in=removed).delete()
+        Follow.objects.bulk_create([Follow(follower=self.user, followee_id=user_id) for user_id in added])
+
+        if added:
+            Profile.objects.filter(user_id__in=added).update(follower_count=F('follower_count') + 1)
+            Profile.objects.filter(user=self.user).update(following_count=F('following_count') + len(added))
+            forget_identities([*added, self.user.pk])
+        for author in User.objects.filter(pk__in=added):
+            backfill_timeline(self.user, author)
+
+
+def apply_batch(user, operations):
+    """
+    Apply a list of like, dislike, save, unsave, follow and unfollow
+    operations for `user` in one transaction.
+
+    Operations are replayed in order against the user's current state and
+    only the net difference is written, with bulk deletes and inserts.
+    Like and dislike toggle like their HTML views, while the others set state.
+    Returns one result per operation with the state its target ends the batch in.
+    """
+    blog_ids = {operation['blog'] for operation in operations if operation['op'] in BLOG_OPERATIONS}
+    reaction_blog_ids = {operation['blog'] for operation in operations if operation['op'] in ('like', 'dislike')}
+    user_ids = {operation['user'] for operation in operations if operation['op'] in USER_OPERATIONS}
+
+    with transaction.atomic():
+        state = BatchState(user, blog_ids, user_ids)
+        results = [state.apply(operation) for operation in operations]
+        reacted = state.write_reactions_and_saves()
+        state.write_follows()
+
+        counts = {}
+        if reaction_blog_ids:
+            counts = {
+                blog_id: {'like_count': like_count, 'dislike_count': dislike_count}
+                for blog_id, like_count, dislike_count in
+                Blog.objects.filter(pk__in=reaction_blog_ids).values_list('pk', 'like_count', 'dislike_count')
+            }
+        for blog_id in reacted:
+            publish_blog_event(blog_id, 'likes', counts[blog_id])
+
+    for result in results:
+        if 'error' in result:
+            continue
+        if 'blog' in result:
+            blog_id = result['blog']
+            result['liked'] = state.reactions.get(blog_id) == Reaction.LIKE
+            result['disliked'] = state.reactions.get(blog_id) == Reaction.DISLIKE
+            result['saved'] = blog_id in state.saved
+            result.update(counts.get(blog_id, {}))
+        else:
+            result['following'] = result['user'] in state.following
+    return results
@@ -3,7 +3,22 @@ from lib2to3.pgen2 import token
 from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 
-from account.models import OTPToken, User
+from account.models import OTPToken, User, get_normalized_email
+from account.api.batch import BLOG_OPERATIONS, USER_OPERATIONS, MAX_OPERATIONS
+
+
+def validate_unique_email(value, instance=None):
+    """
+    Emails are unique on their normalized form, a case variant of another
+    account's email would fail on the email_normalized index.
+    """
+    users = User.objects.filter(email_normalized=get_normalized_email(value))
+    if instance is not None:
+        users = users.exclude(pk=instance.pk)
+    if users.exists():
+        raise serializers.ValidationError('An account with that email already exists.')
+    return value
+
 
 class RegistrationSerializer(serializers.ModelSerializer):
     password1 = serializers.CharField()
@@ -13,6 +28,9 @@ class RegistrationSerializer(serializers.ModelSerializer):
         model = User
         fields = ['email', 'username', 'password1', 'password2']
 
+    def validate_email(self, value):
+        return validate_unique_email(value)
+
     def validate(self, data):
         if data['password1'] != data['password2']:
             raise serializers.ValidationError('Passwords didnt match.')
@@ -35,9 +53,12 @@ class RegistrationSerializer(serializers.ModelSerializer):
 
 
 class AccountSerializer(serializers.ModelSerializer):
-    email = serializers.EmailField(validators=[UniqueValidator(User.objects.all())])
+    email = serializers.EmailField()
     username = serializers.CharField(validators=[UniqueValidator(User.objects.all())])
 
+    def validate_email(self, value):
+        return validate_unique_email(value, self.instance)
+
     def validate_username(self, value):
         if len(str(value)) < 5:
             raise serializers.ValidationError(f'Username must be at least 5 character.')
@@ -90,11 +111,8 @@ class ResetPasswordEmailSerializer(serializers.ModelSerializer):
     email = serializers.EmailField()
 
     def validate(self, attrs):
-        try:
-            account = User.objects.get(email=attrs['email'])
-            print(account)
-        except User.DoesNotExist:
-                raise serializers.ValidationError('This email does not exist in our database.')
+        if not User.objects.filter(email_normalized=get_normalized_email(attrs['email'])).exists():
+            raise serializers.ValidationError('This email does not exist in our database.')
         return attrs
 
     class Meta:
@@ -108,28 +126,19 @@ class TokenResetpasswordSerializer(serializers.ModelSerializer):
     password1 = serializers.CharField()
     password2 = serializers.CharField()
 
-    def validate_token(self, value):
-        token = None
-        try:
-            token = OTPToken.objects.get(token=value)
-        except OTPToken.DoesNotExist:
-            raise serializers.ValidationError('Invalid token. Please enter correct one from your email.')
-        if token.is_expired:
-            raise serializers.ValidationError('Token expired. Request for a new token.')
-        return value
-
-    def validate_email(self, value):
-        try:
-            user = User.objects.get(email=value)
-        except User.DoesNotExist:
-            raise serializers.ValidationError('User for that email not found. please enter a valid email.')
-        return value
-
     def validate(self, attrs):
-        try:
-            token = OTPToken.objects.filter(token=attrs['token']).filter(user__email=attrs['email']).distinct()
-        except OTPToken.DoesNotExist:
-            raise serializers.ValidationError('Invalid email or token. Please enter correct token from your email.')
+        # One lookup on the (user, token) index, joined to the email's user.
+        token = (
+            OTPToken.objects
+            .filter(user__email_normalized=get_normalized_email(attrs['email']), token=attrs['token'])
+            .select_related('user')
+            .first()
+        )
+        if token is None:
+            raise serializers.ValidationError({'token': 'Invalid token. Please enter correct one from your email.'})
+        if token.is_expired:
+            raise serializers.ValidationError({'token': 'Token expired. Request for a new token.'})
+        attrs['user'] = token.user
         if attrs['password1'] != attrs['password2']:
             raise serializers.ValidationError({'password2': 'The passwords didnt match'})
         return attrs
@@ -137,3 +146,23 @@ class TokenResetpasswordSerializer(serializers.ModelSerializer):
     class Meta:
         model = OTPToken
         fields = ['token', 'email', 'password1', 'password2']
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    op = serializers.ChoiceField(choices=BLOG_OPERATIONS + USER_OPERATIONS)
+    blog = serializers.UUIDField(required=False)
+    user = serializers.UUIDField(required=False)
+
+    def validate(self, attrs):
+        target = 'blog' if attrs['op'] in BLOG_OPERATIONS else 'user'
+        if target not in attrs:
+            raise serializers.ValidationError({target: f'This field is required for {attrs["op"]}.'})
+        return attrs
+
+
+class BatchSerializer(serializers.Serializer):
+    operations = serializers.ListField(
+        child=BatchOperationSerializer(),
+        allow_empty=False,
+        max_length=MAX_OPERATIONS,
+    )
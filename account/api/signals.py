@@ -1,12 +1,21 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 
 from rest_framework.authtoken.models import Token
 
 from account.models import User
+from account.api.authentication import forget_token
 
 
 @receiver(post_save, sender=User)
 def generate_auth_token(sender, instance=None, created=False, **kwargs):
     if created:
         Token.objects.create(user=instance)
+
+
+@receiver(post_delete, sender=Token)
+def forget_deleted_token(sender, instance, **kwargs):
+    """
+    A rotated token, or the token of a deleted account, stops working at once
+    """
+    forget_token(instance.key)
@@ -6,6 +6,7 @@ from account.api.views import (
     registration_api_view, 
     account_verify_api_view,
     account_search_api_view,
+    batch_api_view,
 
     account_deactivate_api_view,
     account_delete_api_view,
@@ -31,6 +32,7 @@ urlpatterns = [
     path('login/', obtain_auth_token, name='api-login'),
     path('account/', AccountDetailAPIView.as_view(), name='api-account-detail'),
     path('account_search/', account_search_api_view, name='api-account-search'),
+    path('batch/', batch_api_view, name='api-batch'),
 
     path('account_deactivate/', account_deactivate_api_view, name='api-account-deactivate'),
     path('account_delete/', account_delete_api_view, name='api-account-delete'),
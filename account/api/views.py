@@ -2,7 +2,6 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework import status
 
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
 
@@ -10,15 +9,18 @@ from django.contrib.sites.shortcuts import get_current_site
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils.encoding import force_bytes, force_text
-from django.core.mail import send_mail
-from django.conf import settings
 
+from django.db import IntegrityError, transaction
 from django.shortcuts import redirect
 from django.contrib import messages
 
-from account.models import OTPToken, User
+from account.models import OTPToken, User, get_normalized_email
+from account.user_search import search_users
 from account.tokens import account_activation_token
-from account.api.serializer import RegistrationSerializer, AccountSerializer, ChangePasswordSerializer, ResetPasswordEmailSerializer, ResetPasswordSerializer, TokenResetpasswordSerializer
+from account.outbox import queue_email
+from account.api.authentication import CachedTokenAuthentication
+from account.api.batch import apply_batch
+from account.api.serializer import RegistrationSerializer, AccountSerializer, ChangePasswordSerializer, ResetPasswordEmailSerializer, ResetPasswordSerializer, TokenResetpasswordSerializer, BatchSerializer
 
 
 @api_view(['POST', ])
@@ -34,18 +36,19 @@ def registration_api_view(request, *args, **kwargs):
 
         try:
             if serializer.is_valid():
-                user = serializer.save()
-
-                site = get_current_site(request)
-                subject = 'Activate Your Account.'
-                message = render_to_string('account/api/api_account_activation_email.html', {
-                    'user': user,
-                    'domain': site.domain,
-                    'uid': urlsafe_base64_encode(force_bytes(user.id)),
-                    'token': account_activation_token.make_token(user),
-                    'redirect_link': redirect_link
-                })
-                send_mail(subject, message, settings.EMAIL_HOST_USER, [user.email, ], fail_silently=False)
+                with transaction.atomic():
+                    user = serializer.save()
+
+                    site = get_current_site(request)
+                    subject = 'Activate Your Account.'
+                    message = render_to_string('account/api/api_account_activation_email.html', {
+                        'user': user,
+                        'domain': site.domain,
+                        'uid': urlsafe_base64_encode(force_bytes(user.id)),
+                        'token': account_activation_token.make_token(user),
+                        'redirect_link': redirect_link
+                    })
+                    queue_email(subject, message, [user.email, ])
                 return Response({'message': 'An activation email is sent to your email. \nPlease Check your email to login.'}, status=status.HTTP_200_OK)
             else:
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -76,7 +79,7 @@ def account_verify_api_view(request, uidb64, token, redirect_link, *args, **kwar
 
 class AccountDetailAPIView(APIView):
 
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get(self, request, format=None):
@@ -87,9 +90,8 @@ class AccountDetailAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def put(self, request, format=None):
-        user = request.user
-        if user != request.user:
-            return Response({'message': 'Illegal Access Attempt!'}, status=status.HTTP_401_UNAUTHORIZED)
+        # The authenticated user is a cached copy, write from the current row.
+        user = User.objects.get(pk=request.user.pk)
         serializer = AccountSerializer(user, data=request.data, partial=True)
         if serializer.is_valid():
             serializer.save()
@@ -108,13 +110,13 @@ class AccountDetailAPIView(APIView):
 @api_view(['POST',])
 @permission_classes([IsAuthenticated])
 def password_change_api_view(request):
-    user = request.user
+    user = User.objects.get(pk=request.user.pk)
     if request.method == 'POST':
-        serializer = ChangePasswordSerializer(data=request.data, context={'user': request.user})
+        serializer = ChangePasswordSerializer(data=request.data, context={'user': user})
         if serializer.is_valid():
             password = request.data['password1']
             user.set_password(password)
-            user.save()
+            user.save(update_fields=['password'])
             return Response({'message': 'Password changed successfully.'},status=status.HTTP_200_OK)
         else:
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -128,7 +130,7 @@ def password_reset_request_api_view(request):
     redirect_link = request.data['redirect_link']
     if serializer.is_valid():
 
-        user = User.objects.get(email=request.data['email'])
+        user = User.objects.get(email_normalized=get_normalized_email(request.data['email']))
 
         try:
             site = get_current_site(request)
@@ -140,7 +142,7 @@ def password_reset_request_api_view(request):
                 'token': account_activation_token.make_token(user),
                 'redirect_link': redirect_link
             })
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [user.email,], fail_silently=False)
+            queue_email(subject, message, [user.email,])
             return Response({'message': 'A Password reset mail is sent to your email. \nPlease Check your email to login.'}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'message': 'Something went wrong. \nPlease retry.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -188,7 +190,7 @@ def password_reset_api_view(request, id):
 def account_search_api_view(request):
     user = request.user
     query = request.data['userQuery']
-    users = User.objects.filter(username__icontains=query).filter(email__icontains=query).exclude(email=user.email).distinct()
+    users = search_users(query, exclude=user)
     if users:
         serializer = AccountSerializer(users, many=True)
         return Response(serializer.data)
@@ -196,6 +198,20 @@ def account_search_api_view(request):
         return Response({'message': 'No users found.'})
 
 
+@api_view(['post',])
+@permission_classes([IsAuthenticated])
+def batch_api_view(request):
+    serializer = BatchSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        results = apply_batch(request.user, serializer.validated_data['operations'])
+    except IntegrityError:
+        return Response({'message': 'Conflicting update from another session. Please retry.'}, status=status.HTTP_409_CONFLICT)
+    return Response({'results': results}, status=status.HTTP_200_OK)
+
+
 @api_view(['post',])
 def password_reset_request_token_api_view(request):
     serializer = ResetPasswordEmailSerializer(data= {
@@ -203,16 +219,17 @@ def password_reset_request_token_api_view(request):
     })
     if serializer.is_valid():
 
-        user = User.objects.get(email=request.data['email'])
-        otp_token = OTPToken.objects.create(user=user)
+        user = User.objects.get(email_normalized=get_normalized_email(request.data['email']))
 
         try:
-            subject = 'Reset Your password'
-            message = render_to_string('account/api/api_token_password_reset_email.html', {
-                'user': user,
-                'token': otp_token.token,
-            })
-            send_mail(subject, message, settings.EMAIL_HOST_USER, [user.email,], fail_silently=False)
+            with transaction.atomic():
+                otp_token = OTPToken.objects.create(user=user)
+                subject = 'Reset Your password'
+                message = render_to_string('account/api/api_token_password_reset_email.html', {
+                    'user': user,
+                    'token': otp_token.token,
+                })
+                queue_email(subject, message, [user.email,])
             return Response({'message': 'A Password reset mail with token is sent to your email.'}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({'message': 'Something went wrong. \nPlease retry.'}, status=status.HTTP_400_BAD_REQUEST)
@@ -229,14 +246,10 @@ def password_reset_token_api_view(request):
         'password2': request.data['password2'],
     })
     if serializer.is_valid():
-        user = User.objects.get(email=request.data['email'])
-        if user:
-            password = request.data['password1']
-            user.set_password(password)
-            user.save()
-            return Response({'message': 'Password reset success'}, status=status.HTTP_200_OK)
-        else:
-            return Response({'non_field_errors': 'User not found. Something went wrong while resetting password'}, status=status.HTTP_400_BAD_REQUEST)
+        user = serializer.validated_data['user']
+        user.set_password(serializer.validated_data['password1'])
+        user.save(update_fields=['password'])
+        return Response({'message': 'Password reset success'}, status=status.HTTP_200_OK)
     else:
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
@@ -247,7 +260,7 @@ def account_deactivate_api_view(request):
 
     if request.method == 'POST':
         user.is_active = False
-        user.save()
+        user.save(update_fields=['is_active'])
         return Response({'message': 'Account deactivated successfully. Proceed to login to reactivate your account again.'}, status=status.HTTP_200_OK)
 
 
@@ -1,19 +1,47 @@
-from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
 
+from account.identity import forget_identity, load_identity
+from account.models import get_normalized_email
+
 
 class CaseInsensitiveModelBackend(ModelBackend):
-    def authenticate(self, request, username=None, password=None, **kwargs):
-        UserModel = settings.AUTH_USER_MODEL
+    """
+    Authenticate by email whatever its case, with one lookup on the indexed
+    normalized email.
+
+    With reactivate=True a deactivated account whose password matches is
+    activated again, through an UPDATE that only applies while it is still
+    inactive.
+
+    The user of a session is loaded with their profile and cached, see
+    account.identity.
+    """
+
+    def authenticate(self, request, username=None, password=None, reactivate=False, **kwargs):
+        UserModel = get_user_model()
         if username is None:
             username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
         try:
-            case_insensitive_username_field = '{}__iexact'.format(UserModel.USERNAME_FIELD)
-            user = UserModel._default_manager.get(**{case_insensitive_username_field: username})
+            user = UserModel._default_manager.get(email_normalized=get_normalized_email(username))
         except UserModel.DoesNotExist:
             # Run the default password hasher once to reduce the timing
             # difference between an existing and a non-existing user (#20760).
             UserModel().set_password(password)
-        else:
-            if user.check_password(password) and self.user_can_authenticate(user):
-                return user
\ No newline at end of file
+            return None
+
+        if not user.check_password(password):
+            return None
+        if not user.is_active and reactivate:
+            if UserModel._default_manager.filter(pk=user.pk, is_active=False).update(is_active=True):
+                forget_identity(user.pk)
+            user.is_active = True
+        if self.user_can_authenticate(user):
+            return user
+        return None
+
+    def get_user(self, user_id):
+        user = load_identity(user_id)
+        return user if user is not None and self.user_can_authenticate(user) else None
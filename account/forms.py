@@ -1,7 +1,7 @@
 from django import forms
 from django.contrib.auth import password_validation
 
-from account.models import User
+from account.models import User, get_normalized_email
 
 
 class LoginForm(forms.ModelForm):
@@ -14,10 +14,9 @@ class LoginForm(forms.ModelForm):
     )
 
     def clean_email(self):
-        email = self.cleaned_data.get('email')
-        if not User.objects.filter(email=email).exists():
-            raise forms.ValidationError(f'Invalid email or password.')
-        return email
+        # Whether the account exists is left to authenticate(), which looks
+        # it up once.
+        return get_normalized_email(self.cleaned_data.get('email'))
 
     def clean_text(self):
         text = self.cleaned_data.get('text')
@@ -48,7 +47,7 @@ class RegistrationForm(forms.ModelForm):
 
     def clean_email(self):
         email = self.cleaned_data.get('email')
-        if User.objects.filter(email=email).exists():
+        if User.objects.filter(email_normalized=get_normalized_email(email)).exists():
             raise forms.ValidationError(f'This email is already registered. Login to continue.')
         return email
 
@@ -92,6 +91,13 @@ class RegistrationForm(forms.ModelForm):
 
 class UserUpdateForm(forms.ModelForm):
 
+    def clean_email(self):
+        email = self.cleaned_data.get('email')
+        users = User.objects.filter(email_normalized=get_normalized_email(email)).exclude(pk=self.instance.pk)
+        if users.exists():
+            raise forms.ValidationError(f'This email is already registered.')
+        return email
+
     def clean_display_pic(self):
         display_pic = self.cleaned_data.get('display_pic')
         extension = str(display_pic).split('.')[-1]
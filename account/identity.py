@@ -0,0 +1,48 @@
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+from account.models import User
+
+
+def get_version_key(user_id):
+    return f'identity-version:{user_id}'
+
+
+def get_identity_version(user_id):
+    key = get_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = uuid.uuid4().hex
+        if not cache.add(key, version, None):
+            version = cache.get(key, version)
+    return version
+
+
+def forget_identities(user_ids):
+    """
+    Move users to a new version, so copies cached before a change, even
+    ones still being written by a concurrent load, are never served again
+    """
+    cache.set_many({get_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
+
+
+def forget_identity(user_id):
+    forget_identities([user_id])
+
+
+def load_identity(user_id):
+    """
+    The user with their profile, from the cache or with one query
+    """
+    key = f'identity:{user_id}:{get_identity_version(user_id)}'
+    user = cache.get(key)
+    if user is None:
+        # Read from the primary even in views routed to a replica, a lagging
+        # replica's row would be cached under the current version.
+        user = User.objects.using(DEFAULT_DB_ALIAS).select_related('profile').filter(pk=user_id).first()
+        if user is not None:
+            cache.set(key, user, settings.IDENTITY_CACHE_TIMEOUT)
+    return user
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from account.models import OTPToken
+
+
+class Command(BaseCommand):
+    help = 'Delete expired password reset tokens in bounded chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of tokens deleted per statement.',
+        )
+
+    def handle(self, *args, **options):
+        deleted = OTPToken.objects.purge_expired(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired tokens.'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from account.models import User
+from account.user_search import update_user_search_tokens
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the prefix/trigram user search index.'
+
+    def handle(self, *args, **options):
+        count = 0
+        for user in User.objects.only('id', 'username', 'name', 'email').iterator(chunk_size=500):
+            update_user_search_tokens(user)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} users.'))
@@ -0,0 +1,45 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from account.outbox import send_queued_emails
+
+
+class Command(BaseCommand):
+    help = 'Send the emails queued in the outbox over one reused mail connection.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for queued emails instead of exiting when the outbox is empty.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Seconds to sleep between polls in --loop mode.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Number of emails claimed per poll.',
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection()
+        try:
+            while True:
+                sent, failed = send_queued_emails(connection, options['batch_size'])
+                if sent or failed:
+                    self.stdout.write(f'Sent {sent} emails, {failed} failed.')
+                elif not options['loop']:
+                    break
+                else:
+                    # Idle servers drop connections, start afresh on the next batch.
+                    connection.close()
+                    time.sleep(options['interval'])
+        finally:
+            connection.close()
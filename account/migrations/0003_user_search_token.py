@@ -0,0 +1,61 @@
+# Generated by Django 3.2 on 2026-10-18 17:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# Frozen copy of the tokenizer in account.user_search at the time of this
+# migration, so later changes to it do not rewrite what this one does.
+def normalize(value):
+    return ' '.join(str(value or '').lower().split())
+
+
+def get_user_tokens(user):
+    words = {normalize(user.username), normalize(user.email).split('@')[0]}
+    words.add(normalize(user.name))
+    words.update(normalize(user.name).split())
+
+    tokens = set()
+    for word in filter(None, words):
+        tokens.add(('w', word[:64]))
+        tokens.update(('t', word[i:i + 3]) for i in range(len(word) - 2))
+    return tokens
+
+
+def populate_search_tokens(apps, schema_editor):
+    User = apps.get_model('account', 'User')
+    UserSearchToken = apps.get_model('account', 'UserSearchToken')
+    for user in User.objects.only('id', 'username', 'name', 'email').iterator():
+        UserSearchToken.objects.bulk_create(
+            [UserSearchToken(user=user, kind=kind, token=token) for kind, token in get_user_tokens(user)],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0002_auto_20220416_1023'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('w', 'word'), ('t', 'trigram')], max_length=1, verbose_name='Kind')),
+                ('token', models.CharField(max_length=64, verbose_name='Token')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'User Search Token',
+                'verbose_name_plural': 'User Search Tokens',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='usersearchtoken',
+            constraint=models.UniqueConstraint(fields=('kind', 'token', 'user'), name='unique_user_search_token'),
+        ),
+        migrations.RunPython(populate_search_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 3.2 on 2026-10-18 17:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0003_user_search_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='display_pic_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Profile Picture Height'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='display_pic_variants',
+            field=models.JSONField(default=dict, editable=False, verbose_name='Profile Picture Variants'),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='display_pic_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Profile Picture Width'),
+        ),
+    ]
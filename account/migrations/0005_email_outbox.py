@@ -0,0 +1,38 @@
+# Generated by Django 3.2 on 2026-10-18 17:31
+
+import account.models
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0004_image_variants'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailOutbox',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('subject', models.CharField(max_length=255, verbose_name='Subject')),
+                ('body', models.TextField(verbose_name='Body')),
+                ('from_email', models.CharField(max_length=254, verbose_name='From')),
+                ('recipients', models.JSONField(verbose_name='Recipients')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Attempts')),
+                ('next_attempt', models.DateTimeField(default=account.models.getNextAttemptTime, null=True, verbose_name='Next Attempt')),
+                ('last_error', models.TextField(blank=True, verbose_name='Last Error')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+            ],
+            options={
+                'verbose_name': 'Email Outbox',
+                'verbose_name_plural': 'Email Outbox',
+                'ordering': ['next_attempt'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='emailoutbox',
+            index=models.Index(fields=['next_attempt'], name='email_outbox_due_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2 on 2026-10-18 17:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0005_email_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='otptoken',
+            index=models.Index(fields=['user', 'token'], name='otp_user_token_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='otptoken',
+            index=models.Index(fields=['expiry_time'], name='otp_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2 on 2026-10-18 17:34
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def check_email_conflicts(apps, schema_editor):
+    """
+    Emails registered twice with a different case have to be resolved by
+    hand first, the unique index on the normalized email refuses them.
+    """
+    User = apps.get_model('account', 'User')
+    accounts = defaultdict(list)
+    for username, email in User.objects.order_by('date_joined').values_list('username', 'email').iterator():
+        accounts[email.strip().lower()].append(f'{username} <{email}>')
+    conflicts = ['; '.join(names) for names in accounts.values() if len(names) > 1]
+    if conflicts:
+        raise RuntimeError(
+            'Accounts share an email that only differs in case, change or merge them and migrate again:\n'
+            + '\n'.join(conflicts)
+        )
+
+
+def fill_email_normalized(apps, schema_editor):
+    User = apps.get_model('account', 'User')
+    users = list(User.objects.only('id', 'email'))
+    for user in users:
+        user.email_normalized = user.email.strip().lower()
+    User.objects.bulk_update(users, ['email_normalized'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0006_otp_token_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_email_conflicts, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='user',
+            name='email_normalized',
+            field=models.CharField(editable=False, max_length=64, null=True, unique=True, verbose_name='Normalized Email'),
+        ),
+        migrations.RunPython(fill_email_normalized, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.utils.translation import gettext_lazy as _
 
+import os
 import uuid
 from datetime import datetime, timedelta, timezone
 import random
@@ -36,14 +37,23 @@ class UserManager(BaseUserManager):
 
 
 def get_user_display_pic(user, filename):
-    return f'display_pics/{user.id}/display_pic.png'
+    # Only the extension is kept, the storage names the file after its content.
+    extension = os.path.splitext(filename)[1].lower() or '.png'
+    return f'display_pics/{user.id}/display_pic{extension}'
 
 
 def get_default_display_pic():
     return 'default/dummy_image.png'
 
 
+def get_normalized_email(email):
+    return (email or '').strip().lower()
+
+
 class User(AbstractBaseUser, PermissionsMixin):
+    # Max widths of the variants generated by the imaging app.
+    IMAGE_VARIANTS = {'display_pic': {'thumbnail': 64, 'feed': 160, 'full': 480}}
+
     id = models.UUIDField(
         verbose_name = _('ID'),
         primary_key = True,
@@ -60,6 +70,14 @@ class User(AbstractBaseUser, PermissionsMixin):
             'invalid' : _('Enter a valid email address.'),
         }
     )
+    # Lowercased copy of the email, the unique index logins and lookups use.
+    email_normalized = models.CharField(
+        verbose_name = _('Normalized Email'),
+        max_length = 64,
+        unique = True,
+        null = True,
+        editable = False,
+    )
     username = models.CharField(
         verbose_name = _('Username'),
         max_length = 64,
@@ -119,6 +137,21 @@ class User(AbstractBaseUser, PermissionsMixin):
         default = get_default_display_pic,
         upload_to = get_user_display_pic,
     )
+    display_pic_width = models.PositiveIntegerField(
+        verbose_name = _('Profile Picture Width'),
+        null = True,
+        editable = False,
+    )
+    display_pic_height = models.PositiveIntegerField(
+        verbose_name = _('Profile Picture Height'),
+        null = True,
+        editable = False,
+    )
+    display_pic_variants = models.JSONField(
+        verbose_name = _('Profile Picture Variants'),
+        default = dict,
+        editable = False,
+    )
     text = models.TextField(
         verbose_name=_('Text'),
         max_length=32,
@@ -132,8 +165,15 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.username
 
+    def save(self, *args, **kwargs):
+        self.email_normalized = get_normalized_email(self.email)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'email' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'email_normalized'}
+        super().save(*args, **kwargs)
+
     def get_display_pic_name(self):
-        return str(self.display_pic)[str(self.display_pic).index(f'display_pics/{self.id}/'):]
+        return self.display_pic.name
 
     class Meta:
         verbose_name = _('User')
@@ -141,6 +181,37 @@ class User(AbstractBaseUser, PermissionsMixin):
         ordering = ['-date_joined']
 
 
+class UserSearchToken(models.Model):
+    WORD = 'w'
+    TRIGRAM = 't'
+    TOKEN_KINDS = (
+        (WORD, 'word'),
+        (TRIGRAM, 'trigram'),
+    )
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+    )
+    kind = models.CharField(
+        verbose_name = _('Kind'),
+        max_length = 1,
+        choices = TOKEN_KINDS,
+    )
+    token = models.CharField(
+        verbose_name = _('Token'),
+        max_length = 64,
+    )
+
+    class Meta:
+        verbose_name = _('User Search Token')
+        verbose_name_plural = _('User Search Tokens')
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'token', 'user'], name='unique_user_search_token'),
+        ]
+
+
 def getExpiryTime():
     return datetime.now() + timedelta(minutes=5)
 
@@ -149,6 +220,22 @@ def getOTPToken():
     return random.randrange(100000, 999999)
 
 
+class OTPTokenManager(models.Manager):
+
+    def purge_expired(self, batch_size=1000):
+        """
+        Delete expired tokens with one bounded DELETE per chunk, so a large
+        backlog never holds the write lock for long. Returns the count.
+        """
+        now = datetime.now(timezone.utc)
+        deleted = 0
+        while True:
+            ids = list(self.filter(expiry_time__lt=now).values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return deleted
+            deleted += self.filter(pk__in=ids).delete()[0]
+
+
 class OTPToken(models.Model):
     id = models.UUIDField(
         verbose_name = _('ID'),
@@ -171,6 +258,8 @@ class OTPToken(models.Model):
         editable=False
     )
 
+    objects = OTPTokenManager()
+
     def __str__(self):
         return self.user.name + str(self.token)
 
@@ -182,3 +271,70 @@ class OTPToken(models.Model):
         verbose_name = _('OTPToken')
         verbose_name_plural = _('OTPTokens')
         ordering = ['-expiry_time']
+        indexes = [
+            models.Index(fields=['user', 'token'], name='otp_user_token_idx'),
+            models.Index(fields=['expiry_time'], name='otp_expiry_idx'),
+        ]
+
+
+def getNextAttemptTime():
+    return datetime.now(timezone.utc)
+
+
+class EmailOutbox(models.Model):
+    """
+    A transactional email, written in the transaction of the request that
+    caused it and sent by the `send_queued_emails` command.
+    """
+    # Attempts after which an email is kept for inspection, with no next
+    # attempt, instead of retried.
+    MAX_ATTEMPTS = 6
+
+    id = models.UUIDField(
+        verbose_name = _('ID'),
+        primary_key = True,
+        default = uuid.uuid4,
+        editable = False,
+    )
+    subject = models.CharField(
+        verbose_name = _('Subject'),
+        max_length = 255,
+    )
+    body = models.TextField(
+        verbose_name = _('Body'),
+    )
+    from_email = models.CharField(
+        verbose_name = _('From'),
+        max_length = 254,
+    )
+    recipients = models.JSONField(
+        verbose_name = _('Recipients'),
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name = _('Attempts'),
+        default = 0,
+    )
+    next_attempt = models.DateTimeField(
+        verbose_name = _('Next Attempt'),
+        null = True,
+        default = getNextAttemptTime,
+    )
+    last_error = models.TextField(
+        verbose_name = _('Last Error'),
+        blank = True,
+    )
+    date_created = models.DateTimeField(
+        verbose_name = _('Date Created'),
+        auto_now_add = True,
+    )
+
+    def __str__(self):
+        return f'{self.subject} to {", ".join(self.recipients)}'
+
+    class Meta:
+        verbose_name = _('Email Outbox')
+        verbose_name_plural = _('Email Outbox')
+        ordering = ['next_attempt']
+        indexes = [
+            models.Index(fields=['next_attempt'], name='email_outbox_due_idx'),
+        ]
@@ -0,0 +1,86 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage
+from django.utils import timezone
+
+from account.models import EmailOutbox
+
+
+# A claimed batch is retried by another worker if it is not done by then.
+CLAIM_TIMEOUT = timedelta(minutes=5)
+# Delay before the first retry, doubled on every following failure.
+RETRY_DELAY = timedelta(seconds=30)
+
+
+def queue_email(subject, body, recipients, from_email=None):
+    """
+    Record an email to send. Call it inside the transaction writing the
+    rows the email is about, so both are committed or neither is.
+    """
+    return EmailOutbox.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.EMAIL_HOST_USER,
+        recipients=list(recipients),
+    )
+
+
+def claim_emails(batch_size):
+    """
+    Lease a batch of due emails to this worker by moving their next attempt
+    past the claim timeout. Rows another worker claimed first no longer
+    match the due filter, so every email goes to a single worker.
+    """
+    now = timezone.now()
+    due = EmailOutbox.objects.filter(next_attempt__lte=now)
+    ids = list(due.values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    lease = now + CLAIM_TIMEOUT
+    due.filter(pk__in=ids).update(next_attempt=lease)
+    return list(EmailOutbox.objects.filter(pk__in=ids, next_attempt=lease))
+
+
+def record_failure(email, error):
+    email.attempts += 1
+    email.last_error = f'{type(error).__name__}: {error}'
+    email.next_attempt = None
+    if email.attempts < EmailOutbox.MAX_ATTEMPTS:
+        email.next_attempt = timezone.now() + RETRY_DELAY * 2 ** (email.attempts - 1)
+    email.save(update_fields=['attempts', 'last_error', 'next_attempt'])
+
+
+def send_queued_emails(connection, batch_size=50):
+    """
+    Send a batch of due emails over an already created mail connection,
+    which is left open for the next batch. Sent emails are deleted, failed
+    ones are retried with exponential backoff. Returns (sent, failed).
+    """
+    emails = claim_emails(batch_size)
+    if not emails:
+        return 0, 0
+
+    try:
+        connection.open()
+    except Exception as error:
+        for email in emails:
+            record_failure(email, error)
+        return 0, len(emails)
+
+    sent = []
+    for email in emails:
+        message = EmailMessage(email.subject, email.body, email.from_email, email.recipients, connection=connection)
+        try:
+            # Opening is a no-op while the connection is up.
+            connection.open()
+            message.send()
+        except Exception as error:
+            record_failure(email, error)
+            # Drop a connection the server may have closed, it is reopened for the next email.
+            connection.close()
+        else:
+            sent.append(email.pk)
+
+    EmailOutbox.objects.filter(pk__in=sent).delete()
+    return len(sent), len(emails) - len(sent)
@@ -1,33 +1,46 @@
-import os
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_logged_in
 from django.dispatch import receiver
-from django.db.models.signals import pre_save, pre_delete
-
-from django.conf import settings
+from django.db.models.signals import post_save, post_delete
 
+from account.identity import forget_identity
 from account.models import User
+from account.user_search import update_user_search_tokens
+from blogs.replicas import unpinned_writes
+from imaging.variants import variants_generated
+
+SEARCH_FIELDS = {'username', 'name', 'email'}
+
 
-@receiver(pre_delete, sender=User)
-def account_delete(sender, instance, **kwargs):
+@receiver(post_save, sender=User)
+def account_search_tokens(sender, instance, update_fields=None, **kwargs):
     """
-    Deleting the specific image of a Post after delete it
+    Keep the user search index in step with username, name and email
     """
-    if instance.display_pic and instance.display_pic != 'default/dummy_image.png':
-        if os.path.isfile(instance.display_pic.path):
-            os.remove(instance.display_pic.path)
-            os.rmdir(settings.BASE_DIR / f'media/display_pics/{instance.id}')
+    # Saves such as the last_login update on every login leave it alone.
+    if update_fields is not None and not SEARCH_FIELDS & set(update_fields):
+        return
+    update_user_search_tokens(instance)
 
 
-@receiver(pre_save, sender=User)
-def account_update(sender, instance, **kwargs):
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+@receiver(variants_generated, sender=User)
+def account_identity_changed(sender, instance, **kwargs):
     """
-    Replacing the specific image of a Post after update
+    Sessions must not keep serving the cached copy of a changed account
     """
+    forget_identity(instance.pk)
 
-    try:
-        old_image = sender.objects.get(id=instance.id).display_pic
-        new_image = instance.display_pic
-        if not (old_image == new_image or old_image == 'default/dummy_image.png'):
-            if os.path.isfile(old_image.path):
-                os.remove(old_image.path)
-    except Exception:
-        return
+
+# Replaces the auth app's receiver of the same dispatch_uid.
+user_logged_in.disconnect(dispatch_uid='update_last_login')
+
+
+@receiver(user_logged_in, dispatch_uid='update_last_login')
+def record_last_login(sender, user, **kwargs):
+    """
+    Logging in should not pin the client to the primary for its last_login
+    """
+    with unpinned_writes():
+        update_last_login(sender, user, **kwargs)
@@ -6,10 +6,4 @@ from account.models import OTPToken
 
 @shared_task(bind=True)
 def remove_expired_OTPTokens(self, data):
-    print(data)
-    tokens = OTPToken.objects.all()
-    for token in tokens:
-        if token.is_expired:
-            token.delete()
-
-    
\ No newline at end of file
+    return OTPToken.objects.purge_expired()
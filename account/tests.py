@@ -1,3 +1,468 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import authenticate
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from django.urls import reverse
+from django.utils import timezone
+
+from account.api.batch import MAX_OPERATIONS
+from account.api.serializer import TokenResetpasswordSerializer
+from account.forms import UserUpdateForm
+from account.identity import load_identity
+from account.models import EmailOutbox, OTPToken, User
+from account.user_search import search_users
+from accountProfile.models import Follow, Profile
+from blog.models import Blog, Reaction
+
+
+class CountingEmailBackend(EmailBackend):
+    connections = 0
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        CountingEmailBackend.connections += 1
+
+
+class FailingEmailBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise ConnectionRefusedError('Mail server is down.')
+
+
+class EmailOutboxTests(TestCase):
+
+    def register(self, email, username):
+        return self.client.post(reverse('account:register'), {
+            'email': email,
+            'username': username,
+            'password1': 'a-long-Passw0rd',
+            'password2': 'a-long-Passw0rd',
+        })
+
+    def send_queued(self):
+        call_command('send_queued_emails', stdout=StringIO())
+
+    def test_registration_queues_activation_email(self):
+        self.register('new@example.com', 'newuser')
+        self.assertTrue(User.objects.filter(email='new@example.com').exists())
+        self.assertEqual(len(mail.outbox), 0)
+
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.recipients, ['new@example.com'])
+
+        self.send_queued()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@example.com'])
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    @override_settings(EMAIL_BACKEND='account.tests.CountingEmailBackend')
+    def test_batch_reuses_one_connection(self):
+        for i in range(3):
+            self.register(f'user{i}@example.com', f'user{i}')
+        CountingEmailBackend.connections = 0
+
+        self.send_queued()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingEmailBackend.connections, 1)
+
+    @override_settings(EMAIL_BACKEND='account.tests.FailingEmailBackend')
+    def test_failed_email_is_retried_later(self):
+        self.register('retry@example.com', 'retry')
+
+        self.send_queued()
+        email = EmailOutbox.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('ConnectionRefusedError', email.last_error)
+        self.assertGreater(email.next_attempt, email.date_created)
+
+        # Not due yet, so a second run leaves it alone.
+        self.send_queued()
+        self.assertEqual(EmailOutbox.objects.get().attempts, 1)
+
+
+class EmailLoginTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('Reader@Example.com', 'reader', 'a-long-Passw0rd')
+        User.objects.filter(pk=cls.user.pk).update(is_active=True)
+
+    def test_email_normalized_follows_email(self):
+        self.assertEqual(self.user.email_normalized, 'reader@example.com')
+        self.user.email = 'Other@Example.com'
+        self.user.save(update_fields=['email'])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email_normalized, 'other@example.com')
+
+    def test_authenticate_is_one_lookup_whatever_the_case(self):
+        with self.assertNumQueries(1):
+            user = authenticate(email='READER@example.COM', password='a-long-Passw0rd')
+        self.assertEqual(user, self.user)
+        with self.assertNumQueries(1):
+            self.assertIsNone(authenticate(email='reader@example.com', password='wrong'))
+
+    def test_login_reactivates_with_correct_password(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertIsNone(authenticate(email='reader@example.com', password='a-long-Passw0rd'))
+        self.assertIsNone(authenticate(email='reader@example.com', password='wrong', reactivate=True))
+        self.assertFalse(User.objects.get(pk=self.user.pk).is_active)
+
+        with self.assertNumQueries(2):
+            user = authenticate(email='reader@example.com', password='a-long-Passw0rd', reactivate=True)
+        self.assertTrue(user.is_active)
+        self.assertTrue(User.objects.get(pk=self.user.pk).is_active)
+
+    def test_api_registration_rejects_a_case_variant(self):
+        response = APIClient().post(reverse('account_api:api-register'), {
+            'email': 'READER@example.com',
+            'username': 'newreader',
+            'password1': 'a-long-Passw0rd',
+            'password2': 'a-long-Passw0rd',
+            'redirect_link': 'home',
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_api_account_update_rejects_a_case_variant(self):
+        other = User.objects.create_user('other@example.com', 'otheruser', 'a-long-Passw0rd')
+        User.objects.filter(pk=other.pk).update(is_active=True)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=other).key}')
+        url = reverse('account_api:api-account-detail')
+
+        response = client.put(url, {'email': 'reader@EXAMPLE.com'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('email', response.json())
+
+        response = client.put(url, {'email': 'OTHER@example.com'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(User.objects.get(pk=other.pk).email_normalized, 'other@example.com')
+
+    def test_migration_refuses_case_variants(self):
+        check_email_conflicts = import_module('account.migrations.0007_user_email_normalized').check_email_conflicts
+        other = User.objects.create_user('other@example.com', 'otheruser', 'a-long-Passw0rd')
+        check_email_conflicts(apps, None)
+
+        # As registered before emails were normalized.
+        User.objects.filter(pk=other.pk).update(email='READER@example.com')
+        with self.assertRaisesMessage(RuntimeError, 'reader <Reader@example.com>; otheruser <READER@example.com>'):
+            check_email_conflicts(apps, None)
+
+    def test_update_form_rejects_a_case_variant(self):
+        other = User.objects.create_user('other@example.com', 'otheruser', 'a-long-Passw0rd')
+        form = UserUpdateForm({'email': 'READER@example.com', 'username': 'otheruser'}, instance=other)
+        self.assertIn('email', form.errors)
+
+
+class CachedTokenAuthenticationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('api@example.com', 'apiuser', 'a-long-Passw0rd')
+        User.objects.filter(pk=cls.user.pk).update(is_active=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=self.user).key}')
+
+    def get_account(self):
+        return self.client.get(reverse('account_api:api-account-detail'))
+
+    def test_cached_user_costs_no_query(self):
+        with self.assertNumQueries(2):
+            self.assertEqual(self.get_account().status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_account().json()['username'], 'apiuser')
+
+    def test_profile_update_refreshes_snapshot(self):
+        self.get_account()
+        response = self.client.put(reverse('account_api:api-account-detail'), {'username': 'renamed'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.get_account().json()['username'], 'renamed')
+
+    def test_change_outside_the_api_is_not_written_back(self):
+        self.get_account()
+        user = User.objects.get(pk=self.user.pk)
+        user.set_password('a-new-Passw0rd')
+        user.save()
+
+        response = self.client.put(reverse('account_api:api-account-detail'), {'name': 'Renamed'})
+        self.assertEqual(response.status_code, 200)
+        user.refresh_from_db()
+        self.assertEqual(user.name, 'Renamed')
+        self.assertTrue(user.check_password('a-new-Passw0rd'))
+
+    def test_deactivation_outside_the_api_revokes_cached_token(self):
+        self.get_account()
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.get_account().status_code, 401)
+
+    def test_deactivation_revokes_cached_token(self):
+        self.get_account()
+        self.client.post(reverse('account_api:api-account-deactivate'))
+        self.assertEqual(self.get_account().status_code, 401)
+
+    def test_token_rotation_revokes_cached_token(self):
+        self.get_account()
+        Token.objects.filter(user=self.user).delete()
+        self.assertEqual(self.get_account().status_code, 401)
+
+
+class IdentityCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('session@example.com', 'session', 'a-long-Passw0rd')
+        cls.other = User.objects.create_user('other@example.com', 'other', 'a-long-Passw0rd')
+        User.objects.filter(pk=cls.user.pk).update(is_active=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_user_and_profile_load_in_one_query(self):
+        with self.assertNumQueries(1):
+            user = load_identity(self.user.pk)
+            self.assertEqual(user.profile.follower_count, 0)
+        with self.assertNumQueries(0):
+            self.assertEqual(load_identity(self.user.pk).profile.user_id, self.user.pk)
+
+    def test_changes_move_to_a_new_version(self):
+        load_identity(self.user.pk)
+        self.user.name = 'Renamed'
+        self.user.save()
+        self.assertEqual(load_identity(self.user.pk).name, 'Renamed')
+
+        load_identity(self.other.pk)
+        self.user.profile.follow(self.other)
+        self.assertEqual(load_identity(self.user.pk).profile.following_count, 1)
+        self.assertEqual(load_identity(self.other.pk).profile.follower_count, 1)
+
+    def test_update_form_writes_from_the_current_row(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('home'))
+        # A write that bypasses the signals leaves the cached copy stale.
+        User.objects.filter(pk=self.user.pk).update(is_email_verified=True)
+
+        response = self.client.post(reverse('account:account-update'), {
+            'email': 'session@example.com',
+            'username': 'session',
+            'name': 'Renamed',
+        })
+        self.assertEqual(response.status_code, 302)
+        user = User.objects.get(pk=self.user.pk)
+        self.assertEqual(user.name, 'Renamed')
+        self.assertTrue(user.is_email_verified)
+
+    @override_settings(SESSION_ENGINE='django.contrib.sessions.backends.cached_db')
+    def test_session_request_reuses_cached_identity(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('home'))
+        # Only the feed itself, neither the session nor the user is read.
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.wsgi_request.user, self.user)
+
+
+class UserSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {}
+        for username, name in [('alice', 'Alice Smith'), ('alicia', 'Alicia Keys'), ('malice', 'Mal Ice'), ('bob', 'Bob Alice')]:
+            user = User.objects.create_user(f'{username}@example.com', username, 'password')
+            user.name = name
+            user.is_active = True
+            user.save()
+            cls.users[username] = user
+
+    def search(self, query, **kwargs):
+        return [user.username for user in search_users(query, **kwargs)]
+
+    def test_exact_then_prefix_then_substring(self):
+        self.assertEqual(self.search('alice'), ['alice', 'bob', 'malice'])
+        self.assertEqual(self.search('ALI'), ['alice', 'alicia', 'bob', 'malice'])
+        self.assertEqual(self.search('lic'), ['alice', 'alicia', 'bob', 'malice'])
+        self.assertEqual(self.search('keys'), ['alicia'])
+        self.assertEqual(self.search('zzz'), [])
+        self.assertEqual(self.search('  '), [])
+
+    def test_rename_updates_tokens(self):
+        user = self.users['bob']
+        user.name = 'Robert'
+        user.save()
+        self.assertEqual(self.search('alice'), ['alice', 'malice'])
+        self.assertEqual(self.search('robert'), ['bob'])
+
+    def test_inactive_and_excluded_users_are_left_out(self):
+        User.objects.filter(username='alicia').update(is_active=False)
+        self.assertEqual(self.search('ali', exclude=self.users['alice']), ['bob', 'malice'])
+
+    def test_filtered_users_do_not_use_up_the_limit(self):
+        for i in range(10):
+            User.objects.create_user(f'alibi{i}@example.com', f'alibi{i}', 'password')
+        self.assertEqual(self.search('ali', limit=1), ['alice'])
+        self.assertEqual(self.search('ali', exclude=self.users['alice'], limit=1), ['alicia'])
+
+
+class BatchAPITests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'a-long-Passw0rd')
+            for i in range(3)
+        ]
+        User.objects.update(is_active=True)
+        cls.blogs = [
+            Blog.objects.create(user=cls.users[1], heading=f'Blog {i}', status='1', date_published=timezone.now())
+            for i in range(2)
+        ]
+        cls.users[0].profile.follow(cls.users[2])
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=self.users[0]).key}')
+
+    def post(self, operations):
+        return self.client.post(reverse('account_api:api-batch'), {'operations': operations}, format='json')
+
+    def test_mixed_batch(self):
+        blog, other = (str(blog.pk) for blog in self.blogs)
+        response = self.post([
+            {'op': 'like', 'blog': blog},
+            {'op': 'dislike', 'blog': blog},
+            {'op': 'like', 'blog': other},
+            {'op': 'like', 'blog': other},
+            {'op': 'save', 'blog': other},
+            {'op': 'follow', 'user': str(self.users[1].pk)},
+            {'op': 'unfollow', 'user': str(self.users[2].pk)},
+            {'op': 'follow', 'user': str(self.users[0].pk)},
+            {'op': 'like', 'blog': str(uuid.uuid4())},
+        ])
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual(
+            [(result['disliked'], result['dislike_count']) for result in results[:2]], [(True, 1), (True, 1)]
+        )
+        self.assertEqual([result['liked'] for result in results[2:5]], [False, False, False])
+        self.assertTrue(results[4]['saved'])
+        self.assertEqual([result['following'] for result in results[5:7]], [True, False])
+        self.assertEqual([result['error'] for result in results[7:]], ['User not found.', 'Blog not found.'])
+
+        self.assertEqual(
+            dict(Reaction.objects.values_list('blog_id', 'kind')), {self.blogs[0].pk: Reaction.DISLIKE}
+        )
+        self.assertEqual(
+            list(Blog.objects.order_by('heading').values_list('like_count', 'dislike_count')), [(0, 1), (0, 0)]
+        )
+        self.assertEqual(list(self.users[0].profile.saved_blogs.all()), [self.blogs[1]])
+        self.assertEqual(list(Follow.objects.values_list('followee_id', flat=True)), [self.users[1].pk])
+        self.assertEqual(
+            list(Profile.objects.order_by('user__username').values_list('follower_count', 'following_count')),
+            [(0, 1), (1, 0), (0, 0)],
+        )
+
+    def test_only_reactions_bump_the_blog_version(self):
+        blog, other = self.blogs
+        self.post([{'op': 'like', 'blog': str(blog.pk)}, {'op': 'save', 'blog': str(other.pk)}])
+        self.assertEqual(
+            list(Blog.objects.order_by('heading').values_list('version', flat=True)),
+            [blog.version + 1, other.version],
+        )
+        self.post([{'op': 'unsave', 'blog': str(other.pk)}])
+        self.assertEqual(Blog.objects.get(pk=other.pk).version, other.version)
+
+    def test_conflicting_write_rolls_back_the_batch(self):
+        with mock.patch.object(Follow.objects, 'bulk_create', side_effect=IntegrityError):
+            response = self.post([
+                {'op': 'like', 'blog': str(self.blogs[0].pk)},
+                {'op': 'follow', 'user': str(self.users[1].pk)},
+            ])
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Reaction.objects.exists())
+        self.assertEqual(Blog.objects.get(pk=self.blogs[0].pk).like_count, 0)
+
+    def test_operation_limit(self):
+        operation = {'op': 'save', 'blog': str(self.blogs[0].pk)}
+        self.assertEqual(self.post([operation] * MAX_OPERATIONS).status_code, 200)
+        response = self.post([operation] * (MAX_OPERATIONS + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('operations', response.json())
+
+    def test_operation_needs_its_target(self):
+        response = self.post([{'op': 'follow', 'blog': str(self.blogs[0].pk)}])
+        self.assertEqual(response.status_code, 400)
+
+
+class OTPTokenTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'a-long-Passw0rd')
+            for i in range(2)
+        ]
+
+    def create_token(self, user, token=123456, minutes=5):
+        return OTPToken.objects.create(user=user, token=token, expiry_time=timezone.now() + timedelta(minutes=minutes))
+
+    def reset(self, email, token):
+        return APIClient().post(reverse('account_api:api-password-reset-token'), {
+            'email': email,
+            'token': token,
+            'password1': 'a-new-Passw0rd',
+            'password2': 'a-new-Passw0rd',
+        })
+
+    def test_purge_expired_deletes_in_chunks(self):
+        for i in range(5):
+            self.create_token(self.users[i % 2], minutes=-1)
+        kept = [self.create_token(user) for user in self.users]
+
+        # Three chunks of a select and a delete, then the empty select.
+        with self.assertNumQueries(7):
+            self.assertEqual(OTPToken.objects.purge_expired(batch_size=2), 5)
+        self.assertEqual(set(OTPToken.objects.all()), set(kept))
+
+    def test_token_is_validated_in_one_query(self):
+        self.create_token(self.users[0])
+        serializer = TokenResetpasswordSerializer(data={
+            'email': 'READER0@example.com', 'token': 123456, 'password1': 'x', 'password2': 'x',
+        })
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid())
+        self.assertEqual(serializer.validated_data['user'], self.users[0])
+
+    def test_reset_with_the_right_token(self):
+        self.create_token(self.users[0])
+        self.assertEqual(self.reset('reader0@example.com', 123456).status_code, 200)
+        self.assertTrue(User.objects.get(pk=self.users[0].pk).check_password('a-new-Passw0rd'))
+
+    def test_token_of_another_user_is_invalid(self):
+        self.create_token(self.users[1])
+        response = self.reset('reader0@example.com', 123456)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['token'], ['Invalid token. Please enter correct one from your email.'])
+        self.assertTrue(User.objects.get(pk=self.users[0].pk).check_password('a-long-Passw0rd'))
+
+    def test_expired_token(self):
+        self.create_token(self.users[0], minutes=-1)
+        response = self.reset('reader0@example.com', 123456)
+        self.assertEqual(response.json()['token'], ['Token expired. Request for a new token.'])
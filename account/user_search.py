@@ -0,0 +1,101 @@
+from django.db.models import Count
+
+from account.models import User, UserSearchToken
+
+
+def normalize(value):
+    return ' '.join(str(value or '').lower().split())
+
+
+def get_trigrams(word):
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def get_user_words(user):
+    words = {normalize(user.username), normalize(user.email).split('@')[0]}
+    words.add(normalize(user.name))
+    words.update(normalize(user.name).split())
+    return {word for word in words if word}
+
+
+def get_user_tokens(user):
+    tokens = set()
+    for word in get_user_words(user):
+        tokens.add((UserSearchToken.WORD, word[:64]))
+        tokens.update((UserSearchToken.TRIGRAM, trigram) for trigram in get_trigrams(word))
+    return tokens
+
+
+def update_user_search_tokens(user):
+    """
+    Bring the search tokens of a user in line with their current username,
+    name and email, touching only the rows that changed
+    """
+    wanted = get_user_tokens(user)
+    existing = set(UserSearchToken.objects.filter(user=user).values_list('kind', 'token'))
+
+    stale = existing - wanted
+    if stale:
+        for kind in {kind for kind, _ in stale}:
+            UserSearchToken.objects.filter(
+                user=user, kind=kind, token__in=[token for token_kind, token in stale if token_kind == kind]
+            ).delete()
+
+    missing = wanted - existing
+    if missing:
+        UserSearchToken.objects.bulk_create(
+            [UserSearchToken(user=user, kind=kind, token=token) for kind, token in missing],
+            ignore_conflicts=True,
+        )
+
+
+def search_users(query, exclude=None, limit=20):
+    """
+    Active users whose username, name or email local part matches the query,
+    ranked exact > prefix > substring.
+
+    Exact and prefix hits are one index range scan over word tokens,
+    substring hits intersect trigram tokens, so no query scans the user table.
+    """
+    query = normalize(query)
+    if not query:
+        return []
+
+    # Users that cannot be returned are dropped before the candidates are capped.
+    tokens = UserSearchToken.objects.filter(user__is_active=True)
+    if exclude is not None:
+        tokens = tokens.exclude(user=exclude)
+
+    ranks = {}
+    words = (
+        tokens
+        .filter(kind=UserSearchToken.WORD, token__gte=query, token__lt=query + '\uffff')
+        .order_by('token')
+        .values_list('user_id', 'token')[:limit * 4]
+    )
+    for user_id, token in words:
+        rank = 0 if token == query else 1
+        ranks[user_id] = min(rank, ranks.get(user_id, rank))
+
+    trigrams = get_trigrams(query)
+    if len(ranks) < limit and trigrams:
+        candidates = (
+            tokens
+            .filter(kind=UserSearchToken.TRIGRAM, token__in=trigrams)
+            .values('user_id')
+            .annotate(matched=Count('token', distinct=True))
+            .filter(matched=len(trigrams))
+            .values_list('user_id', flat=True)[:limit * 4]
+        )
+        for user_id in candidates:
+            ranks.setdefault(user_id, 2)
+
+    users = User.objects.filter(pk__in=ranks)
+
+    # Trigram candidates may share trigrams across words, confirm the substring.
+    users = [
+        user for user in users
+        if ranks[user.pk] < 2 or any(query in word for word in get_user_words(user))
+    ]
+    users.sort(key=lambda user: (ranks[user.pk], user.username))
+    return users[:limit]
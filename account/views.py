@@ -6,12 +6,15 @@ from django.contrib.sites.shortcuts import get_current_site
 from django.template.loader import render_to_string
 from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
 from django.utils.encoding import force_bytes, force_text
-from django.core.mail import send_mail
+from django.db import transaction
 from django.conf import settings
 
 from account.models import User
+from account.outbox import queue_email
+from account.user_search import search_users
 from account.forms import LoginForm, RegistrationForm, UserUpdateForm
 from account.tokens import account_activation_token
+from accountProfile.viewer import ViewerState
 
 # import requests
 
@@ -46,25 +49,14 @@ def login_view(request, *args, **kwargs):
             email = request.POST['email']
             password = request.POST['password']
 
-            try:
-                temp_user = User.objects.get(email=email)
-                if temp_user:
-                    if not temp_user.is_active:
-                        temp_user.is_active = True
-                        temp_user.save()
-            except User.DoesNotExist:
-                messages.warning(request, 'No user found with that email.')
-
-            user = authenticate(request, email=email, password=password)
+            # One lookup on the normalized email, a deactivated account is
+            # reactivated once its password matches.
+            user = authenticate(request, email=email, password=password, reactivate=True)
             if user:
                 if user.is_email_verified:
                     login(request, user)
                     return redirect('home')
 
-                if not user.is_active:
-                    user.is_active = True
-                    user.save()
-
                 if not user.is_email_verified:
                     try:
                         site = get_current_site(request)
@@ -75,7 +67,7 @@ def login_view(request, *args, **kwargs):
                             'uid': urlsafe_base64_encode(force_bytes(user.id)),
                             'token': account_activation_token.make_token(user),
                         })
-                        send_mail(subject, message, settings.EMAIL_HOST_USER, [user.email, ], fail_silently=False)
+                        queue_email(subject, message, [user.email, ])
                     except Exception as e:
                         messages.info(request, f'Something went wrong while sending verification email. Please refresh the page and login again.')
                         return render(request, 'account/email/account_verified.html', context)
@@ -83,7 +75,7 @@ def login_view(request, *args, **kwargs):
                     messages.info(request, f'An email with verification link is sent to your Email ID. Verify Your account before login.')
                     return render(request, 'account/email/account_verified.html', context)
             else:
-                # messages.warning(request, f'Something went wrong.')
+                messages.warning(request, f'Invalid email or password. Please enter correct credentials.')
                 context['form'] = LoginForm()
         else:
             messages.warning(request, f'Invalid email or password. Please enter correct credentials.')
@@ -113,21 +105,24 @@ def register_view(request, *args, **kwargs):
     if request.method == 'POST':
         form = RegistrationForm(request.POST)
         if form.is_valid():
-            user = form.save()
-
             try:
-                site = get_current_site(request)
-                subject = 'Activate Your Account.'
-                message = render_to_string('account/email/account_activation_email.html', {
-                    'user': user,
-                    'domain': site.domain,
-                    'uid': urlsafe_base64_encode(force_bytes(user.id)),
-                    'token': account_activation_token.make_token(user),
-                })
-                send_mail(subject, message, settings.EMAIL_HOST_USER, [user.email, ], fail_silently=False)
+                # The account and its verification email are committed together.
+                with transaction.atomic():
+                    user = form.save()
+
+                    site = get_current_site(request)
+                    subject = 'Activate Your Account.'
+                    message = render_to_string('account/email/account_activation_email.html', {
+                        'user': user,
+                        'domain': site.domain,
+                        'uid': urlsafe_base64_encode(force_bytes(user.id)),
+                        'token': account_activation_token.make_token(user),
+                    })
+                    queue_email(subject, message, [user.email, ])
             except Exception as e:
-                messages.success(request, f'There was a problem while sending verification email. Please proceed to login.')
-                return render(request, 'account/email/account_verified.html', context)
+                messages.warning(request, f'There was a problem while creating your account. Please register again.')
+                context['form'] = form
+                return render(request, 'account/register.html', context)
 
             messages.success(request, f'An email with verification link is sent to your Email ID. Verify Your account before login.')
             return render(request, 'account/email/account_verified.html', context)
@@ -171,6 +166,7 @@ def account_view(request, *args, **kwargs):
     try:
         account = User.objects.get(id=user_id)
         context['user'] = account
+        context['viewer'] = ViewerState(user, users=[account])
         if account == user:
             context['is_self'] = True
     except User.DoesNotExist:
@@ -187,6 +183,8 @@ def account_update_view(request, *args, **kwargs):
         return redirect('account:login')
 
     if request.method == 'POST':
+        # The logged in user is a cached copy, write from the current row.
+        user = User.objects.get(pk=user.pk)
         form = UserUpdateForm(request.POST, request.FILES, instance=user)
         if form.is_valid():
             form.save()
@@ -211,10 +209,11 @@ def account_search_view(request, *args, **kwargs):
         return redirect('account:login')
 
     if request.method == 'GET':
-        query = request.GET.get('userQuery')
+        query = request.GET.get('userQuery', '')
         if len(query) > 0:
-            users = User.objects.filter(username__icontains=query).filter(email__icontains=query).filter(is_active=True).exclude(email=user.email).distinct()
+            users = search_users(query, exclude=user)
             context['users'] = users
+            context['viewer'] = ViewerState(user, users=users)
     return render(request, 'account/account_search.html', context)
 
 def account_deactivate_view(request, *args, **kwargs):
@@ -226,7 +225,7 @@ def account_deactivate_view(request, *args, **kwargs):
 
     if request.method == 'POST':
         user.is_active = False
-        user.save()
+        user.save(update_fields=['is_active'])
         messages.info(request, 'Your account has been deactivated. Proceed to login to reactivate the account')
         return redirect('account:logout')
 
@@ -1,8 +1,13 @@
 from django.contrib import admin
 
-from accountProfile.models import Profile
+from accountProfile.models import Profile, Follow
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'bio')
+    list_display = ('user', 'bio', 'follower_count', 'following_count')
+
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('follower', 'followee', 'date_created')
@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accountProfile.timeline import claim_fanouts, fan_out_blog
+
+
+class Command(BaseCommand):
+    help = 'Write newly published blogs into the following timelines of their authors followers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new fan-out jobs instead of exiting when the queue is empty.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Seconds to sleep between polls in --loop mode.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Number of fan-out jobs claimed per poll.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            processed = self.process_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Fanned out {processed} blogs.')
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+
+    def process_batch(self, batch_size):
+        jobs = claim_fanouts(batch_size)
+        for job in jobs:
+            with transaction.atomic():
+                fan_out_blog(job.blog)
+                job.delete()
+        return len(jobs)
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from accountProfile.models import Follow, Profile
+
+
+def count_of(field):
+    return Coalesce(
+        Subquery(
+            Follow.objects.filter(**{field: OuterRef('user_id')})
+            .values(field)
+            .annotate(total=Count('*'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized follower and following counters on profiles.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of profiles recomputed per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        profile_ids = Profile.objects.order_by('pk').values_list('pk', flat=True)
+
+        updated = 0
+        last_id = None
+        while True:
+            batch = profile_ids if last_id is None else profile_ids.filter(pk__gt=last_id)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                updated += Profile.objects.filter(pk__in=batch).update(
+                    follower_count=count_of('followee_id'),
+                    following_count=count_of('follower_id'),
+                )
+            last_id = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Reconciled counters for {updated} profiles.'))
@@ -0,0 +1,78 @@
+# Generated by Django 3.2 on 2026-10-18 17:12
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+def backfill_timelines(apps, schema_editor):
+    Profile = apps.get_model('accountProfile', 'Profile')
+    Blog = apps.get_model('blog', 'Blog')
+    TimelineEntry = apps.get_model('accountProfile', 'TimelineEntry')
+
+    for edge in Profile.following.through.objects.select_related('profile').iterator():
+        blogs = (
+            Blog.objects.filter(user_id=edge.user_id, status='1', date_published__isnull=False)
+            .order_by('-date_published')
+            .values_list('id', 'date_published')[:20]
+        )
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=edge.profile.user_id, blog_id=blog_id, author_id=edge.user_id, date_published=date_published)
+                for blog_id, date_published in blogs
+            ],
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_blog_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accountProfile', '0002_profile_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineFanout',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('blog', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.blog')),
+            ],
+            options={
+                'verbose_name': 'Timeline Fan-out',
+                'verbose_name_plural': 'Timeline Fan-outs',
+                'ordering': ['date_created'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_published', models.DateTimeField(verbose_name='Published Date')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='blog.blog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Timeline Entry',
+                'verbose_name_plural': 'Timeline Entries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-date_published', '-blog'], name='timeline_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'blog'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(backfill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,98 @@
+# Generated by Django 3.2 on 2026-10-18 17:17
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+import uuid
+
+
+def count_of(queryset, field):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef('user_id')})
+            .values(field)
+            .annotate(total=Count('*'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def merge_follows(apps, schema_editor):
+    Profile = apps.get_model('accountProfile', 'Profile')
+    Follow = apps.get_model('accountProfile', 'Follow')
+
+    # Both mirrored tables hold the same edges, either side alone is enough
+    # to keep an edge that the old double write only half recorded.
+    edges = set(Profile.following.through.objects.values_list('profile__user_id', 'user_id').iterator())
+    edges.update(
+        (follower_id, followee_id)
+        for followee_id, follower_id in Profile.followed_by.through.objects.values_list('profile__user_id', 'user_id').iterator()
+    )
+
+    Follow.objects.bulk_create(
+        [Follow(follower_id=follower_id, followee_id=followee_id) for follower_id, followee_id in edges],
+        batch_size=1000,
+    )
+    Profile.objects.update(
+        follower_count=count_of(Follow.objects.all(), 'followee_id'),
+        following_count=count_of(Follow.objects.all(), 'follower_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('accountProfile', '0003_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='follower_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Follower Count'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Following Count'),
+        ),
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('followee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to=settings.AUTH_USER_MODEL)),
+                ('follower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Follow',
+                'verbose_name_plural': 'Follows',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-date_created'], name='follow_follower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='follow',
+            index=models.Index(fields=['followee', '-date_created'], name='follow_followee_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='follow',
+            constraint=models.UniqueConstraint(fields=('follower', 'followee'), name='unique_follow'),
+        ),
+        migrations.RunPython(merge_follows, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='profile',
+            name='followed_by',
+        ),
+        migrations.RemoveField(
+            model_name='profile',
+            name='following',
+        ),
+    ]
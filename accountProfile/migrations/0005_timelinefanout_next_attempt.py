@@ -0,0 +1,23 @@
+# Generated by Django 3.2 on 2026-10-18 18:01
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accountProfile', '0004_follow'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='timelinefanout',
+            name='next_attempt',
+            field=models.DateTimeField(default=django.utils.timezone.now, verbose_name='Next Attempt'),
+        ),
+        migrations.AddIndex(
+            model_name='timelinefanout',
+            index=models.Index(fields=['next_attempt'], name='timeline_fanout_due_idx'),
+        ),
+    ]
@@ -1,10 +1,13 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import uuid
 
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
+from account.identity import forget_identities
 from blog.models import Blog, Tag
 
 
@@ -26,15 +29,15 @@ class Profile(models.Model):
         null=True,
         max_length=256,
     )
-    following = models.ManyToManyField(
-        User,
-        related_name='following',
-        blank=True,
+    follower_count = models.PositiveIntegerField(
+        verbose_name=_('Follower Count'),
+        default=0,
+        editable=False,
     )
-    followed_by = models.ManyToManyField(
-        User,
-        related_name='followed_by',
-        blank=True,
+    following_count = models.PositiveIntegerField(
+        verbose_name=_('Following Count'),
+        default=0,
+        editable=False,
     )
     saved_blogs = models.ManyToManyField(
         Blog,
@@ -49,19 +52,29 @@ class Profile(models.Model):
     def __Str__(self):
         return self.user.username
 
-    def follow(self, user):
-        if not user in self.following.all():
-            self.following.add(user)
+    def get_followers(self):
+        return User.objects.filter(following_edges__followee=self.user).order_by('-following_edges__date_created')
 
-        if not self.user in user.profile.followed_by.all():
-            user.profile.followed_by.add(self.user)
+    def get_following(self):
+        return User.objects.filter(follower_edges__follower=self.user).order_by('-follower_edges__date_created')
 
-    def unfollow(self, user):
-        if user in self.following.all():
-            self.following.remove(user)
+    def follow(self, user):
+        """
+        Insert the follow edge, a repeated follow hits the unique constraint
+        and leaves the counts alone
+        """
+        with transaction.atomic():
+            try:
+                with transaction.atomic():
+                    Follow.objects.create(follower=self.user, followee=user)
+            except IntegrityError:
+                return False
+            adjust_follow_counts(self.user_id, user.pk, 1)
+        return True
 
-        if self.user in user.profile.followed_by.all():
-            user.profile.followed_by.remove(self.user)
+    def unfollow(self, user):
+        # The counts are decremented by the Follow post_delete receiver.
+        return bool(Follow.objects.filter(follower=self.user, followee=user).delete()[0])
 
     def save_blog(self, blog):
         if not blog in self.saved_blogs.all():
@@ -82,3 +95,108 @@ class Profile(models.Model):
     class Meta:
         verbose_name = _('Profile')
         verbose_name_plural = _('Profiles')
+
+
+def adjust_follow_counts(follower_id, followee_id, delta):
+    Profile.objects.filter(user_id=follower_id).update(following_count=F('following_count') + delta)
+    Profile.objects.filter(user_id=followee_id).update(follower_count=F('follower_count') + delta)
+    forget_identities([follower_id, followee_id])
+
+
+class Follow(models.Model):
+    id = models.UUIDField(
+        verbose_name=_('ID'),
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    follower = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='following_edges',
+    )
+    followee = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='follower_edges',
+    )
+    date_created = models.DateTimeField(
+        verbose_name=_('Date Created'),
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f'{self.follower} -> {self.followee}'
+
+    class Meta:
+        verbose_name = _('Follow')
+        verbose_name_plural = _('Follows')
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'followee'], name='unique_follow'),
+        ]
+        indexes = [
+            models.Index(fields=['follower', '-date_created'], name='follow_follower_idx'),
+            models.Index(fields=['followee', '-date_created'], name='follow_followee_idx'),
+        ]
+
+
+class TimelineEntry(models.Model):
+    id = models.UUIDField(
+        verbose_name=_('ID'),
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    blog = models.ForeignKey(
+        Blog,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    date_published = models.DateTimeField(
+        verbose_name=_('Published Date'),
+    )
+
+    class Meta:
+        verbose_name = _('Timeline Entry')
+        verbose_name_plural = _('Timeline Entries')
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'blog'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-date_published', '-blog'], name='timeline_user_idx'),
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+
+class TimelineFanout(models.Model):
+    blog = models.OneToOneField(
+        Blog,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    date_created = models.DateTimeField(
+        verbose_name=_('Date Created'),
+        auto_now_add=True,
+    )
+    next_attempt = models.DateTimeField(
+        verbose_name=_('Next Attempt'),
+        default=timezone.now,
+    )
+
+    class Meta:
+        verbose_name = _('Timeline Fan-out')
+        verbose_name_plural = _('Timeline Fan-outs')
+        ordering = ['date_created']
+        indexes = [
+            models.Index(fields=['next_attempt'], name='timeline_fanout_due_idx'),
+        ]
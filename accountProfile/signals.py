@@ -1,12 +1,42 @@
 from django.dispatch import receiver
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
-from accountProfile.models import Profile
+from account.identity import forget_identity
+from accountProfile.models import Profile, Follow, adjust_follow_counts
+from accountProfile.timeline import backfill_timeline, remove_from_timeline
 
 @receiver(post_save, sender=User)
 def create_profile(sender, instance=None, created=False, **Kwargs):
     if created:
         Profile.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def profile_changed(sender, instance, **kwargs):
+    """
+    The profile is cached along with its user, see account.identity
+    """
+    forget_identity(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    """
+    Keep the follower's timeline in step with who they follow
+    """
+    if created:
+        backfill_timeline(instance.follower, instance.followee)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """
+    Counted here rather than in unfollow so follows removed by the cascade
+    of a deleted account are decremented too
+    """
+    adjust_follow_counts(instance.follower_id, instance.followee_id, -1)
+    remove_from_timeline(instance.follower_id, instance.followee_id)
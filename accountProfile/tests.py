@@ -1,3 +1,187 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from account.models import User
+from accountProfile.models import Follow, Profile, TimelineEntry, TimelineFanout
+from accountProfile.timeline import claim_fanouts, enqueue_fanout, fan_out_blog, trim_timelines
+from blog.models import Blog
+
+
+class FollowTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(3)
+        ]
+
+    def get_counts(self):
+        return [
+            tuple(Profile.objects.values_list('follower_count', 'following_count').get(user=user))
+            for user in self.users
+        ]
+
+    def test_follow_and_unfollow(self):
+        profile = self.users[0].profile
+        self.assertTrue(profile.follow(self.users[1]))
+        self.assertTrue(profile.follow(self.users[2]))
+        self.assertEqual(self.get_counts(), [(0, 2), (1, 0), (1, 0)])
+
+        self.assertTrue(profile.unfollow(self.users[1]))
+        self.assertEqual(self.get_counts(), [(0, 1), (0, 0), (1, 0)])
+        self.assertFalse(profile.unfollow(self.users[1]))
+        self.assertEqual(self.get_counts(), [(0, 1), (0, 0), (1, 0)])
+
+    def test_duplicate_follow_is_not_counted(self):
+        profile = self.users[0].profile
+        self.assertTrue(profile.follow(self.users[1]))
+        self.assertFalse(profile.follow(self.users[1]))
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertEqual(self.get_counts()[:2], [(0, 1), (1, 0)])
+
+    def test_deleted_account_releases_its_follows(self):
+        self.users[0].profile.follow(self.users[1])
+        self.users[1].profile.follow(self.users[2])
+        self.users[2].profile.follow(self.users[1])
+
+        self.users[1].delete()
+        self.users.pop(1)
+        self.assertEqual(self.get_counts(), [(0, 0), (0, 0)])
+
+    def test_reconcile_recounts_drifted_counters(self):
+        self.users[0].profile.follow(self.users[1])
+        Profile.objects.update(follower_count=5, following_count=5)
+        call_command('reconcile_follow_counters', stdout=StringIO())
+        self.assertEqual(self.get_counts(), [(0, 1), (1, 0), (0, 0)])
+
+
+@override_settings(FOLLOWING_TIMELINE={'MAX_ENTRIES': 3, 'CELEBRITY_FOLLOWERS': 10, 'BACKFILL_ENTRIES': 2})
+class FollowingTimelineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('author@example.com', 'author', 'password')
+        cls.readers = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(5)
+        ]
+        cls.published = timezone.now()
+
+    def create_blog(self, minutes=0, **kwargs):
+        kwargs.setdefault('user', self.author)
+        return Blog.objects.create(
+            heading='Blog', status='1', date_published=self.published + timedelta(minutes=minutes), **kwargs
+        )
+
+    def get_timeline(self, user):
+        return list(
+            TimelineEntry.objects.filter(user=user)
+            .order_by('-date_published', '-blog_id')
+            .values_list('blog_id', flat=True)
+        )
+
+    def follow(self, readers):
+        for reader in readers:
+            reader.profile.follow(self.author)
+
+    def test_fan_out_writes_every_follower_timeline(self):
+        self.follow(self.readers)
+        blog = self.create_blog()
+        self.assertEqual(fan_out_blog(blog), 5)
+        for reader in self.readers:
+            self.assertEqual(self.get_timeline(reader), [blog.pk])
+
+    def test_fan_out_queries_do_not_grow_with_followers(self):
+        self.follow(self.readers[:1])
+        blog = self.create_blog()
+        with self.assertNumQueries(5):
+            fan_out_blog(blog)
+        self.follow(self.readers[1:])
+        blog = self.create_blog(1)
+        with self.assertNumQueries(5):
+            fan_out_blog(blog)
+
+    def test_trim_keeps_entries_tied_with_the_last_kept_one(self):
+        self.follow(self.readers[:1])
+        blogs = [self.create_blog() for _ in range(5)]
+        for blog in blogs:
+            fan_out_blog(blog)
+        newest = sorted((blog.pk for blog in blogs), reverse=True)[:3]
+        self.assertEqual(self.get_timeline(self.readers[0]), newest)
+
+    def test_trim_drops_the_oldest_entries(self):
+        self.follow(self.readers[:2])
+        blogs = [self.create_blog(minutes) for minutes in range(5)]
+        for blog in blogs:
+            fan_out_blog(blog)
+        trim_timelines([reader.pk for reader in self.readers[:2]])
+        for reader in self.readers[:2]:
+            self.assertEqual(self.get_timeline(reader), [blog.pk for blog in reversed(blogs[2:])])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        blogs = [self.create_blog(minutes) for minutes in range(3)]
+        reader = self.readers[0]
+        self.follow([reader])
+        self.assertEqual(self.get_timeline(reader), [blogs[2].pk, blogs[1].pk])
+        reader.profile.unfollow(self.author)
+        self.assertEqual(self.get_timeline(reader), [])
+
+    def test_publishing_again_keeps_the_date(self):
+        self.follow(self.readers[:1])
+        blog = self.create_blog()
+        fan_out_blog(blog)
+        blog.publish()
+        fan_out_blog(blog)
+        self.assertEqual(Blog.objects.get(pk=blog.pk).date_published, self.published)
+        self.assertEqual(TimelineEntry.objects.get().date_published, self.published)
+
+    def test_republished_blog_moves_in_the_timeline(self):
+        self.follow(self.readers[:1])
+        blog = self.create_blog()
+        fan_out_blog(blog)
+        blog.status = '0'
+        blog.save()
+        blog.publish()
+        fan_out_blog(blog)
+        self.assertGreater(blog.date_published, self.published)
+        self.assertEqual(TimelineEntry.objects.get().date_published, blog.date_published)
+
+    def test_drafts_are_not_fanned_out(self):
+        self.follow(self.readers)
+        self.assertEqual(fan_out_blog(Blog.objects.create(user=self.author, heading='Draft')), 0)
+        self.assertFalse(TimelineEntry.objects.exists())
+
+    def test_claimed_jobs_go_to_a_single_worker(self):
+        enqueue_fanout(self.create_blog())
+        jobs = claim_fanouts(10)
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(claim_fanouts(10), [])
+
+        TimelineFanout.objects.update(next_attempt=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(claim_fanouts(10)), 1)
+
+    def test_command_processes_and_deletes_jobs(self):
+        self.follow(self.readers[:2])
+        blog = self.create_blog()
+        enqueue_fanout(blog)
+        call_command('fan_out_timelines', stdout=StringIO())
+        self.assertFalse(TimelineFanout.objects.exists())
+        self.assertEqual(self.get_timeline(self.readers[1]), [blog.pk])
+
+
+class HomeHeaderTests(TestCase):
+
+    def test_following_link_needs_login(self):
+        timeline = reverse('accountProfile:timeline')
+        self.assertNotContains(self.client.get(reverse('home')), timeline)
+
+        user = User.objects.create_user('reader@example.com', 'reader', 'password')
+        User.objects.filter(pk=user.pk).update(is_active=True)
+        self.client.force_login(User.objects.get(pk=user.pk))
+        self.assertContains(self.client.get(reverse('home')), timeline)
@@ -0,0 +1,175 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from accountProfile.models import Follow, Profile, TimelineEntry, TimelineFanout
+from blog.models import Blog
+from blogs.pagination import CursorPaginator
+
+
+# A claimed fan-out job is retried by another worker if it is not done by then.
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+def get_timeline_setting(name):
+    defaults = {
+        'MAX_ENTRIES': 500,
+        'CELEBRITY_FOLLOWERS': 1000,
+        'BACKFILL_ENTRIES': 20,
+        'BATCH_SIZE': 500,
+    }
+    return getattr(settings, 'FOLLOWING_TIMELINE', {}).get(name, defaults[name])
+
+
+def get_follower_ids(user_id):
+    return Follow.objects.filter(followee_id=user_id).values_list('follower_id', flat=True)
+
+
+def get_celebrity_followee_ids(user):
+    """
+    Followed authors with too many followers to fan out on write; their
+    blogs are merged into the timeline at read time instead.
+    """
+    return list(
+        Follow.objects
+        .filter(follower=user, followee__profile__follower_count__gt=get_timeline_setting('CELEBRITY_FOLLOWERS'))
+        .values_list('followee_id', flat=True)
+    )
+
+
+def is_celebrity(user_id):
+    threshold = get_timeline_setting('CELEBRITY_FOLLOWERS')
+    return Profile.objects.filter(user_id=user_id, follower_count__gt=threshold).exists()
+
+
+def trim_timelines(user_ids):
+    """
+    Keep the newest MAX_ENTRIES entries of each timeline, ranked on the
+    same (date_published, blog) key the timeline is paged on, so entries
+    tied with the last kept one survive. One query for all the users.
+    """
+    ranked = (
+        TimelineEntry.objects.filter(user_id__in=user_ids)
+        .annotate(position=Window(
+            expression=RowNumber(),
+            partition_by=[F('user_id')],
+            order_by=[F('date_published').desc(), F('blog_id').desc()],
+        ))
+        .values('id', 'position')
+    )
+    sql, params = ranked.query.sql_with_params()
+    TimelineEntry.objects.filter(pk__in=RawSQL(
+        f'SELECT ranked.id FROM ({sql}) ranked WHERE ranked.position > %s',
+        (*params, get_timeline_setting('MAX_ENTRIES')),
+    )).delete()
+
+
+def enqueue_fanout(blog):
+    TimelineFanout.objects.get_or_create(blog=blog)
+
+
+def claim_fanouts(batch_size):
+    """
+    Lease a batch of due fan-out jobs to this worker, as claim_emails does
+    for the email outbox, so every job goes to a single worker.
+    """
+    now = timezone.now()
+    due = TimelineFanout.objects.filter(next_attempt__lte=now)
+    ids = list(due.values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    lease = now + CLAIM_TIMEOUT
+    due.filter(pk__in=ids).update(next_attempt=lease)
+    return list(TimelineFanout.objects.select_related('blog').filter(pk__in=ids, next_attempt=lease))
+
+
+def fan_out_blog(blog):
+    """
+    Write a published blog into the timeline of every follower of its author
+    """
+    if not blog.is_published or not blog.date_published or is_celebrity(blog.user_id):
+        return 0
+
+    # A blog published again after being unpublished has a new date; entries
+    # written the first time are kept by ignore_conflicts, so move them too.
+    TimelineEntry.objects.filter(blog=blog).exclude(date_published=blog.date_published).update(
+        date_published=blog.date_published
+    )
+    batch_size = get_timeline_setting('BATCH_SIZE')
+    follower_ids = list(get_follower_ids(blog.user_id))
+    for start in range(0, len(follower_ids), batch_size):
+        batch = follower_ids[start:start + batch_size]
+        TimelineEntry.objects.bulk_create(
+            [
+                TimelineEntry(user_id=follower_id, blog=blog, author_id=blog.user_id, date_published=blog.date_published)
+                for follower_id in batch
+            ],
+            ignore_conflicts=True,
+        )
+        trim_timelines(batch)
+    return len(follower_ids)
+
+
+def backfill_timeline(user, author):
+    if is_celebrity(author.pk):
+        return
+    blogs = (
+        Blog.objects.filter(user=author, status='1', date_published__isnull=False)
+        .order_by('-date_published')
+        .only('id', 'date_published')[:get_timeline_setting('BACKFILL_ENTRIES')]
+    )
+    TimelineEntry.objects.bulk_create(
+        [
+            TimelineEntry(user=user, blog_id=blog.pk, author=author, date_published=blog.date_published)
+            for blog in blogs
+        ],
+        ignore_conflicts=True,
+    )
+    trim_timelines([user.pk])
+
+
+def remove_from_timeline(user_id, author_id):
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """
+    Keyset pages of a user's following timeline.
+
+    Fanned-out entries are one range scan over (user, date_published, blog)
+    and blogs of celebrity followees are merged in on the same key.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(
+            TimelineEntry.objects.filter(user=user).only('blog_id', 'date_published'),
+            per_page,
+            tiebreak_field='blog_id',
+        )
+        celebrity_ids = get_celebrity_followee_ids(user)
+        self.celebrity_blogs = None
+        if celebrity_ids:
+            self.celebrity_blogs = CursorPaginator(
+                Blog.objects.filter(user_id__in=celebrity_ids, status='1').only('id', 'date_published'),
+                per_page,
+            )
+
+    def page(self, cursor=None):
+        direction, value, tiebreak = self.parse_cursor(cursor)
+
+        positions = [self.position(entry) for entry in self.fetch(direction, value, tiebreak)]
+        if self.celebrity_blogs:
+            positions += [
+                self.celebrity_blogs.position(blog)
+                for blog in self.celebrity_blogs.fetch(direction, value, tiebreak)
+            ]
+        positions = sorted(set(positions), reverse=direction == 'next')[:self.per_page + 1]
+
+        blogs = Blog.objects.for_feed().in_bulk([blog_id for _, blog_id in positions])
+        positions = [position for position in positions if position[1] in blogs]
+        rows = [blogs[blog_id] for _, blog_id in positions]
+        return self.build_page(rows, positions, direction, value)
@@ -4,6 +4,7 @@ from accountProfile.views import (
     save_blog,
     unsave_blog,
     get_blogs,
+    following_timeline_view,
 
     get_followers_view,
     get_following_view,
@@ -24,6 +25,7 @@ urlpatterns = [
     path('get_blogs/', get_blogs, name='get-blogs'),
     path('get_blogs/<saved>/', get_blogs, name='get-saved-blogs'),
     path('get_blogs/user/<account_id>/', get_blogs, name='get-user-blogs'),
+    path('timeline/', following_timeline_view, name='timeline'),
 
     path('get_followers/', get_followers_view, name='get-followers'),
     path('get_following/', get_following_view, name='get-following'),
@@ -0,0 +1,53 @@
+from blog.models import Reaction
+from accountProfile.models import Follow, Profile
+
+
+class ViewerState:
+    """
+    The current user's likes, dislikes, saved blogs and follow edges,
+    restricted to the blogs and users rendered on one page.
+
+    Built once per request with one query per relation, so templates can
+    test membership against plain sets, e.g. `blog.id in viewer.liked_blog_ids`.
+    """
+
+    def __init__(self, user, blogs=(), users=()):
+        self.liked_blog_ids = set()
+        self.disliked_blog_ids = set()
+        self.saved_blog_ids = set()
+        self.following_ids = set()
+        self.follower_ids = set()
+
+        if not user.is_authenticated:
+            return
+
+        blog_ids = [blog.pk for blog in blogs]
+        if blog_ids:
+            reactions = (
+                Reaction.objects
+                .filter(user_id=user.pk, blog_id__in=blog_ids)
+                .values_list('blog_id', 'kind')
+            )
+            for blog_id, kind in reactions:
+                if kind == Reaction.LIKE:
+                    self.liked_blog_ids.add(blog_id)
+                else:
+                    self.disliked_blog_ids.add(blog_id)
+            self.saved_blog_ids = set(
+                Profile.saved_blogs.through.objects
+                .filter(profile__user_id=user.pk, blog_id__in=blog_ids)
+                .values_list('blog_id', flat=True)
+            )
+
+        user_ids = [account.pk for account in users if account]
+        if user_ids:
+            self.following_ids = set(
+                Follow.objects
+                .filter(follower_id=user.pk, followee_id__in=user_ids)
+                .values_list('followee_id', flat=True)
+            )
+            self.follower_ids = set(
+                Follow.objects
+                .filter(follower_id__in=user_ids, followee_id=user.pk)
+                .values_list('follower_id', flat=True)
+            )
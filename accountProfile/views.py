@@ -1,12 +1,14 @@
 from django.shortcuts import render, redirect, HttpResponse
 from django.contrib import messages
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 
 from django.contrib.auth import get_user_model
 User = get_user_model()
 
-from blog.models import Blog, Tag
+from blog.models import Blog, Tag, attach_feed_comments
 from blog.views import get_blog_by_id, get_tag_by_id
+from blogs.pagination import CursorPaginator
+from accountProfile.viewer import ViewerState
+from accountProfile.timeline import TimelinePaginator
 
 
 def get_user_by_id(id):
@@ -29,6 +31,7 @@ def save_blog(request, *args, **kwargs):
     if blog:
         user.profile.save_blog(blog)
         context['blog'] = blog
+        context['viewer'] = ViewerState(user, blogs=[blog])
     else:
         return HttpResponse(f'<div class="alert alert-info">Invalid blog.</div>')
 
@@ -47,6 +50,7 @@ def unsave_blog(request, *args, **kwargs):
     if blog:
         user.profile.unsave_blog(blog)
         context['blog'] = blog
+        context['viewer'] = ViewerState(user, blogs=[blog])
     else:
         return HttpResponse(f'<div class="alert alert-info">Invalid blog.</div>')
 
@@ -79,23 +83,38 @@ def get_blogs(request, *args, **kwargs):
     context = {}
     
     if saved:
-        blog_objects = user.profile.saved_blogs.filter(status = '1')
+        blog_objects = user.profile.saved_blogs.for_feed().filter(status = '1')
+        paginator = CursorPaginator(blog_objects, 5)
     elif account:
-        blog_objects = Blog.objects.filter(user=account).filter(status='1')
+        blog_objects = Blog.objects.for_feed().filter(user=account).filter(status='1')
+        paginator = CursorPaginator(blog_objects, 5)
     else:
-        blog_objects = Blog.objects.filter(user=user)
+        # Drafts have no publish date yet, so the own-blogs list is keyed on creation.
+        blog_objects = Blog.objects.for_feed().filter(user=user)
+        paginator = CursorPaginator(blog_objects, 5, key_field='date_created')
 
-    paginator = Paginator(blog_objects, 5)
-    page = request.GET.get('page')
+    blogs = paginator.page(request.GET.get('cursor'))
+    attach_feed_comments(blogs)
+
+    context['blogs'] = blogs
+    context['viewer'] = ViewerState(user, blogs=blogs)
+
+    return render(request, 'accountProfile/display_blogs.html', context)
+
+
+def following_timeline_view(request, *args, **kwargs):
+    user = request.user
+    if not user.is_authenticated:
+        messages.info(request, 'You cannot see your timeline unless you Login.')
+        return redirect('home')
+
+    context = {}
+    paginator = TimelinePaginator(user, 5)
+    blogs = paginator.page(request.GET.get('cursor'))
+    attach_feed_comments(blogs)
 
-    try:
-        blogs = paginator.page(page)
-    except PageNotAnInteger:
-        blogs = paginator.page(1)
-    except EmptyPage:
-        blogs = paginator.page(paginator.num_pages)
-    
     context['blogs'] = blogs
+    context['viewer'] = ViewerState(user, blogs=blogs)
 
     return render(request, 'accountProfile/display_blogs.html', context)
 
@@ -107,9 +126,10 @@ def get_followers_view(request, *args, **kwargs):
         return redirect('home')
 
     context = {}
-    followers = user.profile.followed_by.all()
+    followers = user.profile.get_followers()
     if len(followers) > 0:
         context['users'] = followers
+        context['viewer'] = ViewerState(user, users=followers)
     else:
         context['users'] = None
 
@@ -123,9 +143,10 @@ def get_following_view(request, *args, **kwargs):
         return redirect('home')
 
     context = {}
-    following = user.profile.following.all()
+    following = user.profile.get_following()
     if len(following) > 0:
         context['users'] = following
+        context['viewer'] = ViewerState(user, users=following)
     else:
         context['users'] = None
 
@@ -143,6 +164,7 @@ def follow_view(request, *args, **kwargs):
 
     user.profile.follow(account)
     context['user'] = account
+    context['viewer'] = ViewerState(user, users=[account])
 
     return render(request, 'account/snippets/follow_chunk.html', context)
 
@@ -158,6 +180,7 @@ def unfollow_view(request, *args, **kwargs):
 
     user.profile.unfollow(account)
     context['user'] = account
+    context['viewer'] = ViewerState(user, users=[account])
 
     return render(request, 'account/snippets/follow_chunk.html', context)
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from blog.models import Tag, Blog, Post, Comment, Reply
+from blog.models import Tag, Blog, Post, Comment, Reply, Reaction
 
 
 @admin.register(Tag)
@@ -27,3 +27,8 @@ class CommentAdmin(admin.ModelAdmin):
 class ReplyAdmin(admin.ModelAdmin):
     list_display = ('user', 'comment', 'date_time')
 
+
+
+@admin.register(Reaction)
+class ReactionAdmin(admin.ModelAdmin):
+    list_display = ('user', 'blog', 'kind', 'date_created')
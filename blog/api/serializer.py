@@ -0,0 +1,75 @@
+from rest_framework import serializers
+
+from account.models import User
+from blog.models import Tag, Blog, Post, Comment, Reply
+
+
+def get_requested_fields(request):
+    """
+    Field names asked for with `?fields=a,b`, or None when all are wanted
+    """
+    if request is None or not request.query_params.get('fields'):
+        return None
+    return {name.strip() for name in request.query_params['fields'].split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Drop the fields not listed in the `fields` query parameter.
+
+    Nested serializers are built without a context, so they stay whole.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = get_requested_fields(self.context.get('request'))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+
+class AuthorSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ['id', 'username', 'name', 'display_pic']
+
+
+class TagSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Tag
+        fields = ['id', 'name']
+
+
+class BlogSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    author = AuthorSerializer(source='user', read_only=True)
+    tags = TagSerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Blog
+        fields = [
+            'id', 'heading', 'description', 'author', 'tags', 'date_published',
+            'like_count', 'dislike_count', 'comment_count',
+        ]
+
+
+class PostSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Post
+        fields = ['id', 'blog', 'heading', 'content', 'image', 'date_created']
+
+
+class ReplySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    author = AuthorSerializer(source='user', read_only=True)
+
+    class Meta:
+        model = Reply
+        fields = ['id', 'comment', 'author', 'body', 'date_time']
+
+
+class CommentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    author = AuthorSerializer(source='user', read_only=True)
+    replies = ReplySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Comment
+        fields = ['id', 'blog', 'author', 'body', 'date_time', 'replies']
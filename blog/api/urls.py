@@ -0,0 +1,22 @@
+from rest_framework.routers import SimpleRouter
+
+from blog.api.views import (
+    TagViewSet,
+    BlogViewSet,
+    PostViewSet,
+    CommentViewSet,
+    ReplyViewSet,
+)
+
+
+app_name = 'blog_api'
+
+
+router = SimpleRouter()
+router.register('tags', TagViewSet, basename='api-tag')
+router.register('blogs', BlogViewSet, basename='api-blog')
+router.register('posts', PostViewSet, basename='api-post')
+router.register('comments', CommentViewSet, basename='api-comment')
+router.register('replies', ReplyViewSet, basename='api-reply')
+
+urlpatterns = router.urls
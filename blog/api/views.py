@@ -0,0 +1,126 @@
+from django.db.models import Prefetch
+
+from rest_framework import serializers, viewsets
+from rest_framework.pagination import CursorPagination
+
+from blog.models import Tag, Blog, Post, Comment, Reply
+from blogs.replicas import read_from_replica
+from blog.api.serializer import (
+    get_requested_fields,
+    TagSerializer,
+    BlogSerializer,
+    PostSerializer,
+    CommentSerializer,
+    ReplySerializer,
+)
+
+
+class APICursorPagination(CursorPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return view.ordering
+
+
+class ReadOnlyAPIViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Cursor paginated, read-only endpoints whose querysets only join and
+    prefetch the relations the requested fields need.
+    """
+    pagination_class = APICursorPagination
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if 'list' in (actions or {}).values():
+            view = read_from_replica(view)
+        return view
+
+    def wants(self, field):
+        requested = get_requested_fields(self.request)
+        return requested is None or field in requested
+
+    def get_uuid_param(self, name):
+        value = self.request.query_params.get(name)
+        if value is None:
+            return None
+        try:
+            return serializers.UUIDField().to_internal_value(value)
+        except serializers.ValidationError as e:
+            raise serializers.ValidationError({name: e.detail})
+
+
+class TagViewSet(ReadOnlyAPIViewSet):
+    serializer_class = TagSerializer
+    ordering = ('name',)
+
+    def get_queryset(self):
+        return Tag.objects.all()
+
+
+class BlogViewSet(ReadOnlyAPIViewSet):
+    serializer_class = BlogSerializer
+    ordering = ('-date_published', '-id')
+
+    def get_queryset(self):
+        blogs = Blog.objects.filter(status='1', date_published__isnull=False)
+        if self.wants('author'):
+            blogs = blogs.select_related('user')
+        if self.wants('tags'):
+            blogs = blogs.prefetch_related('tags')
+
+        author = self.get_uuid_param('author')
+        if author:
+            blogs = blogs.filter(user_id=author)
+        tag = self.get_uuid_param('tag')
+        if tag:
+            blogs = blogs.filter(tags__id=tag)
+        return blogs
+
+
+class PostViewSet(ReadOnlyAPIViewSet):
+    serializer_class = PostSerializer
+    ordering = ('date_created', 'id')
+
+    def get_queryset(self):
+        posts = Post.objects.filter(blog__status='1')
+        blog = self.get_uuid_param('blog')
+        if blog:
+            posts = posts.filter(blog_id=blog)
+        return posts
+
+
+class CommentViewSet(ReadOnlyAPIViewSet):
+    serializer_class = CommentSerializer
+    ordering = ('-date_time', '-id')
+
+    def get_queryset(self):
+        comments = Comment.objects.filter(blog__status='1')
+        if self.wants('author'):
+            comments = comments.select_related('user')
+        if self.wants('replies'):
+            comments = comments.prefetch_related(
+                Prefetch('replies', queryset=Reply.objects.select_related('user'))
+            )
+
+        blog = self.get_uuid_param('blog')
+        if blog:
+            comments = comments.filter(blog_id=blog)
+        return comments
+
+
+class ReplyViewSet(ReadOnlyAPIViewSet):
+    serializer_class = ReplySerializer
+    ordering = ('date_time', 'id')
+
+    def get_queryset(self):
+        replies = Reply.objects.filter(comment__blog__status='1')
+        if self.wants('author'):
+            replies = replies.select_related('user')
+
+        comment = self.get_uuid_param('comment')
+        if comment:
+            replies = replies.filter(comment_id=comment)
+        return replies
@@ -0,0 +1,53 @@
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.checks import Error, Tags, register
+from django.template import engines
+
+
+# A local asset linked by path instead of through {% static %}, so it never
+# gets the hashed name.
+RAW_ASSET_PATTERN = re.compile(
+    r'''(?:src|href)\s*=\s*["'](?!https?:|//|data:|\{)([^"'\s]+\.(?:css|js|map|png|jpe?g|gif|svg|ico|webp|woff2?|ttf))["']''',
+    re.IGNORECASE,
+)
+STATIC_TAG_PATTERN = re.compile(r'''\{%\s*static\s+["']([^"']+)["']''')
+
+
+def get_project_templates():
+    base_dir = str(settings.BASE_DIR)
+    for engine in engines.all():
+        for template_dir in getattr(engine, 'template_dirs', ()):
+            if str(template_dir).startswith(base_dir):
+                yield from Path(template_dir).rglob('*.html')
+
+
+@register(Tags.staticfiles, Tags.templates)
+def check_template_assets(app_configs, **kwargs):
+    """
+    Fail when a project template links a static asset that the manifest
+    storage cannot hash: a hard-coded path, or a {% static %} name that no
+    finder knows about.
+    """
+    errors = []
+    for path in get_project_templates():
+        source = path.read_text(encoding='utf-8')
+        for line_number, line in enumerate(source.splitlines(), 1):
+            for asset in RAW_ASSET_PATTERN.findall(line):
+                errors.append(Error(
+                    f'Line {line_number} links "{asset}" without the static tag.',
+                    hint="Use {% static '...' %} so the hashed file name is served.",
+                    obj=str(path),
+                    id='blog.E001',
+                ))
+            for name in STATIC_TAG_PATTERN.findall(line):
+                if not finders.find(name):
+                    errors.append(Error(
+                        f'Line {line_number} references missing static file "{name}".',
+                        hint='Add the file to a static directory or fix the name.',
+                        obj=str(path),
+                        id='blog.E002',
+                    ))
+    return errors
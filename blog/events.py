@@ -0,0 +1,154 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+class EventBroker:
+    """
+    In-process fan-out of blog events to the SSE subscribers of this worker.
+
+    Subscribers are asyncio queues owned by the worker's event loop, while
+    events may be dispatched from the threads sync views run in, so every
+    hand-off goes through `call_soon_threadsafe`.
+    """
+
+    def __init__(self, max_queue_size=100):
+        self.max_queue_size = max_queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, blog_id):
+        queue = asyncio.Queue(maxsize=self.max_queue_size)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers.setdefault(blog_id, set()).add((loop, queue))
+        return queue
+
+    def unsubscribe(self, blog_id, queue):
+        with self._lock:
+            subscribers = self._subscribers.get(blog_id, set())
+            subscribers.difference_update({entry for entry in subscribers if entry[1] is queue})
+            if not subscribers:
+                self._subscribers.pop(blog_id, None)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+    def dispatch(self, blog_id, event, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(blog_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(self._offer, queue, (event, data))
+
+    @staticmethod
+    def _offer(queue, message):
+        # A subscriber that stopped reading loses events rather than memory.
+        if not queue.full():
+            queue.put_nowait(message)
+
+
+class LocalEventBackend:
+    """
+    Deliver events to subscribers of the publishing process only.
+    """
+
+    def __init__(self, broker, **options):
+        self.broker = broker
+
+    def publish(self, blog_id, event, data):
+        self.broker.dispatch(blog_id, event, data)
+
+    async def run(self):
+        pass
+
+
+class SQLiteEventBackend:
+    """
+    Share events between workers through an append-only SQLite file.
+
+    Publishers append rows, and every ASGI worker tails the table and feeds
+    new rows to its local broker. Rows older than `RETENTION` seconds are
+    pruned by the publishers.
+    """
+
+    def __init__(self, broker, PATH, POLL_INTERVAL=0.5, RETENTION=60):
+        self.broker = broker
+        self.path = str(PATH)
+        self.poll_interval = POLL_INTERVAL
+        self.retention = RETENTION
+        with self._connect() as connection:
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS blog_event ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, '
+                'blog_id TEXT NOT NULL, event TEXT NOT NULL, '
+                'data TEXT NOT NULL, created REAL NOT NULL)'
+            )
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        connection.execute('PRAGMA journal_mode=WAL')
+        return connection
+
+    def publish(self, blog_id, event, data):
+        now = time.time()
+        with self._connect() as connection:
+            connection.execute(
+                'INSERT INTO blog_event (blog_id, event, data, created) VALUES (?, ?, ?, ?)',
+                (blog_id, event, data, now),
+            )
+            connection.execute('DELETE FROM blog_event WHERE created < ?', (now - self.retention,))
+
+    def _read_since(self, last_id):
+        with self._connect() as connection:
+            if last_id is None:
+                row = connection.execute('SELECT COALESCE(MAX(id), 0) FROM blog_event').fetchone()
+                return row[0], []
+            rows = connection.execute(
+                'SELECT id, blog_id, event, data FROM blog_event WHERE id > ? ORDER BY id',
+                (last_id,),
+            ).fetchall()
+        if rows:
+            last_id = rows[-1][0]
+        return last_id, rows
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        last_id = None
+        while True:
+            last_id, rows = await loop.run_in_executor(None, self._read_since, last_id)
+            for _, blog_id, event, data in rows:
+                self.broker.dispatch(blog_id, event, data)
+            await asyncio.sleep(self.poll_interval)
+
+
+broker = EventBroker()
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_event_backend():
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                config = getattr(settings, 'BLOG_EVENTS', {})
+                backend_class = import_string(config.get('BACKEND', 'blog.events.LocalEventBackend'))
+                _backend = backend_class(broker, **config.get('OPTIONS', {}))
+    return _backend
+
+
+def publish_blog_event(blog_id, event, data):
+    """
+    Publish an event to the live subscribers of a blog once the current
+    transaction commits.
+    """
+    payload = json.dumps(data, cls=DjangoJSONEncoder)
+    transaction.on_commit(lambda: get_event_backend().publish(str(blog_id), event, payload))
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from blogs.sqlite3.base import apply_pragmas
+
+
+SCHEMA = (
+    'CREATE TABLE blog (id INTEGER PRIMARY KEY, like_count INTEGER NOT NULL DEFAULT 0, '
+    'comment_count INTEGER NOT NULL DEFAULT 0, version INTEGER NOT NULL DEFAULT 1)',
+    'CREATE TABLE reaction (blog_id INTEGER NOT NULL, user_id INTEGER NOT NULL, kind TEXT NOT NULL, '
+    'UNIQUE (blog_id, user_id))',
+    'CREATE TABLE comment (id INTEGER PRIMARY KEY, blog_id INTEGER NOT NULL, user_id INTEGER NOT NULL, body TEXT NOT NULL)',
+    'CREATE INDEX comment_blog_idx ON comment (blog_id)',
+    'CREATE INDEX blog_version_idx ON blog (version)',
+)
+BLOGS = 200
+USERS = 2000
+
+
+def get_profiles():
+    """
+    Stock is what Django 3.2 does out of the box, tuned is the OPTIONS of
+    the default database
+    """
+    options = settings.DATABASES['default'].get('OPTIONS', {})
+    return {
+        'stock': {'pragmas': {}, 'transaction_mode': 'DEFERRED'},
+        'tuned': {
+            'pragmas': options.get('pragmas', {}),
+            'transaction_mode': options.get('transaction_mode', 'DEFERRED'),
+        },
+    }
+
+
+def connect(path, profile):
+    # Autocommit with explicit BEGIN, as Django runs its sqlite3 connections.
+    connection = sqlite3.connect(path, timeout=5, isolation_level=None)
+    apply_pragmas(connection, profile['pragmas'])
+    return connection
+
+
+def create_database(path, profile):
+    connection = connect(path, profile)
+    for statement in SCHEMA:
+        connection.execute(statement)
+    connection.executemany('INSERT INTO blog (id) VALUES (?)', [(i,) for i in range(BLOGS)])
+    connection.close()
+
+
+def write(connection, transaction_mode, rng):
+    """
+    A like toggle as Blog.react does it, or a comment with its counter
+    """
+    blog_id = rng.randrange(BLOGS)
+    user_id = rng.randrange(USERS)
+    connection.execute(f'BEGIN {transaction_mode}')
+    try:
+        if rng.random() < 0.7:
+            liked = connection.execute(
+                'SELECT kind FROM reaction WHERE blog_id = ? AND user_id = ?', (blog_id, user_id)
+            ).fetchone()
+            if liked:
+                connection.execute('DELETE FROM reaction WHERE blog_id = ? AND user_id = ?', (blog_id, user_id))
+            else:
+                connection.execute('INSERT INTO reaction (blog_id, user_id, kind) VALUES (?, ?, ?)', (blog_id, user_id, 'L'))
+            connection.execute(
+                'UPDATE blog SET like_count = like_count + ?, version = version + 1 WHERE id = ?',
+                (-1 if liked else 1, blog_id),
+            )
+        else:
+            connection.execute('INSERT INTO comment (blog_id, user_id, body) VALUES (?, ?, ?)', (blog_id, user_id, 'x' * 200))
+            connection.execute('UPDATE blog SET comment_count = comment_count + 1, version = version + 1 WHERE id = ?', (blog_id,))
+        connection.execute('COMMIT')
+    except sqlite3.Error:
+        if connection.in_transaction:
+            connection.execute('ROLLBACK')
+        raise
+
+
+def read(connection, transaction_mode, rng):
+    """
+    A feed page and the comments of one blog
+    """
+    connection.execute('SELECT id, like_count, comment_count FROM blog ORDER BY version DESC LIMIT 20').fetchall()
+    connection.execute('SELECT id, body FROM comment WHERE blog_id = ? LIMIT 20', (rng.randrange(BLOGS),)).fetchall()
+
+
+def run_worker(args):
+    path, profile, role, seconds, seed = args
+    connection = connect(path, profile)
+    operation = write if role == 'write' else read
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            operation(connection, profile['transaction_mode'], rng)
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    return role, latencies, errors
+
+
+def percentile(latencies, percent):
+    if len(latencies) < 2:
+        return latencies[0] if latencies else 0
+    return statistics.quantiles(latencies, n=100)[percent - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare write throughput and latency of concurrent like and comment writes on SQLite, '
+        'with stock Django settings and with the tuned OPTIONS of the default database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=8, help='Writing processes.')
+        parser.add_argument('--readers', type=int, default=4, help='Reading processes.')
+        parser.add_argument('--seconds', type=float, default=10, help='Duration of each run.')
+
+    def handle(self, *args, **options):
+        for name, profile in get_profiles().items():
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'benchmark.sqlite3')
+                create_database(path, profile)
+                results = self.run(path, profile, options)
+            self.report(name, profile, results, options['seconds'])
+
+    def run(self, path, profile, options):
+        jobs = [(path, profile, 'write', options['seconds'], i) for i in range(options['writers'])]
+        jobs += [(path, profile, 'read', options['seconds'], -i) for i in range(1, options['readers'] + 1)]
+        with multiprocessing.Pool(len(jobs)) as pool:
+            return pool.map(run_worker, jobs)
+
+    def report(self, name, profile, results, seconds):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{name}: pragmas {profile["pragmas"] or "none"}, BEGIN {profile["transaction_mode"]}'
+        ))
+        for role in ('write', 'read'):
+            latencies = [latency for result_role, result, _ in results if result_role == role for latency in result]
+            errors = sum(result_errors for result_role, _, result_errors in results if result_role == role)
+            self.stdout.write(
+                f'  {role}s: {len(latencies) / seconds:8.0f}/s  '
+                f'p50 {percentile(latencies, 50) * 1000:7.2f} ms  '
+                f'p99 {percentile(latencies, 99) * 1000:7.2f} ms  '
+                f'locked errors {errors}'
+            )
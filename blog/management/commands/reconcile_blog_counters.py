@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from blog.models import Blog, Comment, Reaction
+
+
+def count_of(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(blog_id=OuterRef('pk'))
+            .values('blog_id')
+            .annotate(total=Count('*'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Recompute the denormalized like, dislike and comment counters on blogs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of blogs recomputed per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        blog_ids = Blog.objects.order_by('pk').values_list('pk', flat=True)
+
+        updated = 0
+        last_id = None
+        while True:
+            batch = blog_ids if last_id is None else blog_ids.filter(pk__gt=last_id)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                updated += Blog.objects.filter(pk__in=batch).update(
+                    like_count=count_of(Reaction.objects.filter(kind=Reaction.LIKE)),
+                    dislike_count=count_of(Reaction.objects.filter(kind=Reaction.DISLIKE)),
+                    comment_count=count_of(Comment.objects.all()),
+                )
+            last_id = batch[-1]
+
+        self.stdout.write(self.style.SUCCESS(f'Reconciled counters for {updated} blogs.'))
@@ -0,0 +1,54 @@
+# Generated by Django 3.2 on 2026-10-18 17:04
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(blog_id=OuterRef('pk'))
+            .values('blog_id')
+            .annotate(total=Count('*'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def populate_counters(apps, schema_editor):
+    Blog = apps.get_model('blog', 'Blog')
+    Comment = apps.get_model('blog', 'Comment')
+    Blog.objects.update(
+        like_count=count_of(Blog.likes.through.objects.all()),
+        dislike_count=count_of(Blog.dislikes.through.objects.all()),
+        comment_count=count_of(Comment.objects.all()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0012_alter_blog_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blog',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Comment Count'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='dislike_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Dislike Count'),
+        ),
+        migrations.AddField(
+            model_name='blog',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Like Count'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-18 17:05
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_date_published(apps, schema_editor):
+    # Keyset pagination cannot page over NULL keys.
+    Blog = apps.get_model('blog', 'Blog')
+    Blog.objects.filter(status='1', date_published__isnull=True).update(
+        date_published=F('date_created'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0013_blog_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_date_published, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['status', '-date_published', '-id'], name='blog_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['user', 'status', '-date_published', '-id'], name='blog_user_feed_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blog',
+            index=models.Index(fields=['user', '-date_created', '-id'], name='blog_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# Generated by Django 3.2 on 2026-10-18 17:16
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+import uuid
+
+
+def count_of(queryset):
+    return Coalesce(
+        Subquery(
+            queryset.filter(blog_id=OuterRef('pk'))
+            .values('blog_id')
+            .annotate(total=Count('*'))
+            .values('total'),
+            output_field=IntegerField(),
+        ),
+        0,
+    )
+
+
+def copy_reactions(apps, schema_editor):
+    Blog = apps.get_model('blog', 'Blog')
+    Reaction = apps.get_model('blog', 'Reaction')
+
+    # A user left in both tables by the old read-then-write toggle keeps the like.
+    reactions = {}
+    for through, kind in ((Blog.dislikes.through, 'D'), (Blog.likes.through, 'L')):
+        for blog_id, user_id in through.objects.values_list('blog_id', 'user_id').iterator():
+            reactions[blog_id, user_id] = kind
+
+    Reaction.objects.bulk_create(
+        [Reaction(blog_id=blog_id, user_id=user_id, kind=kind) for (blog_id, user_id), kind in reactions.items()],
+        batch_size=1000,
+    )
+    Blog.objects.update(
+        like_count=count_of(Reaction.objects.filter(kind='L')),
+        dislike_count=count_of(Reaction.objects.filter(kind='D')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('blog', '0015_blog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Reaction',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('L', 'Like'), ('D', 'Dislike')], max_length=1, verbose_name='Kind')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('blog', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to='blog.blog')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='reactions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Reaction',
+                'verbose_name_plural': 'Reactions',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='reaction',
+            constraint=models.UniqueConstraint(fields=('blog', 'user'), name='unique_reaction'),
+        ),
+        migrations.RunPython(copy_reactions, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='blog',
+            name='dislikes',
+        ),
+        migrations.RemoveField(
+            model_name='blog',
+            name='likes',
+        ),
+    ]
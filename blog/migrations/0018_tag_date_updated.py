@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-18 18:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tag',
+            name='date_updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Date Updated'),
+        ),
+    ]
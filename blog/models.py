@@ -1,4 +1,8 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F, Prefetch, Q, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 import uuid
 
@@ -18,12 +22,45 @@ class Tag(models.Model):
         max_length=64,
         unique=True
     )
+    date_updated = models.DateTimeField(
+        verbose_name=_('Date Updated'),
+        auto_now=True,
+    )
 
     def __str__(self):
         return self.name
 
 
+class BlogQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Published blogs and the user's own drafts
+        """
+        return self.filter(Q(status='1') | Q(user=user))
+
+    def for_feed(self):
+        """
+        Blog cards with their author. Pass the page to attach_feed_comments
+        for the comments shown on the cards.
+        """
+        return self.select_related('user')
+
+    def for_detail(self):
+        return self.select_related('user').prefetch_related(
+            'posts',
+            Prefetch(
+                'comments',
+                queryset=Comment.objects.select_related('user').prefetch_related(
+                    Prefetch('replies', queryset=Reply.objects.select_related('user'))
+                ),
+            ),
+        )
+
+
 class Blog(models.Model):
+    # Maintained with F() updates only, never written back by save().
+    COUNTER_FIELDS = ('like_count', 'dislike_count', 'comment_count', 'version')
+
     BLOG_STATUS = (
         ('0', 'draft'),
         ('1', 'published')
@@ -74,20 +111,45 @@ class Blog(models.Model):
         auto_now=True,
     )
 
-    likes = models.ManyToManyField(
-        User,
-        related_name=_('likes'),
-        blank=True,
+    like_count = models.PositiveIntegerField(
+        verbose_name=_('Like Count'),
+        default=0,
+        editable=False,
     )
-    dislikes = models.ManyToManyField(
-        User,
-        related_name=_('dislikes'),
-        blank=True,
+    dislike_count = models.PositiveIntegerField(
+        verbose_name=_('Dislike Count'),
+        default=0,
+        editable=False,
+    )
+    comment_count = models.PositiveIntegerField(
+        verbose_name=_('Comment Count'),
+        default=0,
+        editable=False,
+    )
+    version = models.PositiveIntegerField(
+        verbose_name=_('Version'),
+        default=0,
+        editable=False,
     )
 
+    objects = BlogQuerySet.as_manager()
+
     def __str__(self):
         return f'{self.heading}'
 
+    def save(self, *args, **kwargs):
+        if self._state.adding or kwargs.get('update_fields') is not None:
+            return super().save(*args, **kwargs)
+
+        kwargs['update_fields'] = [
+            field.name for field in self._meta.concrete_fields
+            if not field.primary_key and field.name not in self.COUNTER_FIELDS
+        ] + ['version']
+        self.version = F('version') + 1
+        super().save(*args, **kwargs)
+        # Deferred, so the new version is only read back if it is used.
+        del self.version
+
     @property
     def is_published(self):
         return self.status == '1'
@@ -98,29 +160,61 @@ class Blog(models.Model):
 
     @property
     def get_likes(self):
-        return self.likes.all()
+        return User.objects.filter(reactions__blog=self, reactions__kind=Reaction.LIKE)
 
     @property
     def get_dislikes(self):
-        return self.dislikes.all()
+        return User.objects.filter(reactions__blog=self, reactions__kind=Reaction.DISLIKE)
+
+    def _adjust_counts(self, **deltas):
+        """
+        Apply counter deltas in the database and reload them on the instance
+        """
+        Blog.objects.filter(pk=self.pk).update(
+            **{field: F(field) + delta for field, delta in deltas.items()}
+        )
+        self.refresh_from_db(fields=list(deltas))
+
+    def react(self, user, kind):
+        """
+        Toggle the user's reaction of the given kind and return the new
+        (like_count, dislike_count).
+
+        Each step touches at most the user's one reaction row: removing the
+        same reaction, switching the other one, or inserting a new one. The
+        unique constraint turns a concurrent duplicate insert into a no-op.
+        """
+        counters = {Reaction.LIKE: 'like_count', Reaction.DISLIKE: 'dislike_count'}
+        reactions = Reaction.objects.filter(blog=self, user=user)
+        deltas = {'like_count': 0, 'dislike_count': 0, 'version': 1}
+
+        with transaction.atomic():
+            if reactions.filter(kind=kind).delete()[0]:
+                deltas[counters[kind]] = -1
+            elif reactions.exclude(kind=kind).update(kind=kind):
+                deltas.update({field: 1 if other == kind else -1 for other, field in counters.items()})
+            else:
+                try:
+                    with transaction.atomic():
+                        Reaction.objects.create(blog=self, user=user, kind=kind)
+                    deltas[counters[kind]] = 1
+                except IntegrityError:
+                    pass
+
+            self._adjust_counts(**deltas)
+        return self.like_count, self.dislike_count
 
     def like(self, user):
-        if user in self.dislikes.all():
-            self.dislikes.remove(user)
-
-        if user in self.likes.all():
-            self.likes.remove(user)
-        else:
-            self.likes.add(user)
+        return self.react(user, Reaction.LIKE)
 
     def dislike(self, user):
-        if user in self.likes.all():
-            self.likes.remove(user)
+        return self.react(user, Reaction.DISLIKE)
 
-        if user in self.dislikes.all():
-            self.dislikes.remove(user)
-        else:
-            self.dislikes.add(user)
+    def add_comment(self, user, body):
+        with transaction.atomic():
+            comment = Comment.objects.create(blog=self, user=user, body=body)
+            self._adjust_counts(comment_count=1, version=1)
+        return comment
 
     def add_tag(self, tag):
         if not tag in self.tags.all():
@@ -131,6 +225,10 @@ class Blog(models.Model):
             self.tags.remove(tag)
 
     def publish(self):
+        # Publishing again keeps the original date, which is also the one
+        # already fanned out to the follower timelines.
+        if not self.is_published or not self.date_published:
+            self.date_published = timezone.now()
         self.status = '1'
         self.save()
 
@@ -139,6 +237,56 @@ class Blog(models.Model):
         verbose_name = _('Blog')
         verbose_name_plural = _('Blogs')
         ordering = ['-date_updated']
+        indexes = [
+            models.Index(fields=['status', '-date_published', '-id'], name='blog_feed_idx'),
+            models.Index(fields=['user', 'status', '-date_published', '-id'], name='blog_user_feed_idx'),
+            models.Index(fields=['user', '-date_created', '-id'], name='blog_user_created_idx'),
+        ]
+
+
+class Reaction(models.Model):
+    LIKE = 'L'
+    DISLIKE = 'D'
+    KINDS = (
+        (LIKE, _('Like')),
+        (DISLIKE, _('Dislike')),
+    )
+
+    id = models.UUIDField(
+        verbose_name=_('ID'),
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    blog = models.ForeignKey(
+        Blog,
+        on_delete=models.CASCADE,
+        related_name=_('reactions')
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name=_('reactions')
+    )
+    kind = models.CharField(
+        verbose_name=_('Kind'),
+        max_length=1,
+        choices=KINDS,
+    )
+    date_created = models.DateTimeField(
+        verbose_name=_('Date Created'),
+        auto_now_add=True,
+    )
+
+    def __str__(self):
+        return f'{self.user} {self.get_kind_display()} {self.blog}'
+
+    class Meta:
+        verbose_name = _('Reaction')
+        verbose_name_plural = _('Reactions')
+        constraints = [
+            models.UniqueConstraint(fields=['blog', 'user'], name='unique_reaction'),
+        ]
 
 
 def get_post_image(post, filename):
@@ -146,6 +294,9 @@ def get_post_image(post, filename):
 
 
 class Post(models.Model):
+    # Max widths of the variants generated by the imaging app.
+    IMAGE_VARIANTS = {'image': {'thumbnail': 320, 'feed': 800, 'full': 1600}}
+
     blog = models.ForeignKey(
         Blog,
         on_delete=models.CASCADE,
@@ -172,6 +323,21 @@ class Post(models.Model):
         blank=True,
         upload_to=get_post_image,
     )
+    image_width = models.PositiveIntegerField(
+        verbose_name=_('Image Width'),
+        null=True,
+        editable=False,
+    )
+    image_height = models.PositiveIntegerField(
+        verbose_name=_('Image Height'),
+        null=True,
+        editable=False,
+    )
+    image_variants = models.JSONField(
+        verbose_name=_('Image Variants'),
+        default=dict,
+        editable=False,
+    )
     date_created = models.DateTimeField(
         verbose_name=_('Date Created'),
         auto_now_add=True,
@@ -186,6 +352,24 @@ class Post(models.Model):
         ordering = ['date_created']
 
 
+class CommentQuerySet(models.QuerySet):
+    def newest_per_blog(self, blog_ids, limit):
+        ranked = (
+            self.filter(blog_id__in=blog_ids)
+            .annotate(position=Window(
+                expression=RowNumber(),
+                partition_by=[F('blog_id')],
+                order_by=F('date_time').desc(),
+            ))
+            .values('id', 'position')
+        )
+        sql, params = ranked.query.sql_with_params()
+        return self.filter(pk__in=RawSQL(
+            f'SELECT ranked.id FROM ({sql}) ranked WHERE ranked.position <= %s',
+            (*params, limit),
+        ))
+
+
 class Comment(models.Model):
     blog = models.ForeignKey(
         Blog,
@@ -211,9 +395,17 @@ class Comment(models.Model):
         max_length=512,
     )
 
+    objects = CommentQuerySet.as_manager()
+
     def __self__(self):
         return f'{self.user} {self.body}'
 
+    def add_reply(self, user, body):
+        with transaction.atomic():
+            reply = Reply.objects.create(comment=self, user=user, body=body)
+            Blog.objects.filter(pk=self.blog_id).update(version=F('version') + 1)
+        return reply
+
     class Meta:
         verbose_name = _('Comment')
         verbose_name_plural = _('Comments')
@@ -252,3 +444,23 @@ class Reply(models.Model):
         verbose_name = _('Reply')
         verbose_name_plural = _('Replies')
         ordering = ['date_time']
+
+
+def attach_feed_comments(blogs, limit=2):
+    """
+    Set `blog.feed_comments` to the newest `limit` comments of each blog,
+    loaded for the whole page with a single window function query.
+    """
+    feed_comments = {blog.pk: [] for blog in blogs}
+    if feed_comments:
+        comments = (
+            Comment.objects.newest_per_blog(feed_comments, limit)
+            .select_related('user')
+            .prefetch_related(Prefetch('replies', queryset=Reply.objects.select_related('user')))
+        )
+        for comment in comments:
+            feed_comments[comment.blog_id].append(comment)
+
+    for blog in blogs:
+        blog.feed_comments = feed_comments[blog.pk]
+    return blogs
@@ -0,0 +1,67 @@
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.dispatch import receiver
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+
+from blog.models import Blog, Comment, Post, Reaction
+
+User = get_user_model()
+
+
+def bump_blog_versions(blog_ids):
+    Blog.objects.filter(pk__in=blog_ids).update(version=F('version') + 1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    """
+    Invalidate cached fragments of the blog a post belongs to
+    """
+    bump_blog_versions([instance.blog_id])
+
+
+@receiver(m2m_changed, sender=Blog.tags.through)
+def blog_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Invalidate cached fragments of blogs whose tags were added or removed
+    """
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        if pk_set:
+            bump_blog_versions(pk_set)
+    else:
+        bump_blog_versions([instance.pk])
+
+
+@receiver(pre_delete, sender=User)
+def user_deleting(sender, instance, **kwargs):
+    """
+    The account's comments and reactions go in the cascade, take them off
+    the counters of the other blogs they were on
+    """
+    counters = {Reaction.LIKE: 'like_count', Reaction.DISLIKE: 'dislike_count'}
+    deltas = defaultdict(Counter)
+    comments = Comment.objects.filter(user=instance).values('blog_id').annotate(total=Count('*'))
+    for row in comments:
+        deltas[row['blog_id']]['comment_count'] -= row['total']
+    for blog_id, kind in Reaction.objects.filter(user=instance).values_list('blog_id', 'kind'):
+        deltas[blog_id][counters[kind]] -= 1
+    if not deltas:
+        return
+
+    fields = {field for delta in deltas.values() for field in delta}
+    Blog.objects.filter(pk__in=deltas).exclude(user=instance).update(
+        **{
+            field: F(field) + Case(
+                *[When(pk=blog_id, then=Value(delta[field])) for blog_id, delta in deltas.items() if delta[field]],
+                default=Value(0),
+                output_field=IntegerField(),
+            )
+            for field in fields
+        },
+        version=F('version') + 1,
+    )
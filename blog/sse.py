@@ -0,0 +1,118 @@
+import asyncio
+from http.cookies import SimpleCookie
+from importlib import import_module
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user
+
+from blog.events import broker, get_event_backend
+from blog.models import Blog
+
+
+HEARTBEAT_INTERVAL = 15
+RETRY_MILLISECONDS = 5000
+
+_backend_task = None
+
+
+def get_session_user(scope):
+    cookies = SimpleCookie()
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookies.load(value.decode('latin-1'))
+
+    session_key = cookies.get(settings.SESSION_COOKIE_NAME)
+    if session_key is None:
+        return None
+
+    engine = import_module(settings.SESSION_ENGINE)
+    request = SimpleNamespace(session=engine.SessionStore(session_key.value))
+    user = get_user(request)
+    return user if user.is_authenticated else None
+
+
+def can_subscribe(user, blog_id):
+    """
+    Published blogs are open to every logged in user, drafts to their author
+    """
+    return Blog.objects.visible_to(user).filter(pk=blog_id).exists()
+
+
+def ensure_backend_running():
+    global _backend_task
+    if _backend_task is None or _backend_task.done():
+        _backend_task = asyncio.ensure_future(get_event_backend().run())
+
+
+async def wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def send_empty_response(send, status):
+    await send({'type': 'http.response.start', 'status': status, 'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def format_event(event, data):
+    return f'event: {event}\ndata: {data}\n\n'.encode()
+
+
+async def blog_events_app(scope, receive, send, blog_id):
+    """
+    Server-sent events stream of like, comment and reply events for a blog.
+
+    Served directly from the ASGI entry point, so an idle subscriber costs a
+    queue and a heartbeat instead of a poll request.
+    """
+    user = await sync_to_async(get_session_user)(scope)
+    if user is None:
+        return await send_empty_response(send, 403)
+    if not await sync_to_async(can_subscribe)(user, blog_id):
+        return await send_empty_response(send, 404)
+
+    blog_id = str(blog_id)
+    ensure_backend_running()
+    queue = broker.subscribe(blog_id)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': f'retry: {RETRY_MILLISECONDS}\n\n'.encode(),
+            'more_body': True,
+        })
+
+        while True:
+            message = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {message, disconnected},
+                timeout=HEARTBEAT_INTERVAL,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if disconnected in done:
+                message.cancel()
+                break
+
+            if message in done:
+                chunk = format_event(*message.result())
+            else:
+                message.cancel()
+                chunk = b': keepalive\n\n'
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    finally:
+        broker.unsubscribe(blog_id, queue)
+        disconnected.cancel()
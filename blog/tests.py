@@ -1,3 +1,556 @@
-from django.test import TestCase
+import asyncio
+import os
+import tempfile
+import uuid
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from account.models import User
+from blog import events
+from blog.checks import check_template_assets
+from blog.events import EventBroker, LocalEventBackend, SQLiteEventBackend, publish_blog_event
+from blog.models import Tag, Blog, Post, Comment, Reply, Reaction, attach_feed_comments
+from blog.sse import blog_events_app
+from blog.views import parse_feed_state
+
+
+class BlogAPIQueryBudgetTests(TestCase):
+    """
+    List endpoints must cost a fixed number of queries however many rows
+    and relations a page carries.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(3)
+        ]
+        cls.tags = [Tag.objects.create(name=f'tag{i}') for i in range(3)]
+        cls.draft = Blog.objects.create(user=cls.users[0], heading='Draft')
+        for i in range(6):
+            cls.create_blog(i)
+
+    @classmethod
+    def create_blog(cls, i):
+        user = cls.users[i % len(cls.users)]
+        blog = Blog.objects.create(user=user, heading=f'Blog {i}', status='1', date_published=timezone.now())
+        blog.tags.add(*cls.tags)
+        Post.objects.create(blog=blog, content=f'Post {i}')
+        for other in cls.users:
+            comment = Comment.objects.create(blog=blog, user=other, body='Comment')
+            Reply.objects.create(comment=comment, user=user, body='Reply')
+        return blog
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_list(self, name, queries, params=None):
+        with self.assertNumQueries(queries):
+            response = self.client.get(reverse(f'blog_api:{name}-list'), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def assert_constant_queries(self, name, queries, params=None):
+        first = self.get_list(name, queries, params)
+        self.create_blog(len(first['results']))
+        self.get_list(name, queries, params)
+        return first
+
+    def test_blog_list(self):
+        data = self.assert_constant_queries('api-blog', 2)
+        self.assertEqual(len(data['results']), 6)
+        self.assertNotIn(self.draft.heading, [blog['heading'] for blog in data['results']])
+        self.assertEqual(len(data['results'][0]['tags']), 3)
+
+    def test_post_list(self):
+        self.assert_constant_queries('api-post', 1)
+
+    def test_comment_list(self):
+        data = self.assert_constant_queries('api-comment', 2)
+        self.assertEqual(len(data['results'][0]['replies']), 1)
+
+    def test_reply_list(self):
+        self.assert_constant_queries('api-reply', 1)
+
+    def test_tag_list(self):
+        self.assert_constant_queries('api-tag', 1)
+
+    def test_sparse_fields_skip_relations(self):
+        data = self.get_list('api-blog', 1, {'fields': 'id,heading'})
+        self.assertEqual(set(data['results'][0]), {'id', 'heading'})
+        data = self.get_list('api-comment', 1, {'fields': 'id,body'})
+        self.assertEqual(set(data['results'][0]), {'id', 'body'})
+
+    def test_cursor_pages(self):
+        first = self.get_list('api-blog', 2, {'page_size': 4})
+        self.assertIsNone(first['previous'])
+        with self.assertNumQueries(2):
+            second = self.client.get(first['next']).json()
+        headings = [blog['heading'] for blog in first['results'] + second['results']]
+        self.assertEqual(len(set(headings)), 6)
+        self.assertIsNone(second['next'])
+
+
+class FeedQueryBudgetTests(TestCase):
+    """
+    A feed page costs the same queries however many blogs, comments and
+    replies it shows.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(3)
+        ]
+
+    def create_blogs(self, count):
+        for i in range(count):
+            blog = Blog.objects.create(user=self.users[i % 3], heading=f'Blog {i}', status='1', date_published=timezone.now())
+            for user in self.users:
+                comment = blog.add_comment(user, 'Comment')
+                comment.add_reply(user, 'Reply')
+
+    def test_home_page(self):
+        self.create_blogs(1)
+        with self.assertNumQueries(3):
+            self.client.get(reverse('home'))
+
+        self.create_blogs(4)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('home'))
+        blogs = list(response.context['blogs'])
+        self.assertEqual(len(blogs), 5)
+        self.assertEqual([len(blog.feed_comments) for blog in blogs], [2] * 5)
+        self.assertEqual(len(blogs[0].feed_comments[0].replies.all()), 1)
+
+    def test_feed_comments_are_the_newest(self):
+        self.create_blogs(1)
+        blog = Blog.objects.get()
+        newest = blog.add_comment(self.users[0], 'Newest')
+
+        attach_feed_comments([blog], limit=1)
+        self.assertEqual(blog.feed_comments, [newest])
+
+
+class BlogFragmentETagTests(TestCase):
+    """
+    Fragment polls are answered 304 until something they render changes.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(2)
+        ]
+        User.objects.update(is_active=True)
+        cls.blog = Blog.objects.create(user=cls.users[0], heading='Blog', status='1', date_published=timezone.now())
+        cls.tags = [Tag.objects.create(name=f'tag{i}') for i in range(2)]
+
+    def get_etag(self, name, user=None):
+        self.client.force_login(User.objects.get(pk=(user or self.users[0]).pk))
+        response = self.client.get(reverse(f'blog:{name}', kwargs={'blog_id': self.blog.pk}))
+        self.assertEqual(response.status_code, 200)
+        return response['ETag']
+
+    def test_unchanged_fragment_is_not_modified(self):
+        etag = self.get_etag('get-blog-elements')
+        response = self.client.get(
+            reverse('blog:get-blog-elements', kwargs={'blog_id': self.blog.pk}), HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_blog_edit_bumps_the_version_in_one_update(self):
+        etag = self.get_etag('get-blog-elements')
+        blog = Blog.objects.get(pk=self.blog.pk)
+        blog.heading = 'Edited'
+        with self.assertNumQueries(1):
+            blog.save()
+        self.assertEqual(blog.version, self.blog.version + 1)
+        self.assertNotEqual(self.get_etag('get-blog-elements'), etag)
+
+    def test_tag_rename_changes_the_tag_picker(self):
+        etag = self.get_etag('get-tags')
+        self.tags[0].name = 'renamed'
+        self.tags[0].save()
+        self.assertNotEqual(self.get_etag('get-tags'), etag)
+
+    def test_tag_delete_and_add_changes_the_tag_picker(self):
+        etag = self.get_etag('get-tags')
+        self.tags[0].delete()
+        Tag.objects.create(name='replacement')
+        self.assertNotEqual(self.get_etag('get-tags'), etag)
+
+    def test_saving_only_changes_the_viewer_fragment(self):
+        own = self.get_etag('get-blog-elements', self.users[0])
+        other = self.get_etag('get-blog-elements', self.users[1])
+
+        self.users[0].profile.save_blog(self.blog)
+        self.assertNotEqual(self.get_etag('get-blog-elements', self.users[0]), own)
+        self.assertEqual(self.get_etag('get-blog-elements', self.users[1]), other)
+
+
+class RecordingEventBackend:
+    published = []
+
+    def __init__(self, broker, **options):
+        pass
+
+    def publish(self, blog_id, event, data):
+        self.published.append((blog_id, event, data))
+
+
+class BlogEventTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(2)
+        ]
+        User.objects.update(is_active=True)
+        cls.blog = Blog.objects.create(user=cls.users[0], heading='Blog', status='1', date_published=timezone.now())
+        cls.draft = Blog.objects.create(user=cls.users[0], heading='Draft')
+
+    def setUp(self):
+        events._backend = None
+        RecordingEventBackend.published = []
+        self.addCleanup(setattr, events, '_backend', None)
+
+    def test_broker_delivers_to_subscribers_of_the_blog(self):
+        async def run():
+            broker = EventBroker(max_queue_size=1)
+            queue = broker.subscribe('a')
+            other = broker.subscribe('b')
+            broker.dispatch('a', 'likes', '{}')
+            broker.dispatch('a', 'likes', '{"dropped": true}')
+            await asyncio.sleep(0)
+            self.assertEqual(queue.get_nowait(), ('likes', '{}'))
+            self.assertTrue(queue.empty())
+            self.assertTrue(other.empty())
+
+            broker.unsubscribe('a', queue)
+            broker.unsubscribe('b', other)
+            self.assertEqual(broker.subscriber_count(), 0)
+
+        async_to_sync(run)()
+
+    def test_local_backend_dispatches_to_its_broker(self):
+        async def run():
+            broker = EventBroker()
+            queue = broker.subscribe('a')
+            LocalEventBackend(broker).publish('a', 'comment', '{}')
+            self.assertEqual(await queue.get(), ('comment', '{}'))
+
+        async_to_sync(run)()
+
+    def test_sqlite_backend_shares_events_through_the_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'events.sqlite3')
+            publisher = SQLiteEventBackend(EventBroker(), PATH=path)
+            subscriber = SQLiteEventBackend(EventBroker(), PATH=path)
+
+            last_id, rows = subscriber._read_since(None)
+            self.assertEqual(rows, [])
+            publisher.publish('a', 'likes', '{}')
+            publisher.publish('b', 'reply', '{}')
+            last_id, rows = subscriber._read_since(last_id)
+            self.assertEqual([row[1:] for row in rows], [('a', 'likes', '{}'), ('b', 'reply', '{}')])
+            self.assertEqual(subscriber._read_since(last_id)[1], [])
+
+    @override_settings(BLOG_EVENTS={'BACKEND': 'blog.tests.RecordingEventBackend'})
+    def test_events_are_published_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            publish_blog_event(self.blog.pk, 'likes', {'like_count': 1})
+            self.assertEqual(RecordingEventBackend.published, [])
+        self.assertEqual(RecordingEventBackend.published, [(str(self.blog.pk), 'likes', '{"like_count": 1}')])
+
+    @override_settings(BLOG_EVENTS={'BACKEND': 'blog.tests.RecordingEventBackend'})
+    def test_rolled_back_events_are_not_published(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    publish_blog_event(self.blog.pk, 'likes', {'like_count': 1})
+                    raise IntegrityError
+            except IntegrityError:
+                pass
+        self.assertEqual(RecordingEventBackend.published, [])
+
+    def open_stream(self, blog_id, user=None):
+        headers = []
+        if user:
+            self.client.force_login(user)
+            session = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+            headers.append((b'cookie', f'{settings.SESSION_COOKIE_NAME}={session}'.encode()))
+        sent = []
+
+        async def receive():
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {'type': 'http', 'path': f'/blog_events/{blog_id}/', 'headers': headers}
+        async_to_sync(blog_events_app)(scope, receive, send, blog_id=blog_id)
+        return sent[0]['status']
+
+    def test_stream_needs_login(self):
+        self.assertEqual(self.open_stream(self.blog.pk), 403)
+
+    def test_stream_of_a_visible_blog(self):
+        self.assertEqual(self.open_stream(self.blog.pk, self.users[1]), 200)
+        self.assertEqual(self.open_stream(self.draft.pk, self.users[0]), 200)
+
+    def test_stream_of_a_hidden_or_missing_blog(self):
+        self.assertEqual(self.open_stream(self.draft.pk, self.users[1]), 404)
+        self.assertEqual(self.open_stream(uuid.uuid4(), self.users[1]), 404)
+
+    def test_asgi_only_resolves_event_paths(self):
+        from blogs import asgi
+
+        async def django_application(scope, receive, send):
+            pass
+
+        with mock.patch.object(asgi, 'django_application', side_effect=django_application) as django, \
+                mock.patch.object(asgi, 'resolve', wraps=asgi.resolve) as resolve:
+            async_to_sync(asgi.application)({'type': 'http', 'path': '/'}, None, None)
+            self.assertFalse(resolve.called)
+            self.assertTrue(django.called)
+
+
+class ReactionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(2)
+        ]
+        cls.blog = Blog.objects.create(user=cls.users[0], heading='Blog', status='1', date_published=timezone.now())
+
+    def get_kinds(self):
+        return dict(Reaction.objects.filter(blog=self.blog).values_list('user_id', 'kind'))
+
+    def test_like_toggles(self):
+        self.assertEqual(self.blog.like(self.users[0]), (1, 0))
+        self.assertEqual(self.blog.like(self.users[1]), (2, 0))
+        self.assertEqual(self.blog.like(self.users[0]), (1, 0))
+        self.assertEqual(self.get_kinds(), {self.users[1].pk: Reaction.LIKE})
+
+    def test_reaction_switches_kind(self):
+        self.blog.like(self.users[0])
+        self.assertEqual(self.blog.dislike(self.users[0]), (0, 1))
+        self.assertEqual(self.get_kinds(), {self.users[0].pk: Reaction.DISLIKE})
+        self.assertEqual(self.blog.like(self.users[0]), (1, 0))
+        self.assertEqual(Blog.objects.values_list('like_count', 'dislike_count').get(pk=self.blog.pk), (1, 0))
+
+    def test_every_reaction_bumps_the_version(self):
+        version = Blog.objects.get(pk=self.blog.pk).version
+        self.blog.like(self.users[0])
+        self.blog.dislike(self.users[0])
+        self.assertEqual(Blog.objects.get(pk=self.blog.pk).version, version + 2)
+
+    def test_concurrent_duplicate_insert_leaves_counts_alone(self):
+        create = Reaction.objects.create
+
+        def insert_twice(**kwargs):
+            # Another request inserted the same reaction in the meantime.
+            create(**kwargs)
+            return create(**kwargs)
+
+        with mock.patch.object(Reaction.objects, 'create', side_effect=insert_twice):
+            with transaction.atomic():
+                self.assertEqual(self.blog.like(self.users[0]), (0, 0))
+                # The savepoint was rolled back, the outer transaction is usable.
+                self.assertEqual(self.get_kinds(), {})
+
+
+class ReactionMigrationTests(TransactionTestCase):
+    """
+    0016 copies the likes and dislikes tables into reactions, keeping the
+    like of a user left in both, and recounts the blogs.
+    """
+    migrate_from = [('blog', '0015_blog_version')]
+    migrate_to = [('blog', '0016_reaction')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
+
+    def test_copy_and_recount(self):
+        users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(3)
+        ]
+        old_apps = self.migrate(self.migrate_from)
+        blog = old_apps.get_model('blog', 'Blog').objects.create(user_id=users[0].pk, heading='Blog', like_count=7, dislike_count=7)
+        blog.likes.add(users[0].pk, users[1].pk)
+        blog.dislikes.add(users[1].pk, users[2].pk)
+
+        new_apps = self.migrate(self.migrate_to)
+        Reaction = new_apps.get_model('blog', 'Reaction')
+        kinds = dict(Reaction.objects.values_list('user_id', 'kind'))
+        self.assertEqual(kinds, {users[0].pk: 'L', users[1].pk: 'L', users[2].pk: 'D'})
+        counts = new_apps.get_model('blog', 'Blog').objects.values_list('like_count', 'dislike_count').get()
+        self.assertEqual(counts, (2, 1))
+
+
+class BlogCounterTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(3)
+        ]
+        cls.blog = Blog.objects.create(user=cls.users[0], heading='Blog', status='1', date_published=timezone.now())
+
+    def get_counts(self):
+        return Blog.objects.values_list('like_count', 'dislike_count', 'comment_count').get(pk=self.blog.pk)
+
+    def test_counters_are_applied_in_the_database(self):
+        # A stale copy of the row must not overwrite the other's increments.
+        stale = Blog.objects.get(pk=self.blog.pk)
+        self.blog.add_comment(self.users[1], 'Comment')
+        self.blog.like(self.users[1])
+        stale.add_comment(self.users[2], 'Comment')
+        self.assertEqual(stale.comment_count, 2)
+        self.assertEqual(stale.like(self.users[2]), (2, 0))
+        self.assertEqual(self.get_counts(), (2, 0, 2))
+
+    def test_blog_edit_leaves_counters_alone(self):
+        stale = Blog.objects.get(pk=self.blog.pk)
+        self.blog.add_comment(self.users[1], 'Comment')
+        stale.heading = 'Edited'
+        stale.save()
+        self.assertEqual(self.get_counts(), (0, 0, 1))
+
+    def test_deleted_account_is_taken_off_the_counters(self):
+        self.blog.add_comment(self.users[1], 'Comment')
+        self.blog.add_comment(self.users[1], 'Comment')
+        self.blog.add_comment(self.users[2], 'Comment')
+        self.blog.like(self.users[1])
+        self.blog.dislike(self.users[2])
+        version = Blog.objects.get(pk=self.blog.pk).version
+
+        self.users[1].delete()
+        self.assertEqual(self.get_counts(), (0, 1, 1))
+        self.assertEqual(Blog.objects.get(pk=self.blog.pk).version, version + 1)
+
+    def test_reconcile_recounts_drifted_counters(self):
+        self.blog.add_comment(self.users[1], 'Comment')
+        self.blog.like(self.users[1])
+        self.blog.dislike(self.users[2])
+        Blog.objects.update(like_count=9, dislike_count=9, comment_count=9)
+        call_command('reconcile_blog_counters', stdout=StringIO())
+        self.assertEqual(self.get_counts(), (1, 1, 1))
+
+
+class FeedPollTests(TestCase):
+    """
+    One poll re-renders only the feed cards whose version moved.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [
+            User.objects.create_user(f'reader{i}@example.com', f'reader{i}', 'password')
+            for i in range(2)
+        ]
+        User.objects.update(is_active=True)
+        cls.blogs = [
+            Blog.objects.create(user=cls.users[0], heading=f'Blog {i}', status='1', date_published=timezone.now())
+            for i in range(3)
+        ]
+        cls.draft = Blog.objects.create(user=cls.users[1], heading='Draft')
+
+    def setUp(self):
+        self.client.force_login(User.objects.get(pk=self.users[0].pk))
+
+    def get_state(self, *blogs, stale=()):
+        return ','.join(
+            f'{blog.pk}:{Blog.objects.get(pk=blog.pk).version - (blog in stale)}' for blog in blogs
+        )
+
+    def poll(self, state):
+        return self.client.get(reverse('blog:get-feed-elements'), {'state': state})
+
+    def test_malformed_entries_are_skipped(self):
+        state = f'not-a-uuid:1,{self.blogs[0].pk}:,{self.blogs[1].pk}:x,{self.blogs[2].pk}:0'
+        self.assertEqual(parse_feed_state(state), {str(self.blogs[2].pk): 0})
+
+    def test_state_is_capped(self):
+        state = self.get_state(*self.blogs)
+        with mock.patch('blog.views.FEED_POLL_MAX_BLOGS', 2):
+            self.assertEqual(list(parse_feed_state(state)), [str(blog.pk) for blog in self.blogs[:2]])
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.poll(self.get_state(*self.blogs)).status_code, 204)
+        self.assertEqual(self.poll('').status_code, 204)
+
+    def test_only_changed_cards_are_swapped(self):
+        response = self.poll(self.get_state(*self.blogs, stale=[self.blogs[1]]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([blog.pk for blog in response.context['blogs']], [self.blogs[1].pk])
+        self.assertContains(response, f'id="id-blog-details-{self.blogs[1].pk}" hx-swap-oob="innerHTML"')
+        self.assertNotContains(response, f'id-blog-details-{self.blogs[0].pk}')
+        # The poller carries the current version of every card forward.
+        self.assertContains(response, self.get_state(*self.blogs))
+
+    def test_drafts_of_other_users_are_not_rendered(self):
+        response = self.poll(self.get_state(self.draft, stale=[self.draft]))
+        self.assertEqual(response.status_code, 204)
+
+        self.client.force_login(User.objects.get(pk=self.users[1].pk))
+        response = self.poll(self.get_state(self.draft, stale=[self.draft]))
+        self.assertEqual([blog.pk for blog in response.context['blogs']], [self.draft.pk])
+
+
+class TemplateAssetCheckTests(TestCase):
+
+    def check_template(self, source):
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'page.html'), 'w', encoding='utf-8') as template:
+                template.write(source)
+            templates = [{
+                'BACKEND': 'django.template.backends.django.DjangoTemplates',
+                'DIRS': [directory],
+            }]
+            with override_settings(TEMPLATES=templates, BASE_DIR=directory):
+                return [error.id for error in check_template_assets(None)]
+
+    def test_known_static_names_pass(self):
+        self.assertEqual(self.check_template(
+            "{% load static %}\n"
+            "<link rel=\"stylesheet\" href=\"{% static 'css/base.css' %}\">\n"
+            "<script src=\"https://cdn.example.com/app.js\"></script>\n"
+        ), [])
+
+    def test_raw_static_path(self):
+        self.assertEqual(
+            self.check_template('<link rel="stylesheet" href="/static/css/base.css">'),
+            ['blog.E001'],
+        )
+
+    def test_unknown_static_name(self):
+        self.assertEqual(
+            self.check_template("{% load static %}<link href=\"{% static 'css/missing.css' %}\">"),
+            ['blog.E002'],
+        )
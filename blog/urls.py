@@ -16,6 +16,8 @@ from blog.views import (
     comment_view,
     reply_view,
     get_blog_elements_view,
+    get_feed_elements_view,
+    blog_events_unavailable_view,
 
     get_tags_view,
     add_tags_to_blog,
@@ -42,6 +44,8 @@ urlpatterns = [
     path('comment_reply/<comment_id>/', reply_view, name='reply-comment'),
     path('get_blog_elements/<blog_id>/', get_blog_elements_view, name='get-blog-elements'),
     path('get_blog_elements/<blog_id>/<partial>/',get_blog_elements_view, name='get-blog-elements'),
+    path('get_feed_elements/', get_feed_elements_view, name='get-feed-elements'),
+    path('blog_events/<uuid:blog_id>/', blog_events_unavailable_view, name='blog-events'),
 
     path('get_tags/<blog_id>/', get_tags_view, name='get-tags'),
     path('add_tag_to_blog/<blog_id>/<tag_id>/', add_tags_to_blog, name='add-tag-to-blog'),
@@ -1,15 +1,31 @@
 from django.shortcuts import redirect, render, HttpResponse
 from django.contrib import messages
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, Exists, Max, OuterRef
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
-import datetime
+import hashlib
+import uuid
 
-from blog.models import Blog, Post, Comment ,Reply, Tag
+from blog.models import Blog, Post, Comment ,Reply, Tag, attach_feed_comments
 from blog.forms import BlogForm, PostForm
+from blog.events import publish_blog_event
+from accountProfile.models import Profile
+from accountProfile.viewer import ViewerState
+from accountProfile.timeline import enqueue_fanout
+from blogs.replicas import read_from_replica
 
 
-def get_blog_by_id(id):
+FEED_POLL_MAX_BLOGS = 50
+
+
+def get_blog_by_id(id, queryset=None):
+    if queryset is None:
+        queryset = Blog.objects.all()
     try:
-        blog = Blog.objects.get(id=id)
+        blog = queryset.get(id=id)
         return blog
     except Blog.DoesNotExist:
         return None
@@ -31,6 +47,41 @@ def get_comment_by_id(id):
         return None
 
 
+def blog_fragment_etag(request, *extra, **kwargs):
+    """
+    Strong ETag for a blog fragment derived from the blog version stamp and
+    the viewer, so unchanged polls are answered 304 before any rendering.
+
+    Whether the viewer saved the blog only concerns that viewer, so it is
+    read alongside the version instead of bumping it.
+    """
+    saved = Profile.saved_blogs.through.objects.filter(profile__user_id=request.user.pk, blog_id=OuterRef('pk'))
+    try:
+        state = (
+            Blog.objects.filter(id=kwargs.get('blog_id'))
+            .annotate(saved=Exists(saved))
+            .values_list('version', 'saved')
+            .first()
+        )
+    except ValidationError:
+        return None
+    if state is None:
+        return None
+
+    viewer = request.user.pk if request.user.is_authenticated else 'anonymous'
+    raw = ':'.join(str(part) for part in (
+        request.resolver_match.url_name, kwargs.get('partial'), *state, viewer, *extra
+    ))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def blog_tags_etag(request, *args, **kwargs):
+    # The tag picker also lists every tag, which is not covered by the blog
+    # version. Renames move the latest update, deletes the count.
+    tags = Tag.objects.aggregate(count=Count('id'), updated=Max('date_updated'))
+    return blog_fragment_etag(request, tags['count'], tags['updated'], **kwargs)
+
+
 def get_tag_by_id(id):
     try:
         tag = Tag.objects.get(id=id)
@@ -66,6 +117,7 @@ def blog_create_view(request, *args, **kwargs):
     return render(request, 'blog/blog_add.html', context)
 
 
+@read_from_replica
 def blog_detail_view(request, *args, **kwargs):
     context = {}
 
@@ -76,13 +128,14 @@ def blog_detail_view(request, *args, **kwargs):
         return redirect('account:login')
 
     blog_id = kwargs.get('blog_id')
-    blog = get_blog_by_id(blog_id)
+    blog = get_blog_by_id(blog_id, Blog.objects.for_detail())
 
     if not blog:
         messages.warning(request, 'Sorry!, blog not available.')
         return redirect('home')
 
     context['blog'] = blog
+    context['viewer'] = ViewerState(user, blogs=[blog])
     return render(request, 'blog/blog_detail.html', context)
 
 
@@ -269,8 +322,10 @@ def blog_like_view(request, *args, **kwargs):
 
     if blog:
         blog.like(user)
+        publish_blog_event(blog.id, 'likes', {'like_count': blog.like_count, 'dislike_count': blog.dislike_count})
 
         context['blog'] = blog
+        context['viewer'] = ViewerState(user, blogs=[blog])
     else:
         return HttpResponse(f'<div class="alert alert-info">Invalid blog.</div>')
 
@@ -288,8 +343,10 @@ def blog_dislike_view(request, *args, **kwargs):
 
     if blog:
         blog.dislike(user)
+        publish_blog_event(blog.id, 'likes', {'like_count': blog.like_count, 'dislike_count': blog.dislike_count})
 
         context['blog'] = blog
+        context['viewer'] = ViewerState(user, blogs=[blog])
     else:
         return HttpResponse(f'<div class="alert alert-info">Invalid blog.</div>')
 
@@ -308,7 +365,8 @@ def comment_view(request, *args, **kwargs):
     if request.method == 'POST':
         body = request.POST.get('comment-input', '')
         if blog:
-            comment = Comment.objects.create(blog=blog, user=request.user, body=body)
+            comment = blog.add_comment(request.user, body)
+            publish_blog_event(blog.id, 'comment', {'comment_id': comment.id, 'comment_count': blog.comment_count})
             context['comment'] = comment
         else:
             return HttpResponse(f'<div class="alert alert-info">Invalid blog.</div>')
@@ -328,7 +386,8 @@ def reply_view(request, *args, **kwargs):
     if request.method == 'POST':
         body = request.POST.get('reply-input', '')
         if comment:
-            reply = Reply.objects.create(comment=comment, user=request.user, body=body)
+            reply = comment.add_reply(request.user, body)
+            publish_blog_event(comment.blog_id, 'reply', {'comment_id': comment.id, 'reply_id': reply.id})
             context['reply'] = reply
         else:
             return HttpResponse(f'<div class="alert alert-info">Invalid blog.</div>')
@@ -336,31 +395,92 @@ def reply_view(request, *args, **kwargs):
     return render(request, 'blog/snippets/reply.html', context)
 
 
+@read_from_replica
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=blog_fragment_etag)
 def get_blog_elements_view(request, *args, **kwargs):
     user = request.user
     if not user.is_authenticated:
         return HttpResponse(f'<div class="alert alert-info">You cannot like a post unless you Login.</div>')
 
+    try:
+        partial = kwargs.get('partial')
+    except:
+        partial = None
+
     context = {}
     blog_id = kwargs.get('blog_id')
-    blog = get_blog_by_id(blog_id)
+    queryset = Blog.objects.for_feed() if partial else Blog.objects.for_detail()
+    blog = get_blog_by_id(blog_id, queryset)
 
     if blog:
+        if partial:
+            attach_feed_comments([blog])
         context['blog'] = blog
+        context['viewer'] = ViewerState(user, blogs=[blog])
     else:
         return HttpResponse(f'<div class="alert alert-info">Invalid blog.</div>')
 
-    try:
-        partial = kwargs.get('partial')
-    except:
-        partial = None
-
     if partial:
         return render(request, 'snippets/blog_elements.html', context)
 
     return render(request, 'blog/snippets/blog_elements.html', context)
 
 
+def parse_feed_state(state):
+    versions = {}
+    for entry in state.split(',')[:FEED_POLL_MAX_BLOGS]:
+        blog_id, _, version = entry.partition(':')
+        try:
+            versions[str(uuid.UUID(blog_id))] = int(version)
+        except ValueError:
+            continue
+    return versions
+
+
+def get_feed_elements_view(request, *args, **kwargs):
+    """
+    Single poll for every blog card on a feed page.
+
+    The client sends `state=<blog id>:<version>,...` for the cards it shows
+    and only the cards whose version moved are re-rendered, as htmx
+    out-of-band swaps. Nothing changed answers 204 so htmx does no swap.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return HttpResponse(status=204)
+
+    versions = parse_feed_state(request.GET.get('state', ''))
+    current = dict(
+        (str(blog_id), version) for blog_id, version in
+        Blog.objects.visible_to(user).filter(id__in=versions).values_list('id', 'version')
+    )
+    changed = [blog_id for blog_id, version in current.items() if versions[blog_id] != version]
+    if not changed:
+        return HttpResponse(status=204)
+
+    blogs = attach_feed_comments(list(Blog.objects.for_feed().filter(id__in=changed)))
+    feed_blogs = [
+        {'id': blog_id, 'version': current[blog_id]}
+        for blog_id in versions if blog_id in current
+    ]
+
+    context = {
+        'blogs': blogs,
+        'feed_blogs': feed_blogs,
+        'viewer': ViewerState(user, blogs=blogs),
+    }
+    return render(request, 'snippets/feed_elements.html', context)
+
+
+def blog_events_unavailable_view(request, *args, **kwargs):
+    # Only reached when not served through blogs.asgi, 204 tells EventSource
+    # to stop reconnecting so the page falls back to polling.
+    return HttpResponse(status=204)
+
+
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=blog_tags_etag)
 def get_tags_view(request, *args, **kwargs):
     user = request.user
     if not user.is_authenticated:
@@ -368,7 +488,7 @@ def get_tags_view(request, *args, **kwargs):
 
     context = {}
     blog_id = kwargs.get('blog_id')
-    blog = get_blog_by_id(blog_id)
+    blog = get_blog_by_id(blog_id, Blog.objects.prefetch_related('tags'))
     context['blog'] = blog
 
     tags = Tag.objects.all()
@@ -438,8 +558,8 @@ def publish_blog_view(request, *args, **kwargs):
     if not blog.user == request.user:
         return HttpResponse(f'<div class="alert alert-info">You cannot publish other persons blog.</div>')
 
-    blog.publish()
-    blog.date_published = datetime.datetime.now()
-    blog.save()
+    with transaction.atomic():
+        blog.publish()
+        enqueue_fanout(blog)
 
     return HttpResponse()
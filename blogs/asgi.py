@@ -10,7 +10,27 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 import os
 
 from django.core.asgi import get_asgi_application
+from django.urls import Resolver404, resolve
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogs.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from blog.sse import blog_events_app
+
+# Only paths under the blog-events route are resolved here, every other
+# request goes straight to Django.
+BLOG_EVENTS_PREFIX = '/blog_events/'
+
+
+async def application(scope, receive, send):
+    # Live blog events are streamed natively, Django 3.2 cannot stream async responses.
+    if scope['type'] == 'http' and scope['path'].startswith(BLOG_EVENTS_PREFIX):
+        try:
+            match = resolve(scope['path'])
+        except Resolver404:
+            match = None
+        if match and match.url_name == 'blog-events':
+            return await blog_events_app(scope, receive, send, blog_id=match.kwargs['blog_id'])
+
+    await django_application(scope, receive, send)
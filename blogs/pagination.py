@@ -0,0 +1,134 @@
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.encoding import force_bytes, force_str
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+class CursorPage:
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class CursorPaginator:
+    """
+    Keyset paginator ordered newest first on (key_field, tiebreak_field).
+
+    Pages are addressed with opaque cursor tokens instead of page numbers, so
+    every page costs one indexed range query and no COUNT(*).
+    """
+
+    def __init__(self, queryset, per_page, key_field='date_published', tiebreak_field='pk'):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.key_field = key_field
+        self.tiebreak_field = tiebreak_field
+
+    def position(self, obj):
+        return getattr(obj, self.key_field), getattr(obj, self.tiebreak_field)
+
+    def encode_cursor(self, direction, position):
+        key, tiebreak = position
+        payload = json.dumps([direction, key.isoformat(), str(tiebreak)])
+        return urlsafe_base64_encode(force_bytes(payload))
+
+    def decode_cursor(self, cursor):
+        meta = self.queryset.model._meta
+        tiebreak_field = meta.pk if self.tiebreak_field == 'pk' else meta.get_field(self.tiebreak_field)
+        try:
+            direction, key, tiebreak = json.loads(force_str(urlsafe_base64_decode(cursor)))
+            key = parse_datetime(key)
+            tiebreak = tiebreak_field.to_python(tiebreak)
+        except (TypeError, ValueError, ValidationError):
+            raise InvalidCursor(cursor)
+        if direction not in ('next', 'prev') or key is None:
+            raise InvalidCursor(cursor)
+        return direction, key, tiebreak
+
+    def parse_cursor(self, cursor):
+        if cursor:
+            try:
+                return self.decode_cursor(cursor)
+            except InvalidCursor:
+                pass
+        return 'next', None, None
+
+    def fetch(self, direction, value, tiebreak):
+        """
+        Up to per_page + 1 rows past the cursor position, in walking order.
+        """
+        key = self.key_field
+        tie = self.tiebreak_field
+
+        queryset = self.queryset.filter(**{f'{key}__isnull': False})
+        if direction == 'next':
+            if value is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{key}__lt': value}) | Q(**{key: value, f'{tie}__lt': tiebreak})
+                )
+            queryset = queryset.order_by(f'-{key}', f'-{tie}')
+        else:
+            queryset = queryset.filter(
+                Q(**{f'{key}__gt': value}) | Q(**{key: value, f'{tie}__gt': tiebreak})
+            ).order_by(key, tie)
+
+        return list(queryset[:self.per_page + 1])
+
+    def build_page(self, rows, positions, direction, value):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        positions = positions[:self.per_page]
+
+        if direction == 'prev':
+            rows.reverse()
+            positions.reverse()
+            has_next, has_previous = True, has_more
+        else:
+            has_next, has_previous = has_more, value is not None
+
+        next_cursor = None
+        previous_cursor = None
+        if rows and has_next:
+            next_cursor = self.encode_cursor('next', positions[-1])
+        if rows and has_previous:
+            previous_cursor = self.encode_cursor('prev', positions[0])
+        elif not rows and value is not None:
+            # Walked past the last row, or its rows were deleted: lead back to
+            # the first page, which an empty cursor stands for.
+            previous_cursor = ''
+
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+    def page(self, cursor=None):
+        direction, value, tiebreak = self.parse_cursor(cursor)
+        rows = self.fetch(direction, value, tiebreak)
+        return self.build_page(rows, [self.position(row) for row in rows], direction, value)
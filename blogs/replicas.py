@@ -0,0 +1,110 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+# Per request routing state, a dict so that changes made in a thread running
+# a sync view are seen by the middleware that created it.
+routing_state = ContextVar('routing_state', default=None)
+
+PIN_COOKIE = 'pin_primary'
+
+
+def read_from_replica(view):
+    """
+    Mark a view whose reads can be served from a replica, unless the
+    session has written recently
+    """
+    view.read_from_replica = True
+    return view
+
+
+@contextmanager
+def unpinned_writes():
+    """
+    Writes in the block, such as bookkeeping nobody reads back, do not pin
+    the client to the primary
+    """
+    state = routing_state.get()
+    wrote = state['wrote'] if state else False
+    try:
+        yield
+    finally:
+        if state:
+            state['wrote'] = wrote
+
+
+class ReplicaRouter:
+    """
+    Send the reads of views marked with read_from_replica to one of the
+    DATABASE_REPLICAS, everything else to the primary. Any write in the
+    request turns the following reads to the primary.
+
+    Sessions are always read from the primary, a replica missing a new
+    session would log its client out. Saving one does not pin the client
+    either, as it is never read from a replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        state = routing_state.get()
+        replicas = settings.DATABASE_REPLICAS
+        if not (state and state['replica'] and replicas) or state['wrote']:
+            return DEFAULT_DB_ALIAS
+        if model._meta.app_label == 'sessions':
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = routing_state.get()
+        if state and model._meta.app_label != 'sessions':
+            state['wrote'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of marked GET views to replicas, and pin a client to the
+    primary for REPLICA_PIN_SECONDS after it writes so it reads its own
+    writes while the replicas catch up.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {'replica': False, 'wrote': False}
+        token = routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+
+        if state['wrote']:
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = routing_state.get()
+        if (
+            state is not None
+            and getattr(view_func, 'read_from_replica', False)
+            and request.method in ('GET', 'HEAD')
+            and PIN_COOKIE not in request.COOKIES
+        ):
+            state['replica'] = True
@@ -42,6 +42,8 @@ INSTALLED_APPS = [
     'account',
     'accountProfile',
     'blog',
+    'search',
+    'imaging',
 
     'rest_framework',
     'rest_framework.authtoken',
@@ -52,6 +54,9 @@ MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
 
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'imaging.middleware.MediaFilesMiddleware',
+
+    'blogs.replicas.ReplicaRoutingMiddleware',
 
     'django.contrib.sessions.middleware.SessionMiddleware',
 
@@ -95,11 +100,63 @@ WSGI_APPLICATION = 'blogs.wsgi.application'
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        # SQLite tuned for concurrent workers, see blogs/sqlite3/base.py.
+        'ENGINE': 'blogs.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'pragmas': {
+                'journal_mode': 'wal',
+                'busy_timeout': 5000,
+                'synchronous': 'normal',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64 * 1024,
+            },
+            'transaction_mode': 'IMMEDIATE',
+            'optimize_interval': 60 * 60,
+        },
+    }
+}
+
+# Read replicas: aliases of DATABASES that serve the reads of views marked
+# with blogs.replicas.read_from_replica. After a write, a client reads from
+# the primary for REPLICA_PIN_SECONDS. To try it with two SQLite files, copy
+# db.sqlite3 to replica.sqlite3 and add:
+#
+#   DATABASES['replica'] = {
+#       'ENGINE': 'django.db.backends.sqlite3',
+#       'NAME': BASE_DIR / 'replica.sqlite3',
+#       'TEST': {'MIRROR': 'default'},
+#   }
+#   DATABASE_REPLICAS = ['replica']
+DATABASE_ROUTERS = ['blogs.replicas.ReplicaRouter']
+DATABASE_REPLICAS = []
+REPLICA_PIN_SECONDS = 5
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Production cache mode: sessions, API tokens and logged in users are
+# invalidated through the cache, so every worker process must share it, and
+# it must answer faster than the query it saves. Set MEMCACHED_LOCATION in
+# blogs/config.py when memcached does not listen on the default address.
+if not DEBUG:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': getattr(config, 'MEMCACHED_LOCATION', '127.0.0.1:11211'),
+    }
+
+# Production session mode: sessions are read from the cache and only fall
+# back to the database on a miss.
+if not DEBUG:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -143,9 +200,25 @@ STATICFILES_DIRS = [
     BASE_DIR / 'static_dir',
 ]
 
+# Production static mode: collectstatic writes content-hashed copies with
+# gzip and brotli variants next to them, and WhiteNoise serves the hashed
+# names with far-future immutable Cache-Control headers.
+if not DEBUG:
+    STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Outside DEBUG uploads are served by imaging.middleware.MediaFilesMiddleware.
+# Set to False when a front server serves MEDIA_URL from MEDIA_ROOT, it should
+# send `Cache-Control: public, max-age=31536000, immutable` for blobs/ and
+# `no-cache` for the rest, and refuse blobs/tmp/.
+SERVE_MEDIA = True
+
+# Uploads are stored once per content hash and reference counted, run
+# `collect_blobs` periodically to delete the unreferenced ones.
+DEFAULT_FILE_STORAGE = 'imaging.storage.ContentAddressedStorage'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -173,6 +246,12 @@ LOGGING = {
 # Authentication 
 
 AUTH_USER_MODEL = 'account.User'
+AUTHENTICATION_BACKENDS = [
+    'account.backends.CaseInsensitiveModelBackend',
+]
+# Seconds the user of a session is served, with their profile, from the
+# cache. Saves move the user to a new cache version at once.
+IDENTITY_CACHE_TIMEOUT = 300
 
 # Login
 
@@ -188,6 +267,9 @@ EMAIL_PORT = 587
 EMAIL_USE_TLS = True
 EMAIL_HOST_USER = config.EMAIL_HOST_USER
 EMAIL_HOST_PASSWORD = config.EMAIL_HOST_PASSWORD
+# Emails are queued by the views and sent by `send_queued_emails`, which
+# must not hang on an unresponsive server.
+EMAIL_TIMEOUT = 30
 
 # Google Recapcha 
 
@@ -195,16 +277,42 @@ GOOGLE_RECAPTCHA_SITE_KEY = config.GOOGLE_RECAPTCHA_SITE_KEY
 GOOGLE_RECAPTCHA_SECRET_KEY = config.GOOGLE_RECAPTCHA_SECRET_KEY
 
 
+# Live Blog Events
+# Use blog.events.SQLiteEventBackend to share events between several ASGI workers.
+
+BLOG_EVENTS = {
+    'BACKEND': 'blog.events.LocalEventBackend',
+    # 'BACKEND': 'blog.events.SQLiteEventBackend',
+    # 'OPTIONS': {
+    #     'PATH': BASE_DIR / 'events.sqlite3',
+    #     'POLL_INTERVAL': 0.5,
+    # },
+}
+
+
+# Following Timeline
+# Authors above CELEBRITY_FOLLOWERS are merged at read time instead of fanned out.
+
+FOLLOWING_TIMELINE = {
+    'MAX_ENTRIES': 500,
+    'CELEBRITY_FOLLOWERS': 1000,
+    'BACKFILL_ENTRIES': 20,
+}
+
+
 # Rest Framework Settings
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'account.api.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         # 'rest_framework.permissions.IsAuthenticated',
     ]
 }
+# Seconds the user of an API token is remembered. The user itself is served
+# from the identity cache, which drops it on any change.
+TOKEN_AUTH_CACHE_TIMEOUT = 60
 
 # CORS_ALLOWED_ORIGINS = []
 CORS_ALLOW_ALL_ORIGINS = True
@@ -0,0 +1,63 @@
+"""
+SQLite backend tuned for several worker processes writing to one file.
+
+Configured from the OPTIONS of the database settings:
+
+    'pragmas': {name: value} run on every new connection, e.g. WAL journal
+        mode so readers never block the writer, and a busy_timeout so a
+        writer waits for the lock instead of failing.
+    'transaction_mode': 'IMMEDIATE' takes the write lock when a transaction
+        starts. A deferred transaction that reads first cannot wait for it
+        when it later writes, it fails at once with "database is locked".
+    'optimize_interval': seconds between `PRAGMA optimize` runs, made when a
+        connection closes.
+"""
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.sqlite3 import base
+
+
+TRANSACTION_MODES = ('DEFERRED', 'IMMEDIATE', 'EXCLUSIVE')
+
+
+def apply_pragmas(connection, pragmas):
+    for name, value in pragmas.items():
+        connection.execute(f'PRAGMA {name} = {value}')
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # Shared by the connections of a process.
+    last_optimized = time.monotonic()
+
+    def __init__(self, settings_dict, *args, **kwargs):
+        super().__init__(settings_dict, *args, **kwargs)
+        options = self.settings_dict['OPTIONS']
+        self.pragmas = options.get('pragmas', {})
+        self.transaction_mode = options.get('transaction_mode', 'DEFERRED').upper()
+        self.optimize_interval = options.get('optimize_interval')
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ImproperlyConfigured(f'transaction_mode must be one of {", ".join(TRANSACTION_MODES)}.')
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for name in ('pragmas', 'transaction_mode', 'optimize_interval'):
+            params.pop(name, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        apply_pragmas(conn, self.pragmas)
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        self.cursor().execute(f'BEGIN {self.transaction_mode}')
+
+    def _close(self):
+        if self.connection is not None and self.optimize_interval is not None:
+            now = time.monotonic()
+            if now - DatabaseWrapper.last_optimized >= self.optimize_interval:
+                DatabaseWrapper.last_optimized = now
+                with self.wrap_database_errors:
+                    self.connection.execute('PRAGMA optimize')
+        super()._close()
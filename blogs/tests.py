@@ -0,0 +1,277 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from django.utils.http import urlsafe_base64_encode
+
+from account.identity import load_identity
+from account.models import User
+from accountProfile.models import Profile
+from blog.models import Blog
+from blogs.pagination import CursorPaginator, InvalidCursor
+from blogs.replicas import PIN_COOKIE, ReplicaRoutingMiddleware, read_from_replica, unpinned_writes
+from blogs.sqlite3.base import DatabaseWrapper
+
+
+@read_from_replica
+def read_view(request):
+    return HttpResponse(router.db_for_read(Blog))
+
+
+@read_from_replica
+def write_then_read_view(request):
+    router.db_for_write(Blog)
+    return HttpResponse(router.db_for_read(Blog))
+
+
+@read_from_replica
+def bookkeeping_view(request):
+    router.db_for_write(Session)
+    with unpinned_writes():
+        router.db_for_write(User)
+    return HttpResponse(router.db_for_read(Blog))
+
+
+@read_from_replica
+def session_view(request):
+    return HttpResponse(router.db_for_read(Session))
+
+
+@read_from_replica
+def follower_count_view(request):
+    return HttpResponse(load_identity(request.user_id).profile.follower_count)
+
+
+def primary_view(request):
+    return HttpResponse(router.db_for_read(Blog))
+
+
+def run_view(view, method='get', cookies=None, **attrs):
+    request = getattr(RequestFactory(), method)('/')
+    request.COOKIES.update(cookies or {})
+    request.__dict__.update(attrs)
+
+    def get_response(request):
+        middleware.process_view(request, view, (), {})
+        return view(request)
+
+    middleware = ReplicaRoutingMiddleware(get_response)
+    return middleware(request)
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(SimpleTestCase):
+
+    def run_view(self, *args, **kwargs):
+        return run_view(*args, **kwargs)
+
+    def test_marked_reads_go_to_replica(self):
+        response = self.run_view(read_view)
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_other_reads_go_to_primary(self):
+        self.assertEqual(self.run_view(primary_view).content, b'default')
+        self.assertEqual(self.run_view(read_view, method='post').content, b'default')
+        self.assertEqual(self.run_view(session_view).content, b'default')
+        self.assertEqual(router.db_for_read(Blog), 'default')
+
+    def test_write_pins_client_to_primary(self):
+        response = self.run_view(write_then_read_view)
+        self.assertEqual(response.content, b'default')
+        self.assertIn(PIN_COOKIE, response.cookies)
+
+        pinned = self.run_view(read_view, cookies={PIN_COOKIE: '1'})
+        self.assertEqual(pinned.content, b'default')
+
+    def test_session_and_unpinned_writes_do_not_pin(self):
+        response = self.run_view(bookkeeping_view)
+        self.assertEqual(response.content, b'replica')
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+    def test_api_list_views_are_marked(self):
+        self.assertTrue(getattr(resolve(reverse('blog_api:api-blog-list')).func, 'read_from_replica', False))
+        detail = resolve(reverse('blog_api:api-blog-detail', args=['00000000-0000-0000-0000-000000000000'])).func
+        self.assertFalse(getattr(detail, 'read_from_replica', False))
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaIdentityTests(TransactionTestCase):
+    """
+    Runs against a second SQLite database standing for a lagging replica,
+    added once the default one is set up. Outside TestCase's transaction, as
+    reads in an atomic block always go to the primary.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.replica_directory = tempfile.mkdtemp()
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.replica_directory, 'replica.sqlite3'),
+        }
+        with connections['replica'].schema_editor() as editor:
+            editor.create_model(User)
+            editor.create_model(Profile)
+
+    @classmethod
+    def tearDownClass(cls):
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        shutil.rmtree(cls.replica_directory)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+
+    def test_identity_is_loaded_from_primary(self):
+        user = User.objects.create_user('followed@example.com', 'followed', 'password')
+        follower = User.objects.create_user('follower@example.com', 'follower', 'password')
+        User.objects.using('replica').bulk_create([User.objects.get(pk=user.pk)])
+        Profile.objects.using('replica').bulk_create([Profile.objects.get(user=user)])
+
+        # The replica has not seen the follow yet.
+        follower.profile.follow(user)
+        self.assertEqual(Profile.objects.using('replica').get(user=user).follower_count, 0)
+
+        self.assertEqual(run_view(follower_count_view, user_id=user.pk).content, b'1')
+        # Neither is a stale copy left in the cache for the next request.
+        self.assertEqual(run_view(follower_count_view, user_id=user.pk).content, b'1')
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaLoginTests(TestCase):
+
+    def test_login_does_not_pin(self):
+        user = User.objects.create_user('reader@example.com', 'reader', 'password')
+        User.objects.filter(pk=user.pk).update(is_active=True)
+
+        def login_view(request):
+            self.client.force_login(User.objects.get(pk=user.pk))
+            return HttpResponse()
+
+        response = run_view(login_view)
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+        self.assertIsNotNone(User.objects.get(pk=user.pk).last_login)
+
+
+class CursorPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user('writer@example.com', 'writer', 'password')
+        published = timezone.now()
+        # Two pairs of blogs published at the same time, one later blog and a draft.
+        dates = [published, published, published - timedelta(days=1), published - timedelta(days=1), published + timedelta(days=1)]
+        for i, date in enumerate(dates):
+            Blog.objects.create(user=user, heading=f'Blog {i}', status='1', date_published=date)
+        Blog.objects.create(user=user, heading='Draft')
+        cls.ordered = list(Blog.objects.filter(date_published__isnull=False).order_by('-date_published', '-pk'))
+
+    def setUp(self):
+        self.paginator = CursorPaginator(Blog.objects.all(), 2)
+
+    def walk(self):
+        pages = [self.paginator.page()]
+        while pages[-1].has_next():
+            pages.append(self.paginator.page(pages[-1].next_cursor))
+        return pages
+
+    def test_pages_follow_date_then_pk(self):
+        pages = self.walk()
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual([blog for page in pages for blog in page], self.ordered)
+        self.assertFalse(pages[0].has_previous())
+        self.assertTrue(pages[-1].has_previous())
+
+    def test_previous_cursor_returns_the_same_page(self):
+        pages = self.walk()
+        for previous, page in zip(pages, pages[1:]):
+            self.assertEqual(list(self.paginator.page(page.previous_cursor)), list(previous))
+
+    def test_cursor_past_the_last_row_leads_back_to_the_first_page(self):
+        cursor = self.paginator.encode_cursor('next', self.paginator.position(self.ordered[-1]))
+        page = self.paginator.page(cursor)
+        self.assertEqual(list(page), [])
+        self.assertFalse(page.has_next())
+        self.assertTrue(page.has_previous())
+        self.assertEqual(list(self.paginator.page(page.previous_cursor)), self.ordered[:2])
+
+    def test_cursor_round_trip(self):
+        blog = self.ordered[1]
+        cursor = self.paginator.encode_cursor('next', self.paginator.position(blog))
+        self.assertEqual(self.paginator.decode_cursor(cursor), ('next', blog.date_published, blog.pk))
+
+    def test_tampered_cursor_falls_back_to_the_first_page(self):
+        key = self.ordered[0].date_published.isoformat()
+        cursors = [
+            'not-a-cursor',
+            urlsafe_base64_encode(b'{"next": 1}'),
+            urlsafe_base64_encode(json.dumps(['sideways', key, str(self.ordered[0].pk)]).encode()),
+            urlsafe_base64_encode(json.dumps(['next', 'yesterday', str(self.ordered[0].pk)]).encode()),
+            urlsafe_base64_encode(json.dumps(['next', key, 'not-a-uuid']).encode()),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursor):
+                    self.paginator.decode_cursor(cursor)
+                self.assertEqual(list(self.paginator.page(cursor)), self.ordered[:2])
+
+
+class SQLiteBackendTests(TransactionTestCase):
+    """
+    The default database runs on blogs.sqlite3 with the OPTIONS of the
+    settings. Outside TestCase's transaction, so atomic blocks really begin.
+    """
+
+    def get_wrapper(self, name=':memory:', **options):
+        settings_dict = {**connection.settings_dict, 'NAME': name, 'OPTIONS': options}
+        return DatabaseWrapper(settings_dict, alias='tuned')
+
+    def test_pragmas_are_applied_on_new_connections(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = self.get_wrapper(
+                os.path.join(directory, 'tuned.sqlite3'),
+                pragmas={'journal_mode': 'wal', 'busy_timeout': 1234},
+            )
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 1234)
+            finally:
+                wrapper.close()
+
+    def test_atomic_begins_immediate(self):
+        with CaptureQueriesContext(connection) as queries:
+            with transaction.atomic():
+                Blog.objects.exists()
+        self.assertEqual(queries[0]['sql'], 'BEGIN IMMEDIATE')
+
+    def test_unknown_transaction_mode(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.get_wrapper(transaction_mode='LAZY')
+
+    def test_custom_options_are_not_passed_to_sqlite(self):
+        wrapper = self.get_wrapper(
+            pragmas={'busy_timeout': 1}, transaction_mode='immediate', optimize_interval=1, timeout=3,
+        )
+        self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+        params = wrapper.get_connection_params()
+        self.assertEqual(params['timeout'], 3)
+        for name in ('pragmas', 'transaction_mode', 'optimize_interval'):
+            self.assertNotIn(name, params)
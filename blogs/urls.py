@@ -1,10 +1,13 @@
+import re
+
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 
 from django.conf import settings
 from django.conf.urls.static import static
 
 from blogs.views import home
+from imaging.views import serve_media
 
 
 urlpatterns = [
@@ -14,14 +17,19 @@ urlpatterns = [
     
     path('', include('account.urls', namespace='account')),
     path('api/', include('account.api.urls', namespace='account_api')),
+    path('api/', include('blog.api.urls', namespace='blog_api')),
 
     path('', include('accountProfile.urls', namespace='accountProfile')),
 
     path('', include('blog.urls', namespace='blog')),
+
+    path('', include('search.urls', namespace='search')),
 ]
 
 handler404 = 'blogs.views.page_not_found_view'
 
 if settings.DEBUG:
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += [
+        re_path(r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')), serve_media),
+    ]
@@ -1,24 +1,22 @@
 from django.shortcuts import render
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger 
 
-from blog.models import Blog
+from blog.models import Blog, attach_feed_comments
+from blogs.pagination import CursorPaginator
+from blogs.replicas import read_from_replica
+from accountProfile.viewer import ViewerState
 
+@read_from_replica
 def home(request, *args, **kwargs):
     context = {}
 
-    blog_objects = Blog.objects.filter(status='1')
+    blog_objects = Blog.objects.for_feed().filter(status='1')
 
-    paginator = Paginator(blog_objects, 5)
-    page = request.GET.get('page')
-
-    try:
-        blogs = paginator.page(page)
-    except PageNotAnInteger:
-        blogs = paginator.page(1)
-    except EmptyPage:
-        blogs = paginator.page(paginator.num_pages)
+    paginator = CursorPaginator(blog_objects, 5)
+    blogs = paginator.page(request.GET.get('cursor'))
+    attach_feed_comments(blogs)
 
     context ['blogs'] = blogs
+    context['viewer'] = ViewerState(request.user, blogs=blogs)
     return render(request, 'home.html', context)
 
 def page_not_found_view(request, *args, **kwargs):
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from imaging.storage import collect_blobs
+
+
+class Command(BaseCommand):
+    help = 'Delete stored blobs that no row has referenced for the grace period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Hours a blob must stay unreferenced before it is deleted.',
+        )
+
+    def handle(self, *args, **options):
+        collected = collect_blobs(grace=timedelta(hours=options['grace_hours']))
+        self.stdout.write(self.style.SUCCESS(f'Collected {collected} blobs.'))
@@ -0,0 +1,64 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from imaging.models import ImageVariantJob
+from imaging.variants import enqueue_variants, get_variant_models, needs_variants, process_job
+
+
+class Command(BaseCommand):
+    help = 'Generate the resized WebP and JPEG variants of uploaded images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling for new variant jobs instead of exiting when the queue is empty.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2,
+            help='Seconds to sleep between polls in --loop mode.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20,
+            help='Number of variant jobs claimed per poll.',
+        )
+        parser.add_argument(
+            '--backfill',
+            action='store_true',
+            help='First queue every stored image whose variants are missing or outdated.',
+        )
+
+    def handle(self, *args, **options):
+        if options['backfill']:
+            self.backfill()
+
+        while True:
+            processed = self.process_batch(options['batch_size'])
+            if processed:
+                self.stdout.write(f'Generated variants for {processed} images.')
+            elif not options['loop']:
+                break
+            else:
+                time.sleep(options['interval'])
+
+    def backfill(self):
+        queued = 0
+        for model in get_variant_models():
+            for field_name in model.IMAGE_VARIANTS:
+                fields = ['pk', field_name, f'{field_name}_variants']
+                for instance in model._default_manager.only(*fields).iterator():
+                    if needs_variants(instance, field_name):
+                        enqueue_variants(instance, field_name)
+                        queued += 1
+        self.stdout.write(f'Queued {queued} images.')
+
+    def process_batch(self, batch_size):
+        jobs = list(ImageVariantJob.objects.select_related('content_type')[:batch_size])
+        for job in jobs:
+            process_job(job)
+        return len(jobs)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from imaging.variants import get_variant_models, strip_metadata
+
+
+class Command(BaseCommand):
+    help = (
+        'Store again, without their EXIF, GPS and other metadata, the image originals '
+        'uploaded before metadata was stripped on upload.'
+    )
+
+    def handle(self, *args, **options):
+        stripped = 0
+        for model in get_variant_models():
+            for field_name in model.IMAGE_VARIANTS:
+                default = model._meta.get_field(field_name).get_default()
+                for instance in model._default_manager.only('pk', field_name).iterator():
+                    field_file = getattr(instance, field_name)
+                    if not field_file or field_file.name == default:
+                        continue
+                    try:
+                        with field_file.open('rb'):
+                            clean = strip_metadata(field_file)
+                    except OSError:
+                        continue
+                    if clean is None:
+                        continue
+
+                    # Saved like a new upload: blob references move and variants are queued.
+                    clean.name = field_file.name
+                    setattr(instance, field_name, clean)
+                    instance.save(update_fields=[
+                        field_name, f'{field_name}_variants', f'{field_name}_width', f'{field_name}_height',
+                    ])
+                    stripped += 1
+        self.stdout.write(self.style.SUCCESS(f'Stripped the metadata of {stripped} images.'))
@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from whitenoise.base import WhiteNoise
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from imaging.storage import BLOB_DIRECTORY, is_blob_name
+from imaging.views import BLOB_MAX_AGE
+
+
+class MediaFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    Serve uploads from MEDIA_ROOT ahead of the URL resolver, with blobs
+    cached forever and other files revalidated on every use.
+
+    Uploads keep arriving while the process runs, so files are looked up on
+    disk per request rather than listed at startup. Only used with
+    SERVE_MEDIA, a front server taking over MEDIA_URL is faster still.
+    """
+
+    def __init__(self, get_response=None, settings=settings):
+        if settings.DEBUG or not settings.SERVE_MEDIA:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        WhiteNoise.__init__(self, None, autorefresh=True, allow_all_origins=False)
+        self.prefix = settings.MEDIA_URL
+        self.add_files(settings.MEDIA_ROOT, prefix=self.prefix)
+
+    def find_file(self, url):
+        if url.startswith(f'{self.prefix}{BLOB_DIRECTORY}/tmp/'):
+            return None
+        return super().find_file(url)
+
+    def add_cache_headers(self, headers, path, url):
+        if is_blob_name(url[len(self.prefix):]):
+            headers['Cache-Control'] = f'public, max-age={BLOB_MAX_AGE}, immutable'
+        else:
+            headers['Cache-Control'] = 'no-cache'
@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-18 17:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageVariantJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.UUIDField(verbose_name='Object ID')),
+                ('field_name', models.CharField(max_length=64, verbose_name='Field Name')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.contenttype')),
+            ],
+            options={
+                'verbose_name': 'Image Variant Job',
+                'verbose_name_plural': 'Image Variant Jobs',
+                'ordering': ['date_created'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='imagevariantjob',
+            constraint=models.UniqueConstraint(fields=('content_type', 'object_id', 'field_name'), name='unique_image_variant_job'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 17:27
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imaging', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Name')),
+                ('size', models.PositiveBigIntegerField(verbose_name='Size')),
+                ('ref_count', models.PositiveIntegerField(default=0, verbose_name='Reference Count')),
+                ('date_created', models.DateTimeField(auto_now_add=True, verbose_name='Date Created')),
+                ('date_updated', models.DateTimeField(auto_now=True, verbose_name='Last Updated')),
+            ],
+            options={
+                'verbose_name': 'Blob',
+                'verbose_name_plural': 'Blobs',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='blob',
+            index=models.Index(fields=['ref_count', 'date_updated'], name='blob_unreferenced_idx'),
+        ),
+    ]
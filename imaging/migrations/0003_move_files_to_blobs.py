@@ -0,0 +1,134 @@
+import hashlib
+import os
+import posixpath
+import shutil
+import tempfile
+from functools import partial
+
+from django.conf import settings
+from django.db import migrations, transaction
+from django.db.models import F
+
+
+# (app label, model name, image field) of the uploads stored before blobs.
+IMAGE_FIELDS = (
+    ('account', 'User', 'display_pic'),
+    ('blog', 'Post', 'image'),
+)
+VARIANT_FORMATS = ('webp', 'jpeg')
+
+# Frozen copy of the naming in imaging.storage at the time of this migration.
+BLOB_DIRECTORY = 'blobs'
+
+
+def get_blob_name(digest, extension):
+    return posixpath.join(BLOB_DIRECTORY, digest[:2], digest[2:4], f'{digest}{extension}')
+
+
+def get_path(name):
+    return os.path.join(settings.MEDIA_ROOT, *name.split('/'))
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remove_legacy_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+    media_root = os.path.abspath(settings.MEDIA_ROOT)
+    directory = os.path.dirname(path)
+    while directory.startswith(media_root + os.sep):
+        try:
+            os.rmdir(directory)
+        except OSError:
+            break
+        directory = os.path.dirname(directory)
+
+
+def copy_file(path, target):
+    # Through a temporary file, so an interrupted copy never lands under a blob name.
+    temp_directory = get_path(f'{BLOB_DIRECTORY}/tmp')
+    os.makedirs(temp_directory, exist_ok=True)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=temp_directory)
+    try:
+        with os.fdopen(fd, 'wb') as temp_file, open(path, 'rb') as file:
+            shutil.copyfileobj(file, temp_file)
+        os.replace(temp_path, target)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def store_as_blob(Blob, name, moved):
+    """
+    Copy a legacy file to its blob and return the blob name.
+
+    Files are only copied, and a blob already on disk is reused, so a failed
+    run that rolled back leaves nothing a second run cannot pick up. The
+    original is removed once the migration commits.
+    """
+    if name not in moved:
+        path = get_path(name)
+        if not os.path.isfile(path):
+            return name
+        blob_name = get_blob_name(hash_file(path), posixpath.splitext(name)[1].lower())
+        blob_path = get_path(blob_name)
+        if not os.path.exists(blob_path):
+            copy_file(path, blob_path)
+        Blob.objects.get_or_create(name=blob_name, defaults={'size': os.path.getsize(path)})
+        transaction.on_commit(partial(remove_legacy_file, path))
+        moved[name] = blob_name
+    return moved[name]
+
+
+def move_files_to_blobs(apps, schema_editor):
+    Blob = apps.get_model('imaging', 'Blob')
+    moved = {}
+    for app_label, model_name, field_name in IMAGE_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        default = model._meta.get_field(field_name).get_default()
+        variants_field = f'{field_name}_variants'
+
+        for row in model.objects.only('pk', field_name, variants_field).iterator():
+            source = getattr(row, field_name).name
+            if not source or source == default or source.startswith(f'{BLOB_DIRECTORY}/'):
+                continue
+
+            state = getattr(row, variants_field) or {}
+            names = {source} | {
+                entry[key] for entry in state.get('files', {}).values() for key in VARIANT_FORMATS if key in entry
+            }
+            renamed = {
+                name: name if name.startswith(f'{BLOB_DIRECTORY}/') else store_as_blob(Blob, name, moved)
+                for name in names
+            }
+            Blob.objects.filter(name__in={
+                renamed[name] for name in names if renamed[name] != name
+            }).update(ref_count=F('ref_count') + 1)
+
+            for entry in state.get('files', {}).values():
+                for key in VARIANT_FORMATS:
+                    if key in entry:
+                        entry[key] = renamed[entry[key]]
+            if state.get('source') == source:
+                state['source'] = renamed[source]
+            model.objects.filter(pk=row.pk).update(**{field_name: renamed[source], variants_field: state})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('imaging', '0002_blob'),
+        ('account', '0004_image_variants'),
+        ('blog', '0017_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(move_files_to_blobs, migrations.RunPython.noop),
+    ]
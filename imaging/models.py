@@ -0,0 +1,78 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+import uuid
+
+
+class ImageVariantJob(models.Model):
+    """
+    An uploaded image waiting for its resized variants, processed by the
+    `generate_image_variants` command off the request path.
+    """
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    object_id = models.UUIDField(
+        verbose_name=_('Object ID'),
+    )
+    field_name = models.CharField(
+        verbose_name=_('Field Name'),
+        max_length=64,
+    )
+    date_created = models.DateTimeField(
+        verbose_name=_('Date Created'),
+        auto_now_add=True,
+    )
+
+    class Meta:
+        verbose_name = _('Image Variant Job')
+        verbose_name_plural = _('Image Variant Jobs')
+        ordering = ['date_created']
+        constraints = [
+            models.UniqueConstraint(fields=['content_type', 'object_id', 'field_name'], name='unique_image_variant_job'),
+        ]
+
+
+class Blob(models.Model):
+    """
+    A stored file addressed by the SHA-256 of its content, shared by every
+    field that references the same bytes and collected once none does.
+    """
+    id = models.UUIDField(
+        verbose_name=_('ID'),
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    name = models.CharField(
+        verbose_name=_('Name'),
+        max_length=255,
+        unique=True,
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name=_('Size'),
+    )
+    ref_count = models.PositiveIntegerField(
+        verbose_name=_('Reference Count'),
+        default=0,
+    )
+    date_created = models.DateTimeField(
+        verbose_name=_('Date Created'),
+        auto_now_add=True,
+    )
+    date_updated = models.DateTimeField(
+        verbose_name=_('Last Updated'),
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return self.name
+
+    class Meta:
+        verbose_name = _('Blob')
+        verbose_name_plural = _('Blobs')
+        indexes = [
+            models.Index(fields=['ref_count', 'date_updated'], name='blob_unreferenced_idx'),
+        ]
@@ -0,0 +1,110 @@
+from django.apps import apps
+from django.db.models import FileField
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+
+from imaging.storage import ContentAddressedStorage, delete_legacy_files, release, retain
+from imaging.variants import get_variant_files, get_variant_models, needs_variants, enqueue_variants, strip_metadata
+
+
+def get_blob_fields(model):
+    return [
+        field for field in model._meta.concrete_fields
+        if isinstance(field, FileField) and isinstance(field.storage, ContentAddressedStorage)
+    ]
+
+
+def get_reference_fields(model):
+    fields = [field.attname for field in get_blob_fields(model)]
+    fields += [f'{field_name}_variants' for field_name in getattr(model, 'IMAGE_VARIANTS', {})]
+    return fields
+
+
+def get_stored_names(instance):
+    """
+    The files a row references, blobs and files stored under their upload
+    name before blobs, but not the shared field defaults
+    """
+    names = set()
+    for field in get_blob_fields(type(instance)):
+        name = getattr(instance, field.attname).name
+        if name != field.get_default():
+            names.add(name)
+    for field_name in getattr(instance, 'IMAGE_VARIANTS', {}):
+        names.update(get_variant_files(instance, field_name))
+    return {name for name in names if name}
+
+
+def drop_references(names):
+    release(names)
+    delete_legacy_files(names)
+
+
+def references_pre_save(sender, instance, update_fields=None, **kwargs):
+    instance._previous_names = None
+    fields = get_reference_fields(sender)
+    if update_fields is not None and not set(update_fields) & set(fields):
+        return
+
+    previous = None
+    if not instance._state.adding:
+        previous = sender._default_manager.filter(pk=instance.pk).only(*fields).first()
+    instance._previous_names = get_stored_names(previous) if previous else set()
+
+
+def references_post_save(sender, instance, **kwargs):
+    """
+    Move blob references from the files a row used to hold to the ones it
+    holds now
+    """
+    previous = getattr(instance, '_previous_names', None)
+    if previous is None:
+        return
+    current = get_stored_names(instance)
+    retain(current - previous)
+    drop_references(previous - current)
+    instance._previous_names = None
+
+
+def references_pre_delete(sender, instance, **kwargs):
+    # Variants are recorded with queryset updates, so read what the row holds.
+    stored = sender._default_manager.filter(pk=instance.pk).only(*get_reference_fields(sender)).first()
+    instance._previous_names = get_stored_names(stored or instance)
+
+
+def references_post_delete(sender, instance, **kwargs):
+    drop_references(instance._previous_names)
+
+
+def image_pre_save(sender, instance, **kwargs):
+    """
+    Store a new upload without its metadata, and forget the variants of the
+    image it replaces, they are regenerated from the new upload
+    """
+    for field_name in sender.IMAGE_VARIANTS:
+        field_file = getattr(instance, field_name)
+        if field_file and not field_file._committed:
+            stripped = strip_metadata(field_file.file)
+            if stripped is not None:
+                stripped.name = field_file.name
+                setattr(instance, field_name, stripped)
+            setattr(instance, f'{field_name}_variants', {})
+            setattr(instance, f'{field_name}_width', None)
+            setattr(instance, f'{field_name}_height', None)
+
+
+def image_post_save(sender, instance, **kwargs):
+    for field_name in sender.IMAGE_VARIANTS:
+        if needs_variants(instance, field_name):
+            enqueue_variants(instance, field_name)
+
+
+for model in get_variant_models():
+    pre_save.connect(image_pre_save, sender=model)
+    post_save.connect(image_post_save, sender=model)
+
+for model in apps.get_models():
+    if get_blob_fields(model):
+        pre_save.connect(references_pre_save, sender=model)
+        post_save.connect(references_post_save, sender=model)
+        pre_delete.connect(references_pre_delete, sender=model)
+        post_delete.connect(references_post_delete, sender=model)
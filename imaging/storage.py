@@ -0,0 +1,122 @@
+import hashlib
+import os
+import posixpath
+import tempfile
+from datetime import timedelta
+from functools import partial
+
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from imaging.models import Blob
+
+
+BLOB_DIRECTORY = 'blobs'
+
+
+def get_blob_name(digest, extension):
+    return posixpath.join(BLOB_DIRECTORY, digest[:2], digest[2:4], f'{digest}{extension}')
+
+
+def is_blob_name(name):
+    return bool(name) and name.startswith(f'{BLOB_DIRECTORY}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    File system storage keeping every file once, under the SHA-256 of its
+    content in sharded directories, e.g. blobs/ab/cd/abcd...ef.jpg.
+
+    Uploads are hashed while they are streamed to a temporary file, which is
+    then renamed into place, or dropped when the blob already exists. The
+    name asked for only contributes its extension. Files stored under other
+    names before this storage was installed are still served as they are.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        temp_directory = self.path(posixpath.join(BLOB_DIRECTORY, 'tmp'))
+        os.makedirs(temp_directory, exist_ok=True)
+
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=temp_directory)
+        try:
+            with os.fdopen(fd, 'wb') as temp_file:
+                for chunk in content.chunks():
+                    digest.update(chunk)
+                    temp_file.write(chunk)
+                    size += len(chunk)
+
+            blob_name = get_blob_name(digest.hexdigest(), posixpath.splitext(name)[1].lower())
+            # The row is locked before the file is checked, so a concurrent
+            # collection of the same blob either finishes first or sees it touched.
+            with transaction.atomic():
+                touch_blob(blob_name, size)
+                path = self.path(blob_name)
+                if not os.path.exists(path):
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(temp_path, path)
+                    if self.file_permissions_mode is not None:
+                        os.chmod(path, self.file_permissions_mode)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+        return blob_name
+
+
+def touch_blob(name, size):
+    if Blob.objects.filter(name=name).update(date_updated=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            Blob.objects.create(name=name, size=size)
+    except IntegrityError:
+        Blob.objects.filter(name=name).update(date_updated=timezone.now())
+
+
+def retain(names):
+    names = {name for name in names if is_blob_name(name)}
+    if names:
+        Blob.objects.filter(name__in=names).update(ref_count=F('ref_count') + 1, date_updated=timezone.now())
+
+
+def release(names):
+    names = {name for name in names if is_blob_name(name)}
+    if names:
+        Blob.objects.filter(name__in=names, ref_count__gt=0).update(
+            ref_count=F('ref_count') - 1, date_updated=timezone.now()
+        )
+
+
+def delete_legacy_files(names, storage=None):
+    """
+    Delete files stored under their upload name before blobs once the
+    transaction dropping their reference commits. Each belonged to one row.
+    """
+    storage = storage or default_storage
+    for name in {name for name in names if name and not is_blob_name(name)}:
+        transaction.on_commit(partial(storage.delete, name))
+
+
+def collect_blobs(grace=timedelta(hours=24), storage=None):
+    """
+    Delete blobs nobody has referenced for the grace period.
+
+    The grace period covers the gap between an upload being stored and the
+    row that references it being saved.
+    """
+    storage = storage or default_storage
+    cutoff = timezone.now() - grace
+    collected = 0
+    unreferenced = Blob.objects.filter(ref_count=0, date_updated__lt=cutoff)
+    for name in unreferenced.values_list('name', flat=True).iterator():
+        with transaction.atomic():
+            if unreferenced.filter(name=name).delete()[0]:
+                storage.delete(name)
+                collected += 1
+    return collected
@@ -0,0 +1,319 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+from io import BytesIO, StringIO
+
+from django.apps import apps
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.template import Context, Template
+from django.utils import timezone
+from PIL import Image
+
+from account.models import User
+from imaging.models import Blob, ImageVariantJob
+from imaging.storage import collect_blobs
+from imaging.variants import generate_variants
+
+
+def make_image(size=(40, 20), pillow_format='JPEG', orientation=None, gps=False):
+    image = Image.new('RGB', size, 'red')
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    if gps:
+        exif[0x8825] = {1: 'N', 2: (52.0, 22.0, 10.0)}
+    buffer = BytesIO()
+    image.save(buffer, format=pillow_format, **({'exif': exif.tobytes()} if exif else {}))
+    return buffer.getvalue()
+
+
+def open_image(field_file):
+    with field_file.open('rb'):
+        image = Image.open(BytesIO(field_file.read()))
+    image.load()
+    return image
+
+
+class MediaTestCase(TestCase):
+    """
+    Runs with MEDIA_ROOT in a temporary directory
+    """
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def write_media(self, name, content=b'content'):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def exists(self, name):
+        return os.path.exists(os.path.join(self.media_root, name))
+
+
+class MediaFilesMiddlewareTests(MediaTestCase):
+
+    def test_blobs_are_immutable(self):
+        self.write_media('blobs/ab/cd/abcd.jpg')
+        response = self.client.get('/media/blobs/ab/cd/abcd.jpg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'content')
+        self.assertEqual(response['Cache-Control'], 'public, max-age=31536000, immutable')
+
+    def test_other_files_are_revalidated(self):
+        self.write_media('default/display_pic.png')
+        response = self.client.get('/media/default/display_pic.png')
+        self.assertEqual(response['Cache-Control'], 'no-cache')
+
+        not_modified = self.client.get(
+            '/media/default/display_pic.png', HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_uploads_in_progress_are_not_served(self):
+        self.write_media('blobs/tmp/upload')
+        self.assertEqual(self.client.get('/media/blobs/tmp/upload').status_code, 404)
+
+    @override_settings(SERVE_MEDIA=False)
+    def test_front_server_takes_over(self):
+        self.write_media('blobs/ab/cd/abcd.jpg')
+        self.assertEqual(self.client.get('/media/blobs/ab/cd/abcd.jpg').status_code, 404)
+
+
+class ContentAddressedStorageTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = [
+            User.objects.create_user(f'storage{i}@example.com', f'storage{i}', 'password')
+            for i in range(2)
+        ]
+
+    def upload(self, user, content, name='me.png'):
+        with self.captureOnCommitCallbacks(execute=True):
+            user.display_pic = SimpleUploadedFile(name, content)
+            user.save()
+        return user.display_pic.name
+
+    def ref_count(self, name):
+        return Blob.objects.get(name=name).ref_count
+
+    def test_identical_uploads_share_one_blob(self):
+        first = self.upload(self.users[0], b'picture')
+        second = self.upload(self.users[1], b'picture', name='other.PNG')
+
+        self.assertEqual(first, second)
+        self.assertRegex(first, r'^blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.png$')
+        self.assertEqual(self.ref_count(first), 2)
+        self.assertEqual(os.listdir(os.path.dirname(os.path.join(self.media_root, first))), [os.path.basename(first)])
+
+    def test_references_follow_replace_and_delete(self):
+        old = self.upload(self.users[0], b'old picture')
+        self.upload(self.users[1], b'old picture')
+        new = self.upload(self.users[0], b'new picture')
+        self.assertEqual(self.ref_count(old), 1)
+        self.assertEqual(self.ref_count(new), 1)
+
+        # Saves that do not touch the picture leave the counts alone.
+        self.users[0].name = 'Renamed'
+        self.users[0].save()
+        self.assertEqual(self.ref_count(new), 1)
+
+        self.users[0].delete()
+        self.users[1].delete()
+        self.assertEqual(self.ref_count(old), 0)
+        self.assertEqual(self.ref_count(new), 0)
+
+    def test_unreferenced_blobs_are_collected_after_the_grace_period(self):
+        kept = self.upload(self.users[0], b'kept')
+        recent = self.upload(self.users[1], b'recent')
+        stale = self.upload(self.users[1], b'stale')
+        self.users[1].delete()
+        Blob.objects.filter(name=stale).update(date_updated=timezone.now() - timedelta(days=2))
+
+        self.assertEqual(collect_blobs(grace=timedelta(days=1)), 1)
+        self.assertFalse(Blob.objects.filter(name=stale).exists())
+        self.assertFalse(self.exists(stale))
+        self.assertTrue(self.exists(recent))
+        self.assertTrue(self.exists(kept))
+
+        # Uploading an unreferenced blob again touches it, so it is kept.
+        Blob.objects.filter(name=recent).update(date_updated=timezone.now() - timedelta(days=2))
+        self.upload(self.users[0], b'recent')
+        self.assertEqual(collect_blobs(grace=timedelta(days=1)), 0)
+        self.assertTrue(self.exists(recent))
+
+    def test_legacy_files_are_deleted_with_their_last_reference(self):
+        user = self.users[0]
+        legacy = f'display_pics/{user.pk}/display_pic.png'
+        self.write_media(legacy)
+        self.write_media('default/dummy_image.png')
+        User.objects.filter(pk=user.pk).update(display_pic=legacy)
+        user.refresh_from_db()
+
+        self.upload(user, b'picture')
+        self.assertFalse(self.exists(legacy))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.users[1].delete()
+        self.assertTrue(self.exists('default/dummy_image.png'))
+
+
+class MoveFilesToBlobsMigrationTests(MediaTestCase):
+    migration = import_module('imaging.migrations.0003_move_files_to_blobs')
+
+    def setUp(self):
+        super().setUp()
+        self.users = [
+            User.objects.create_user(f'legacy{i}@example.com', f'legacy{i}', 'password')
+            for i in range(3)
+        ]
+        # Two users uploaded the same picture, the third one's file is gone.
+        for user in self.users:
+            source = f'display_pics/{user.pk}/display_pic.png'
+            variants = {
+                'source': source,
+                'files': {'thumbnail': {
+                    'webp': f'display_pics/{user.pk}/variants/display_pic-thumbnail.webp',
+                    'jpeg': f'display_pics/{user.pk}/variants/display_pic-thumbnail.jpg',
+                }},
+            }
+            User.objects.filter(pk=user.pk).update(display_pic=source, display_pic_variants=variants)
+        for user in self.users[:2]:
+            self.write_media(f'display_pics/{user.pk}/display_pic.png', b'picture')
+            self.write_media(f'display_pics/{user.pk}/variants/display_pic-thumbnail.webp', f'webp {user.pk}'.encode())
+            self.write_media(f'display_pics/{user.pk}/variants/display_pic-thumbnail.jpg', f'jpeg {user.pk}'.encode())
+
+    def migrate(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.migration.move_files_to_blobs(apps, None)
+
+    def test_files_move_to_shared_blobs(self):
+        self.migrate()
+
+        first, second, missing = [User.objects.get(pk=user.pk) for user in self.users]
+        self.assertTrue(first.display_pic.name.startswith('blobs/'))
+        self.assertEqual(first.display_pic.name, second.display_pic.name)
+        self.assertEqual(Blob.objects.get(name=first.display_pic.name).ref_count, 2)
+        self.assertEqual(Blob.objects.count(), 5)
+        self.assertTrue(self.exists(first.display_pic.name))
+
+        variants = first.display_pic_variants
+        self.assertEqual(variants['source'], first.display_pic.name)
+        for name in variants['files']['thumbnail'].values():
+            self.assertTrue(name.startswith('blobs/'))
+            self.assertEqual(Blob.objects.get(name=name).ref_count, 1)
+
+        self.assertFalse(self.exists(f'display_pics/{first.pk}'))
+        self.assertEqual(missing.display_pic.name, f'display_pics/{missing.pk}/display_pic.png')
+
+        # A second run finds nothing left to move.
+        self.migrate()
+        self.assertEqual(Blob.objects.get(name=first.display_pic.name).ref_count, 2)
+
+    def test_failed_run_loses_nothing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.migration.move_files_to_blobs(apps, None)
+            raise RuntimeError()
+
+        first = User.objects.get(pk=self.users[0].pk)
+        self.assertEqual(first.display_pic.name, f'display_pics/{first.pk}/display_pic.png')
+        self.assertTrue(self.exists(first.display_pic.name))
+        self.assertFalse(Blob.objects.exists())
+
+        # The copies left behind are reused.
+        self.migrate()
+        first.refresh_from_db()
+        self.assertEqual(Blob.objects.get(name=first.display_pic.name).ref_count, 2)
+        self.assertFalse(os.listdir(os.path.join(self.media_root, 'blobs', 'tmp')))
+
+
+class ImageVariantTests(MediaTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user('variants@example.com', 'variants', 'password')
+
+    def upload(self, content, name='me.jpg'):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.display_pic = SimpleUploadedFile(name, content)
+            self.user.save()
+
+    def generate(self):
+        call_command('generate_image_variants', stdout=StringIO())
+        self.user.refresh_from_db()
+
+    def test_upload_is_stored_without_metadata(self):
+        self.upload(make_image(orientation=6, gps=True))
+        image = open_image(self.user.display_pic)
+        self.assertFalse(image.getexif())
+        # The orientation is applied to the pixels instead.
+        self.assertEqual(image.size, (20, 40))
+
+        clean = make_image(pillow_format='PNG')
+        self.upload(clean, name='clean.png')
+        with self.user.display_pic.open('rb'):
+            self.assertEqual(self.user.display_pic.read(), clean)
+
+    def test_queued_job_generates_variants(self):
+        self.upload(make_image(size=(1000, 500), gps=True))
+        self.assertEqual(ImageVariantJob.objects.count(), 1)
+
+        self.generate()
+        self.assertFalse(ImageVariantJob.objects.exists())
+        state = self.user.display_pic_variants
+        self.assertEqual(state['source'], self.user.display_pic.name)
+        self.assertEqual((self.user.display_pic_width, self.user.display_pic_height), (1000, 500))
+        self.assertEqual(
+            {variant: (entry['width'], entry['height']) for variant, entry in state['files'].items()},
+            {'thumbnail': (64, 32), 'feed': (160, 80), 'full': (480, 240)},
+        )
+        for entry in state['files'].values():
+            for key, pillow_format in (('webp', 'WEBP'), ('jpeg', 'JPEG')):
+                self.assertTrue(entry[key].startswith('blobs/'))
+                self.assertEqual(Blob.objects.get(name=entry[key]).ref_count, 1)
+                with open(os.path.join(self.media_root, entry[key]), 'rb') as f:
+                    image = Image.open(f)
+                    self.assertEqual(image.format, pillow_format)
+                    self.assertFalse(image.getexif())
+
+        html = Template("{% load temptags %}{% picture user 'display_pic' 'feed' %}").render(Context({'user': self.user}))
+        self.assertIn('type="image/webp"', html)
+        self.assertIn(' 480w', html)
+        self.assertIn(f'src="/media/{state["files"]["feed"]["jpeg"]}"', html)
+
+    def test_small_originals_share_variant_files(self):
+        self.upload(make_image(size=(100, 50)))
+        self.generate()
+        files = self.user.display_pic_variants['files']
+        self.assertEqual(files['feed'], files['full'])
+        self.assertEqual(files['full']['width'], 100)
+
+    def test_variants_of_a_replaced_upload_are_not_recorded(self):
+        self.upload(make_image(size=(200, 100)))
+        stale = User.objects.get(pk=self.user.pk)
+        self.upload(make_image(size=(300, 100)))
+
+        self.assertFalse(generate_variants(stale, 'display_pic'))
+        self.generate()
+        self.assertEqual(self.user.display_pic_width, 300)
+
+    def test_strip_image_metadata_command(self):
+        self.write_media('legacy/me.jpg', make_image(gps=True))
+        User.objects.filter(pk=self.user.pk).update(display_pic='legacy/me.jpg')
+
+        call_command('strip_image_metadata', stdout=StringIO())
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.display_pic.name.startswith('blobs/'))
+        self.assertFalse(open_image(self.user.display_pic).getexif())
+        self.assertTrue(ImageVariantJob.objects.exists())
@@ -0,0 +1,188 @@
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.dispatch import Signal
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from imaging.models import ImageVariantJob
+from imaging.storage import delete_legacy_files, release, retain
+
+
+# Sent with the instance and field name once new variants are recorded. The
+# record is a queryset update, so post_save is not sent for it.
+variants_generated = Signal()
+
+# (format key, Pillow format, extension, save options)
+FORMATS = (
+    ('webp', 'WEBP', 'webp', {'quality': 80, 'method': 6}),
+    ('jpeg', 'JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+)
+
+
+# Formats whose originals are re-encoded without their metadata, with the
+# save options used. Others, such as animated GIFs, are stored as uploaded.
+STRIPPED_FORMATS = {
+    'JPEG': {'quality': 90},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+# Image info that is about rendering rather than about the photo or its author.
+RENDERING_INFO = {
+    'dpi', 'jfif', 'jfif_version', 'jfif_unit', 'jfif_density', 'adobe', 'adobe_transform',
+    'progressive', 'progression', 'transparency', 'icc_profile', 'gamma', 'srgb', 'interlace',
+    'aspect', 'background', 'loop', 'duration',
+}
+
+
+def get_variant_models():
+    """
+    Models declaring IMAGE_VARIANTS, a mapping of image field name to
+    {variant name: max width}
+    """
+    return [model for model in apps.get_models() if getattr(model, 'IMAGE_VARIANTS', None)]
+
+
+def get_variant_state(instance, field_name):
+    return getattr(instance, f'{field_name}_variants') or {}
+
+
+def needs_variants(instance, field_name):
+    field_file = getattr(instance, field_name)
+    if not field_file or field_file.name == instance._meta.get_field(field_name).get_default():
+        return False
+    return get_variant_state(instance, field_name).get('source') != field_file.name
+
+
+def get_variant_files(instance, field_name):
+    files = get_variant_state(instance, field_name).get('files', {})
+    return [entry[key] for entry in files.values() for key, *_ in FORMATS if key in entry]
+
+
+def enqueue_variants(instance, field_name):
+    ImageVariantJob.objects.get_or_create(
+        content_type=ContentType.objects.get_for_model(instance),
+        object_id=instance.pk,
+        field_name=field_name,
+    )
+
+
+def get_variant_name(source, variant, extension):
+    directory, filename = posixpath.split(source)
+    stem = posixpath.splitext(filename)[0]
+    return posixpath.join(directory, 'variants', f'{stem}-{variant}.{extension}')
+
+
+def load_image(field_file):
+    with field_file.open('rb'):
+        image = Image.open(field_file)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+
+    has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+    return image.convert('RGBA' if has_alpha else 'RGB')
+
+
+def strip_metadata(file):
+    """
+    A copy of an image without its EXIF, GPS, XMP and text metadata, with the
+    EXIF orientation applied to the pixels. None when there is nothing to
+    strip or the file is not an image in one of STRIPPED_FORMATS.
+    """
+    try:
+        file.seek(0)
+        image = Image.open(file)
+        image.load()
+    except (OSError, UnidentifiedImageError):
+        return None
+    finally:
+        file.seek(0)
+
+    pillow_format = image.format
+    if pillow_format not in STRIPPED_FORMATS:
+        return None
+    if not image.getexif() and set(image.info) <= RENDERING_INFO:
+        return None
+
+    image = ImageOps.exif_transpose(image)
+    kept = {key: image.info[key] for key in ('transparency', 'icc_profile') if key in image.info}
+    # PNG writes back the EXIF found in info unless it is cleared.
+    image.info = {}
+    buffer = BytesIO()
+    image.save(buffer, format=pillow_format, **kept, **STRIPPED_FORMATS[pillow_format])
+    return ContentFile(buffer.getvalue())
+
+
+def encode(image, pillow_format, options):
+    if pillow_format == 'JPEG' and image.mode == 'RGBA':
+        background = Image.new('RGB', image.size, 'white')
+        background.paste(image, mask=image.getchannel('A'))
+        image = background
+
+    # No exif argument is passed, so the metadata of the upload is dropped.
+    buffer = BytesIO()
+    image.save(buffer, format=pillow_format, **options)
+    return ContentFile(buffer.getvalue())
+
+
+def generate_variants(instance, field_name):
+    """
+    Write the resized WebP and JPEG variants of an image field and record
+    them, with the oriented dimensions of the original, on the instance.
+
+    The record is only written if the field still holds the same file, so
+    a replacement uploaded meanwhile gets its own job. Blob references move
+    from the previous variants to the new ones.
+    """
+    field_file = getattr(instance, field_name)
+    storage = field_file.storage
+    source = field_file.name
+    state = {'source': source, 'files': {}}
+    width = height = None
+
+    try:
+        image = load_image(field_file)
+    except (OSError, UnidentifiedImageError):
+        image = None
+
+    if image is not None:
+        width, height = image.size
+        by_width = {}
+        for variant, max_width in sorted(instance.IMAGE_VARIANTS[field_name].items(), key=lambda item: item[1]):
+            # Variants capped by a small original share the files of the first one.
+            target = min(max_width, image.width)
+            if target not in by_width:
+                resized = image
+                if image.width > target:
+                    resized = image.resize((target, round(image.height * target / image.width)), Image.LANCZOS)
+
+                entry = {'width': resized.width, 'height': resized.height}
+                for key, pillow_format, extension, options in FORMATS:
+                    name = get_variant_name(source, variant, extension)
+                    entry[key] = storage.save(name, encode(resized, pillow_format, options))
+                by_width[target] = entry
+            state['files'][variant] = by_width[target]
+
+    updated = type(instance)._default_manager.filter(pk=instance.pk, **{field_name: source}).update(**{
+        f'{field_name}_variants': state,
+        f'{field_name}_width': width,
+        f'{field_name}_height': height,
+    })
+    # Files written for a replaced upload stay unreferenced and get collected.
+    if updated:
+        retain({entry[key] for entry in state['files'].values() for key, *_ in FORMATS})
+        previous = get_variant_files(instance, field_name)
+        release(previous)
+        delete_legacy_files(previous)
+        variants_generated.send(sender=type(instance), instance=instance, field_name=field_name)
+    return bool(updated)
+
+
+def process_job(job):
+    model = job.content_type.model_class()
+    instance = model._default_manager.filter(pk=job.object_id).first()
+    if instance is not None and needs_variants(instance, job.field_name):
+        generate_variants(instance, job.field_name)
+    job.delete()
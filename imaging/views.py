@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.http import Http404
+from django.utils.cache import patch_cache_control
+from django.views.static import serve
+
+from imaging.storage import BLOB_DIRECTORY, is_blob_name
+
+
+# A year, the longest lifetime caches are expected to honour.
+BLOB_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def serve_media(request, path):
+    """
+    Serve an uploaded file in DEBUG, see MediaFilesMiddleware otherwise.
+    Blobs are named after their content, so they are cached forever; other
+    files are revalidated on every use.
+    """
+    if path.startswith(f'{BLOB_DIRECTORY}/tmp/'):
+        raise Http404()
+
+    response = serve(request, path, document_root=settings.MEDIA_ROOT)
+    if is_blob_name(path):
+        patch_cache_control(response, public=True, max_age=BLOB_MAX_AGE, immutable=True)
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
@@ -0,0 +1,110 @@
+import re
+import uuid
+
+from django.db import connection
+from django.db.models import Q
+
+from search.models import BlogDocument
+
+
+TERM_PATTERN = re.compile(r'\w+', re.UNICODE)
+MAX_TERMS = 8
+
+
+def get_terms(query):
+    return TERM_PATTERN.findall(query.lower())[:MAX_TERMS]
+
+
+def to_blog_ids(rows):
+    return [uuid.UUID(str(row[0])) for row in rows]
+
+
+class SQLiteSearchBackend:
+    """
+    FTS5 index ranked with bm25, heading matches weigh the most.
+    """
+    table = 'search_blogdocument_fts'
+    weights = (10.0, 4.0, 1.0, 6.0)
+
+    def match_expression(self, terms):
+        # Quoted terms keep FTS5 operators in user input from being parsed,
+        # the last term is matched as a prefix so partial words still hit.
+        quoted = ['"{}"'.format(term) for term in terms]
+        quoted[-1] += '*'
+        return ' '.join(quoted)
+
+    def search(self, query, offset, limit):
+        terms = get_terms(query)
+        if not terms:
+            return []
+        weights = ', '.join(str(weight) for weight in self.weights)
+        sql = (
+            f'SELECT document.blog_id FROM {self.table} '
+            f'JOIN search_blogdocument AS document ON document.id = {self.table}.rowid '
+            f'WHERE {self.table} MATCH %s '
+            f'ORDER BY bm25({self.table}, {weights}) LIMIT %s OFFSET %s'
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [self.match_expression(terms), limit, offset])
+            return to_blog_ids(cursor.fetchall())
+
+    def rebuild(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"INSERT INTO {self.table}({self.table}) VALUES ('rebuild')")
+
+
+class MySQLSearchBackend:
+    """
+    InnoDB FULLTEXT index queried in boolean mode, ranked by relevance.
+    """
+    columns = 'heading, description, content, tags'
+
+    def match_expression(self, terms):
+        return ' '.join(f'+{term}*' for term in terms)
+
+    def search(self, query, offset, limit):
+        terms = get_terms(query)
+        if not terms:
+            return []
+        sql = (
+            f'SELECT blog_id, MATCH ({self.columns}) AGAINST (%s IN BOOLEAN MODE) AS score '
+            f'FROM search_blogdocument '
+            f'WHERE MATCH ({self.columns}) AGAINST (%s IN BOOLEAN MODE) '
+            f'ORDER BY score DESC LIMIT %s OFFSET %s'
+        )
+        expression = self.match_expression(terms)
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [expression, expression, limit, offset])
+            return to_blog_ids(cursor.fetchall())
+
+    def rebuild(self):
+        pass
+
+
+class BasicSearchBackend:
+    """
+    Unindexed fallback for databases without a native full-text backend.
+    """
+
+    def search(self, query, offset, limit):
+        terms = get_terms(query)
+        if not terms:
+            return []
+        documents = BlogDocument.objects.all()
+        for term in terms:
+            documents = documents.filter(
+                Q(heading__icontains=term) | Q(description__icontains=term)
+                | Q(content__icontains=term) | Q(tags__icontains=term)
+            )
+        return list(documents.order_by('-id').values_list('blog_id', flat=True)[offset:offset + limit])
+
+    def rebuild(self):
+        pass
+
+
+def get_search_backend():
+    if connection.vendor == 'sqlite':
+        return SQLiteSearchBackend()
+    if connection.vendor == 'mysql':
+        return MySQLSearchBackend()
+    return BasicSearchBackend()
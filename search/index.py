@@ -0,0 +1,32 @@
+from django.db import transaction
+
+from blog.models import Blog, Post
+from search.models import BlogDocument
+
+
+def index_blog(blog_id):
+    """
+    Rebuild the search document of one blog, or drop it when the blog is
+    gone or not published
+    """
+    blog = Blog.objects.filter(pk=blog_id).prefetch_related('tags').first()
+    if blog is None or not blog.is_published:
+        BlogDocument.objects.filter(blog_id=blog_id).delete()
+        return
+
+    posts = Post.objects.filter(blog_id=blog_id).values_list('heading', 'content')
+    BlogDocument.objects.update_or_create(
+        blog=blog,
+        defaults={
+            'heading': blog.heading,
+            'description': blog.description or '',
+            'content': '\n'.join(' '.join(filter(None, post)) for post in posts),
+            'tags': ' '.join(tag.name for tag in blog.tags.all()),
+        },
+    )
+
+
+def schedule_index_blog(blog_ids):
+    # Index after commit so cascades and rollbacks never leave a stale document.
+    for blog_id in set(blog_ids):
+        transaction.on_commit(lambda blog_id=blog_id: index_blog(blog_id))
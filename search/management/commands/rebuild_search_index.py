@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Blog
+from search.backends import get_search_backend
+from search.index import index_blog
+from search.models import BlogDocument
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index of published blogs.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of blogs indexed per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        BlogDocument.objects.exclude(blog__status='1').delete()
+
+        blog_ids = Blog.objects.filter(status='1').order_by('pk').values_list('pk', flat=True)
+        indexed = 0
+        last_id = None
+        while True:
+            batch = blog_ids if last_id is None else blog_ids.filter(pk__gt=last_id)
+            batch = list(batch[:batch_size])
+            if not batch:
+                break
+
+            with transaction.atomic():
+                for blog_id in batch:
+                    index_blog(blog_id)
+            indexed += len(batch)
+            last_id = batch[-1]
+
+        get_search_backend().rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {indexed} blogs.'))
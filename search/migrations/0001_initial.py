@@ -0,0 +1,75 @@
+# Generated by Django 3.2 on 2026-10-18 17:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE search_blogdocument_fts USING fts5("
+    "heading, description, content, tags, "
+    "content='search_blogdocument', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER search_blogdocument_ai AFTER INSERT ON search_blogdocument BEGIN "
+    "INSERT INTO search_blogdocument_fts(rowid, heading, description, content, tags) "
+    "VALUES (new.id, new.heading, new.description, new.content, new.tags); END",
+    "CREATE TRIGGER search_blogdocument_ad AFTER DELETE ON search_blogdocument BEGIN "
+    "INSERT INTO search_blogdocument_fts(search_blogdocument_fts, rowid, heading, description, content, tags) "
+    "VALUES ('delete', old.id, old.heading, old.description, old.content, old.tags); END",
+    "CREATE TRIGGER search_blogdocument_au AFTER UPDATE ON search_blogdocument BEGIN "
+    "INSERT INTO search_blogdocument_fts(search_blogdocument_fts, rowid, heading, description, content, tags) "
+    "VALUES ('delete', old.id, old.heading, old.description, old.content, old.tags); "
+    "INSERT INTO search_blogdocument_fts(rowid, heading, description, content, tags) "
+    "VALUES (new.id, new.heading, new.description, new.content, new.tags); END",
+]
+
+SQLITE_BACKWARD = [
+    'DROP TRIGGER IF EXISTS search_blogdocument_au',
+    'DROP TRIGGER IF EXISTS search_blogdocument_ad',
+    'DROP TRIGGER IF EXISTS search_blogdocument_ai',
+    'DROP TABLE IF EXISTS search_blogdocument_fts',
+]
+
+MYSQL_FORWARD = [
+    'ALTER TABLE search_blogdocument ADD FULLTEXT INDEX search_blogdocument_ft (heading, description, content, tags)',
+]
+
+MYSQL_BACKWARD = [
+    'ALTER TABLE search_blogdocument DROP INDEX search_blogdocument_ft',
+]
+
+
+def run_vendor_sql(statements):
+    def run(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('blog', '0015_blog_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlogDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('heading', models.TextField(default='', verbose_name='Heading')),
+                ('description', models.TextField(default='', verbose_name='Description')),
+                ('content', models.TextField(default='', verbose_name='Content')),
+                ('tags', models.TextField(default='', verbose_name='Tags')),
+                ('blog', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='search_document', to='blog.blog')),
+            ],
+            options={
+                'verbose_name': 'Blog Document',
+                'verbose_name_plural': 'Blog Documents',
+            },
+        ),
+        migrations.RunPython(
+            run_vendor_sql({'sqlite': SQLITE_FORWARD, 'mysql': MYSQL_FORWARD}),
+            run_vendor_sql({'sqlite': SQLITE_BACKWARD, 'mysql': MYSQL_BACKWARD}),
+        ),
+    ]
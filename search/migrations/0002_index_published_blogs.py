@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from django.db import migrations
+
+
+BATCH_SIZE = 500
+
+
+def index_published_blogs(apps, schema_editor):
+    """
+    Documents of the blogs published before the index existed. The triggers
+    and FULLTEXT index pick them up as they are inserted.
+    """
+    Blog = apps.get_model('blog', 'Blog')
+    Post = apps.get_model('blog', 'Post')
+    BlogDocument = apps.get_model('search', 'BlogDocument')
+    alias = schema_editor.connection.alias
+
+    blogs = (
+        Blog.objects.using(alias)
+        .filter(status='1', search_document__isnull=True)
+        .order_by('pk')
+        .prefetch_related('tags')
+    )
+    last_id = None
+    while True:
+        batch = blogs if last_id is None else blogs.filter(pk__gt=last_id)
+        batch = list(batch[:BATCH_SIZE])
+        if not batch:
+            break
+
+        # Frozen copy of search.index.index_blog at the time of this migration.
+        content = defaultdict(list)
+        posts = Post.objects.using(alias).filter(blog__in=batch).values_list('blog_id', 'heading', 'content')
+        for blog_id, *post in posts:
+            content[blog_id].append(' '.join(filter(None, post)))
+        BlogDocument.objects.using(alias).bulk_create([
+            BlogDocument(
+                blog_id=blog.pk,
+                heading=blog.heading,
+                description=blog.description or '',
+                content='\n'.join(content[blog.pk]),
+                tags=' '.join(tag.name for tag in blog.tags.all()),
+            )
+            for blog in batch
+        ])
+        last_id = batch[-1].pk
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('blog', '0015_blog_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_published_blogs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+from blog.models import Blog
+
+
+class BlogDocument(models.Model):
+    """
+    Flattened, searchable text of a published blog.
+
+    The full-text index itself lives next to this table and is maintained by
+    the database: an FTS5 table kept in sync by triggers on SQLite, a
+    FULLTEXT index on MySQL.
+    """
+    blog = models.OneToOneField(
+        Blog,
+        on_delete=models.CASCADE,
+        related_name='search_document',
+    )
+    heading = models.TextField(
+        verbose_name=_('Heading'),
+        default='',
+    )
+    description = models.TextField(
+        verbose_name=_('Description'),
+        default='',
+    )
+    content = models.TextField(
+        verbose_name=_('Content'),
+        default='',
+    )
+    tags = models.TextField(
+        verbose_name=_('Tags'),
+        default='',
+    )
+
+    class Meta:
+        verbose_name = _('Blog Document')
+        verbose_name_plural = _('Blog Documents')
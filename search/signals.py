@@ -0,0 +1,44 @@
+from django.dispatch import receiver
+from django.db.models.signals import pre_delete, post_save, post_delete, m2m_changed
+
+from blog.models import Blog, Post, Tag
+from search.index import schedule_index_blog
+
+
+@receiver(post_save, sender=Blog)
+def blog_saved(sender, instance, **kwargs):
+    schedule_index_blog([instance.pk])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def post_changed(sender, instance, **kwargs):
+    schedule_index_blog([instance.blog_id])
+
+
+@receiver(m2m_changed, sender=Blog.tags.through)
+def blog_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        schedule_index_blog(pk_set or [])
+    else:
+        schedule_index_blog([instance.pk])
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, created, **kwargs):
+    if not created:
+        schedule_index_blog(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    # The cascade removes the through rows without m2m_changed, so remember
+    # the tagged blogs while they can still be read.
+    instance._tagged_blog_ids = list(instance.tags.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    schedule_index_blog(getattr(instance, '_tagged_blog_ids', []))
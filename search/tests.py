@@ -0,0 +1,144 @@
+from importlib import import_module
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from account.models import User
+from blog.models import Blog, Post, Tag
+from search.backends import BasicSearchBackend, SQLiteSearchBackend
+from search.models import BlogDocument
+
+
+class SearchTestCase(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('writer@example.com', 'writer', 'password')
+        cls.tag = Tag.objects.create(name='gardening')
+
+    def create_blog(self, heading, content='', status='1'):
+        with self.captureOnCommitCallbacks(execute=True):
+            blog = Blog.objects.create(user=self.user, heading=heading, status=status, date_published=timezone.now())
+            if content:
+                Post.objects.create(blog=blog, content=content)
+        return blog
+
+    def update_blog(self, blog, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            for name, value in fields.items():
+                setattr(blog, name, value)
+            blog.save()
+
+
+class SQLiteSearchBackendTests(SearchTestCase):
+    backend = SQLiteSearchBackend()
+
+    def search(self, query):
+        return self.backend.search(query, 0, 10)
+
+    def test_triggers_index_new_documents(self):
+        blog = self.create_blog('Growing tomatoes', 'Water them every morning.')
+        with self.captureOnCommitCallbacks(execute=True):
+            blog.tags.add(self.tag)
+        self.assertEqual(self.search('tomatoes'), [blog.pk])
+        self.assertEqual(self.search('morning'), [blog.pk])
+        self.assertEqual(self.search('gardening'), [blog.pk])
+
+    def test_triggers_follow_updates_and_deletes(self):
+        blog = self.create_blog('Growing tomatoes')
+        self.update_blog(blog, heading='Growing peppers')
+        self.assertEqual(self.search('tomatoes'), [])
+        self.assertEqual(self.search('peppers'), [blog.pk])
+
+        self.update_blog(blog, status='0')
+        self.assertEqual(self.search('peppers'), [])
+
+    def test_last_term_is_a_prefix_and_operators_are_quoted(self):
+        blog = self.create_blog('Growing tomatoes')
+        self.assertEqual(self.search('grow tom'), [blog.pk])
+        self.assertEqual(self.search('tomatoes OR NOT "'), [])
+
+    def test_heading_matches_rank_first(self):
+        in_content = self.create_blog('Peppers', 'A note on tomatoes.')
+        in_heading = self.create_blog('Tomatoes')
+        self.assertEqual(self.search('tomatoes'), [in_heading.pk, in_content.pk])
+
+    def test_deleted_tag_is_removed_from_documents(self):
+        blog = self.create_blog('Growing tomatoes')
+        with self.captureOnCommitCallbacks(execute=True):
+            blog.tags.add(self.tag)
+        self.assertEqual(self.search('gardening'), [blog.pk])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        self.assertEqual(self.search('gardening'), [])
+        self.assertEqual(self.search('tomatoes'), [blog.pk])
+
+    def test_drafts_are_not_indexed(self):
+        self.create_blog('Draft tomatoes', status='0')
+        self.assertEqual(self.search('tomatoes'), [])
+
+
+class BasicSearchBackendTests(SearchTestCase):
+    backend = BasicSearchBackend()
+
+    def test_every_term_must_match(self):
+        both = self.create_blog('Growing tomatoes', 'In the greenhouse.')
+        self.create_blog('Growing peppers')
+        self.assertEqual(self.backend.search('growing greenhouse', 0, 10), [both.pk])
+
+    def test_newest_documents_first_with_offset_and_limit(self):
+        blogs = [self.create_blog(f'Tomatoes {i}') for i in range(3)]
+        self.assertEqual(self.backend.search('tomatoes', 0, 2), [blogs[2].pk, blogs[1].pk])
+        self.assertEqual(self.backend.search('tomatoes', 2, 2), [blogs[0].pk])
+
+    def test_query_without_terms(self):
+        self.create_blog('Tomatoes')
+        self.assertEqual(self.backend.search('  ?! ', 0, 10), [])
+
+
+@mock.patch('search.views.RESULTS_PER_PAGE', 2)
+class SearchViewTests(SearchTestCase):
+
+    def get_page(self, query, page=None):
+        params = {'q': query} if page is None else {'q': query, 'page': page}
+        return self.client.get(reverse('search:search'), params).context
+
+    def test_pages(self):
+        for i in range(3):
+            self.create_blog(f'Tomatoes {i}')
+        first = self.get_page('tomatoes')
+        self.assertEqual(first['page'], 1)
+        self.assertEqual(len(first['blogs']), 2)
+        self.assertTrue(first['has_next'])
+
+        second = self.get_page('tomatoes', 2)
+        self.assertEqual(len(second['blogs']), 1)
+        self.assertFalse(second['has_next'])
+        self.assertFalse({blog.pk for blog in first['blogs']} & {blog.pk for blog in second['blogs']})
+
+    def test_invalid_page_falls_back_to_the_first(self):
+        self.create_blog('Tomatoes')
+        self.assertEqual(self.get_page('tomatoes', 'last')['page'], 1)
+        self.assertEqual(self.get_page('tomatoes', -3)['page'], 1)
+
+
+class IndexPublishedBlogsMigrationTests(SearchTestCase):
+    migration = import_module('search.migrations.0002_index_published_blogs')
+
+    def test_existing_blogs_are_indexed(self):
+        blog = self.create_blog('Growing tomatoes', 'Water them every morning.')
+        blog.tags.add(self.tag)
+        self.create_blog('Draft tomatoes', status='0')
+        BlogDocument.objects.all().delete()
+
+        self.migration.index_published_blogs(apps, SimpleNamespace(connection=connection))
+        document = BlogDocument.objects.get()
+        self.assertEqual(document.blog_id, blog.pk)
+        self.assertEqual(document.tags, 'gardening')
+        self.assertEqual(SQLiteSearchBackend().search('morning', 0, 10), [blog.pk])
@@ -0,0 +1,37 @@
+from django.shortcuts import render
+
+from blog.models import Blog, attach_feed_comments
+from search.backends import get_search_backend
+from accountProfile.viewer import ViewerState
+
+
+RESULTS_PER_PAGE = 10
+MAX_PAGES = 50
+
+
+def search_view(request, *args, **kwargs):
+    context = {}
+
+    query = request.GET.get('q', '').strip()
+    try:
+        page = min(max(int(request.GET.get('page', 1)), 1), MAX_PAGES)
+    except ValueError:
+        page = 1
+
+    blogs = []
+    has_next = False
+    if query:
+        offset = (page - 1) * RESULTS_PER_PAGE
+        blog_ids = get_search_backend().search(query, offset, RESULTS_PER_PAGE + 1)
+        has_next = len(blog_ids) > RESULTS_PER_PAGE and page < MAX_PAGES
+        blog_ids = blog_ids[:RESULTS_PER_PAGE]
+
+        found = Blog.objects.for_feed().filter(status='1').in_bulk(blog_ids)
+        blogs = attach_feed_comments([found[blog_id] for blog_id in blog_ids if blog_id in found])
+
+    context['query'] = query
+    context['blogs'] = blogs
+    context['page'] = page
+    context['has_next'] = has_next
+    context['viewer'] = ViewerState(request.user, blogs=blogs)
+    return render(request, 'search/search.html', context)
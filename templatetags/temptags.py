@@ -17,16 +17,40 @@ def isFileInput(value):
 
 @register.filter
 def getLikeCount(blog):
-    return len(blog.likes.all())
+    return blog.like_count
 
 
 @register.filter
 def getDislikeCount(blog):
-    return len(blog.dislikes.all())
-
-@register.filter
-def sliceComment(comments):
-    if len(comments) <= 2:
-        return comments
-    else:
-        return comments[:2]
+    return blog.dislike_count
+
+
+@register.inclusion_tag('snippets/picture.html')
+def picture(instance, field_name, variant='feed', sizes=None, css_class='', alt=''):
+    """
+    An <img> of an image field that lets the browser pick the smallest
+    generated variant, with WebP preferred and JPEG as the fallback.
+    Falls back to the original until the variants exist.
+    """
+    field_file = getattr(instance, field_name)
+    state = getattr(instance, f'{field_name}_variants', None) or {}
+    files = state.get('files') if state.get('source') == field_file.name else None
+
+    context = {'css_class': css_class, 'alt': alt, 'src': field_file.url if field_file else ''}
+    if not files:
+        context['width'] = getattr(instance, f'{field_name}_width', None)
+        context['height'] = getattr(instance, f'{field_name}_height', None)
+        return context
+
+    storage = field_file.storage
+    entries = sorted({entry['width']: entry for entry in files.values()}.values(), key=lambda entry: entry['width'])
+    chosen = files.get(variant) or entries[-1]
+    context.update({
+        'src': storage.url(chosen['jpeg']),
+        'width': chosen['width'],
+        'height': chosen['height'],
+        'sizes': sizes or f'(max-width: {chosen["width"]}px) 100vw, {chosen["width"]}px',
+        'webp_srcset': ', '.join(f'{storage.url(entry["webp"])} {entry["width"]}w' for entry in entries),
+        'jpeg_srcset': ', '.join(f'{storage.url(entry["jpeg"])} {entry["width"]}w' for entry in entries),
+    })
+    return context